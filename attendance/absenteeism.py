@@ -0,0 +1,136 @@
+"""
+Weekly chronic absenteeism detection.
+
+`detect(school)` reads the lookback period's attendance in one query
+(live and archived, through archive.rows), ordered by student and date,
+and packs each student into two compact columns: day ordinals (array 'l')
+and a day credit (array 'b'; 2 attended, 1 half day, 0 absent, the worst
+mark wins when a day has several sessions). Every metric is then a whole-column pass over those arrays, with
+no per-row model objects:
+
+- rate: credits over possible credits for all marked days;
+- recent_rate: the same over the last RECENT_DAYS (a bisect into the days);
+- worst_window_rate: the lowest rate over any WINDOW consecutive marked
+  days, from a prefix-sum column;
+- weekday pattern: absences per weekday, flagged when one weekday's absence
+  rate is at least PATTERN_RATIO times the student's overall rate.
+
+Flagged students are stored ranked (worst rate first) as ChronicAbsence
+rows for the as-of date, replacing that run.
+"""
+from array import array
+from bisect import bisect_left
+from datetime import timedelta
+from itertools import accumulate, groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import archive
+from .models import ChronicAbsence
+
+THRESHOLD = getattr(settings, 'ATTENDANCE_CHRONIC_THRESHOLD', 0.9)  # attended share below this is chronic
+LOOKBACK_DAYS = getattr(settings, 'ATTENDANCE_CHRONIC_LOOKBACK_DAYS', 120)
+RECENT_DAYS = getattr(settings, 'ATTENDANCE_CHRONIC_RECENT_DAYS', 28)
+WINDOW = getattr(settings, 'ATTENDANCE_CHRONIC_WINDOW', 10)  # marked days
+MIN_DAYS = getattr(settings, 'ATTENDANCE_CHRONIC_MIN_DAYS', 10)  # fewer marked days: not judged
+DECLINE = 0.1  # recent rate this far below the overall rate
+PATTERN_RATIO = 2.0
+PATTERN_MIN_ABSENCES = 3
+
+CREDIT = {"PRESENT": 2, "LATE": 2, "HALF_DAY": 1, "ABSENT": 0}
+
+
+def student_columns(school, start, end):
+    """Yield (student_id, days, credits) per student, from one streamed query (closed years included)."""
+    rows = archive.rows(school, start, end, fields=["student_id", "date", "status"]).order_by("student_id", "date")
+    for student_id, student_rows in groupby(rows.iterator(chunk_size=5000), key=itemgetter("student_id")):
+        days, credits = array("l"), array("b")
+        for row in student_rows:
+            ordinal, credit = row["date"].toordinal(), CREDIT.get(row["status"], 0)
+            if days and days[-1] == ordinal:
+                credits[-1] = min(credits[-1], credit)
+            else:
+                days.append(ordinal)
+                credits.append(credit)
+        yield student_id, days, credits
+
+
+def analyse(days, credits, as_of):
+    """Metrics and flags for one student's columns, or None if too few days."""
+    n = len(days)
+    if n < MIN_DAYS:
+        return None
+    rate = sum(credits) / (2 * n)
+
+    recent = credits[bisect_left(days, (as_of - timedelta(days=RECENT_DAYS)).toordinal()):]
+    recent_rate = sum(recent) / (2 * len(recent)) if recent else None
+
+    width = min(WINDOW, n)
+    prefix = array("l", accumulate(credits, initial=0))
+    worst_window_rate = min(prefix[i + width] - prefix[i] for i in range(n - width + 1)) / (2 * width)
+
+    marked, absent = [0] * 7, [0] * 7
+    for ordinal, credit in zip(days, credits):
+        weekday = (ordinal - 1) % 7  # date.fromordinal(1) is a Monday
+        marked[weekday] += 1
+        absent[weekday] += credit == 0
+    absent_days = sum(absent)
+    overall_absence = absent_days / n
+    weekday = max(range(7), key=lambda d: absent[d] / marked[d] if marked[d] else 0)
+
+    flags = []
+    if rate < THRESHOLD:
+        flags.append("chronic")
+    if recent_rate is not None and recent_rate <= rate - DECLINE:
+        flags.append("declining")
+    if (
+        absent[weekday] >= PATTERN_MIN_ABSENCES
+        and absent[weekday] / marked[weekday] >= PATTERN_RATIO * overall_absence
+    ):
+        flags.append("weekday")
+    else:
+        weekday = None
+
+    return {
+        "rate": round(rate, 4),
+        "recent_rate": round(recent_rate, 4) if recent_rate is not None else None,
+        "worst_window_rate": round(worst_window_rate, 4),
+        "marked_days": n,
+        "absent_days": absent_days,
+        "weekday": weekday,
+        "flags": flags,
+    }
+
+
+def detect(school, as_of=None):
+    """Run the analysis for `school` as of `as_of` (default today). Returns rows stored."""
+    as_of = as_of or timezone.localdate()
+    start = as_of - timedelta(days=LOOKBACK_DAYS)
+
+    found = []
+    for student_id, days, credits in student_columns(school, start, as_of):
+        result = analyse(days, credits, as_of)
+        if result and result["flags"]:
+            found.append((student_id, result))
+    found.sort(key=lambda item: (item[1]["rate"], item[1]["worst_window_rate"], item[0]))
+
+    with transaction.atomic():
+        ChronicAbsence.objects.filter(school=school, as_of=as_of).delete()
+        ChronicAbsence.objects.bulk_create([
+            ChronicAbsence(school=school, student_id=student_id, as_of=as_of, rank=rank, **result)
+            for rank, (student_id, result) in enumerate(found, start=1)
+        ], batch_size=1000)
+    return len(found)
+
+
+def latest(school):
+    """The most recent run's ranked rows for `school`."""
+    as_of = (
+        ChronicAbsence.objects.filter(school=school).order_by("-as_of").values_list("as_of", flat=True).first()
+    )
+    if as_of is None:
+        return ChronicAbsence.objects.none()
+    return ChronicAbsence.objects.filter(school=school, as_of=as_of).select_related("student", "student__class_program")
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Attendance
+from .models import ArchivedAttendance, Attendance, AttendanceBitmap, ChronicAbsence, RegisterJob, AttendanceDailySummary, AttendanceStreak, AttendanceYear
 
 
 @admin.register(Attendance)
@@ -7,4 +7,66 @@ class AttendanceAdmin(admin.ModelAdmin):
     list_display = ('student', 'date', 'status', 'marked_by', 'school')
     list_filter = ('school', 'status', 'date')
     search_fields = ('student__first_name', 'student__last_name')
-    date_hierarchy = 'date'
\ No newline at end of file
+    date_hierarchy = 'date'
+
+
+@admin.register(AttendanceStreak)
+class AttendanceStreakAdmin(admin.ModelAdmin):
+    list_display = ('student', 'current_absent_streak', 'longest_absent_streak', 'last_date', 'school')
+    list_filter = ('school',)
+    search_fields = ('student__first_name', 'student__last_name')
+    ordering = ('-current_absent_streak',)
+
+
+@admin.register(AttendanceBitmap)
+class AttendanceBitmapAdmin(admin.ModelAdmin):
+    list_display = ('student', 'year', 'updated_at', 'school')
+    list_filter = ('school', 'year')
+    search_fields = ('student__first_name', 'student__last_name')
+    exclude = ('bits',)
+
+
+@admin.register(AttendanceDailySummary)
+class AttendanceDailySummaryAdmin(admin.ModelAdmin):
+    list_display = ('date', 'class_program', 'session', 'present', 'absent', 'late', 'half_day', 'school')
+    list_filter = ('school', 'date')
+    date_hierarchy = 'date'
+
+
+@admin.register(AttendanceYear)
+class AttendanceYearAdmin(admin.ModelAdmin):
+    list_display = ('school', 'year', 'closed_at', 'attendance_rows', 'log_rows')
+    list_filter = ('school',)
+    readonly_fields = ('closed_at', 'attendance_rows', 'log_rows')
+
+
+@admin.register(ArchivedAttendance)
+class ArchivedAttendanceAdmin(admin.ModelAdmin):
+    """Closed years are read-only; rows only arrive via archive_attendance_year."""
+    list_display = ('student', 'date', 'status', 'academic_year', 'school')
+    list_filter = ('school', 'academic_year', 'status')
+    date_hierarchy = 'date'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ChronicAbsence)
+class ChronicAbsenceAdmin(admin.ModelAdmin):
+    list_display = ('rank', 'student', 'rate', 'recent_rate', 'worst_window_rate', 'flags', 'as_of', 'school')
+    list_filter = ('school', 'as_of')
+    search_fields = ('student__full_name',)
+
+
+@admin.register(RegisterJob)
+class RegisterJobAdmin(admin.ModelAdmin):
+    list_display = ('month', 'class_program', 'status', 'done', 'total', 'requested_by', 'created_at', 'school')
+    list_filter = ('school', 'status')
+    readonly_fields = ('total', 'done', 'file', 'error', 'started_at', 'finished_at')
+
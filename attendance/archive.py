@@ -0,0 +1,194 @@
+"""
+Academic-year archival of attendance.
+
+Attendance grows by students × sessions × school days, and AttendanceLog
+roughly doubles it. Once an academic year is over, `close_year` moves that
+year's rows out of the live tables into ArchivedAttendance, folding each
+row's log into it, and records the year in AttendanceYear. From then on the
+live tables and their indexes only hold open years, and marks dated in a
+closed year are refused (`ensure_open`).
+
+`rows()` is the read facade: it unions the live and archive tables, and
+skips whichever one the requested date range can't touch. `querysets()`
+hands out the same two tables unreduced, for readers that aggregate per
+table or page through model rows, and `student_count` / `top_absent` are
+the cross-table aggregates the analytics views need.
+
+Daily summaries (AttendanceDailySummary) and streaks are left as they are,
+so analytics over closed years keep working without reading the archive.
+"""
+from collections import Counter
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from students.models import Student
+
+from .models import ArchivedAttendance, Attendance, AttendanceLog, AttendanceYear
+
+START_MONTH = getattr(settings, 'ACADEMIC_YEAR_START_MONTH', 9)
+
+ROW_FIELDS = ["id", "student_id", "class_program_id", "date", "session_id", "status"]
+
+
+class ClosedYearError(ValueError):
+    pass
+
+
+def academic_year(day):
+    """The calendar year the academic year containing `day` starts in."""
+    return day.year if day.month >= START_MONTH else day.year - 1
+
+
+def year_bounds(year):
+    """First and last day of academic year `year`."""
+    return date(year, START_MONTH, 1), date(year + 1, START_MONTH, 1) - timedelta(days=1)
+
+
+def closed_years(school_id):
+    return set(AttendanceYear.objects.filter(school_id=school_id).values_list("year", flat=True))
+
+
+def closed_among(school_id, dates):
+    """The closed academic years that any of `dates` fall in."""
+    current = academic_year(timezone.localdate())
+    # Only past years can be closed, so the usual marking path costs no query.
+    past = {year for year in map(academic_year, dates) if year < current}
+    return past & closed_years(school_id) if past else set()
+
+
+def ensure_open(school_id, dates):
+    """Raise ClosedYearError if any of `dates` falls in a closed year."""
+    closed = closed_among(school_id, dates)
+    if closed:
+        year = min(closed)
+        raise ClosedYearError(f"The {year}/{year + 1} academic year is closed; its attendance is read-only.")
+
+
+def close_year(school, year, closed_by=None, batch_size=2000):
+    """
+    Move `school`'s attendance for academic year `year` into the archive.
+    Returns the AttendanceYear row. Only past years can be closed.
+    """
+    if year >= academic_year(timezone.localdate()):
+        raise ClosedYearError("Only past academic years can be closed.")
+    start, end = year_bounds(year)
+
+    with transaction.atomic():
+        closed, _ = AttendanceYear.objects.select_for_update().get_or_create(
+            school=school, year=year, defaults={"closed_by": closed_by},
+        )
+        live = Attendance.objects.filter(school=school, date__gte=start, date__lte=end).order_by("id")
+        last_id = 0
+        while True:
+            batch = list(live.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].id
+            ids = [row.id for row in batch]
+
+            changes = {}
+            logs = AttendanceLog.objects.filter(attendance_id__in=ids).order_by("changed_at", "id").values_list(
+                "attendance_id", "previous_status", "new_status", "changed_by_id", "changed_at", "note", "collapsed",
+            )
+            for attendance_id, previous, new, changed_by_id, changed_at, note, collapsed in logs:
+                changes.setdefault(attendance_id, []).append(
+                    [previous, new, changed_by_id, changed_at.isoformat(), note, collapsed]
+                )
+            ArchivedAttendance.objects.bulk_create([
+                ArchivedAttendance(
+                    id=row.id, school_id=row.school_id, academic_year=year, student_id=row.student_id,
+                    class_program_id=row.class_program_id, date=row.date, session_id=row.session_id,
+                    status=row.status, remarks=row.remarks, marked_by_id=row.marked_by_id,
+                    marked_at=row.marked_at, updated_at=row.updated_at, changes=changes.get(row.id, []),
+                )
+                for row in batch
+            ])
+            # Raw deletes: the post_delete receivers would take these rows out
+            # of the daily summaries and streaks, which must keep them.
+            log_rows = AttendanceLog.objects.filter(attendance_id__in=ids)
+            closed.log_rows += log_rows._raw_delete(log_rows.db)
+            rows = Attendance.objects.filter(id__in=ids)
+            closed.attendance_rows += rows._raw_delete(rows.db)
+
+        closed.save(update_fields=["attendance_rows", "log_rows"])
+    return closed
+
+
+def vacuum():
+    """Give the space freed by close_year back to the database. Not inside a transaction."""
+    tables = [Attendance._meta.db_table, AttendanceLog._meta.db_table]
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute("VACUUM")
+        elif connection.vendor == "postgresql":
+            for table in tables:
+                cursor.execute(f"VACUUM ANALYZE {connection.ops.quote_name(table)}")
+
+
+def querysets(school, start=None, end=None, **filters):
+    """
+    The live and archive querysets holding attendance between `start` and
+    `end` (inclusive), filtered but not reduced, for readers that need more
+    than `rows()` (aggregates per table, model instances). Only the tables
+    the range can reach are returned. `school=None` covers every school.
+    A date is only ever in one of the two tables.
+    """
+    scope = dict(filters)
+    if school is not None:
+        scope["school"] = school
+    if start is not None:
+        scope["date__gte"] = start
+    if end is not None:
+        scope["date__lte"] = end
+
+    closed_rows = AttendanceYear.objects.all() if school is None else AttendanceYear.objects.filter(school=school)
+    closed = set(closed_rows.values_list("year", flat=True))
+    years = None
+    if start is not None and end is not None:
+        years = set(range(academic_year(start), academic_year(end) + 1))
+
+    parts = []
+    if years is None or years - closed or school is None:
+        parts.append(Attendance.objects.filter(**scope))
+    if closed and (years is None or years & closed):
+        parts.append(ArchivedAttendance.objects.filter(**scope))
+    return parts
+
+
+def rows(school, start=None, end=None, fields=ROW_FIELDS, **filters):
+    """
+    Attendance for `school` between `start` and `end` (inclusive), live and
+    archived, as a values() queryset of `fields`. Only the tables the range
+    can reach are queried.
+    """
+    parts = [qs.order_by().values(*fields) for qs in querysets(school, start, end, **filters)]
+    if not parts:
+        return Attendance.objects.none().values(*fields)
+    return parts[0].union(*parts[1:], all=True) if len(parts) > 1 else parts[0]
+
+
+def student_count(parts):
+    """Distinct students across `querysets()` parts."""
+    students = [qs.order_by().values("student_id") for qs in parts]
+    if not students:
+        return 0
+    if len(students) == 1:
+        return students[0].distinct().count()
+    return students[0].union(*students[1:]).count()
+
+
+def top_absent(parts, limit=5):
+    """[{"name", "absences"}] for the `limit` students absent most often across `parts`."""
+    absences = Counter()
+    for qs in parts:
+        absences.update(dict(
+            qs.filter(status="ABSENT").order_by().values("student_id")
+            .annotate(n=Count("id")).values_list("student_id", "n")
+        ))
+    top = absences.most_common(limit)
+    names = dict(Student.objects.filter(id__in=[student_id for student_id, _ in top]).values_list("id", "full_name"))
+    return [{"name": names.get(student_id), "absences": n} for student_id, n in top]
@@ -0,0 +1,242 @@
+"""
+Per-student attendance bitmaps (AttendanceBitmap).
+
+A student's academic year is one SIZE-byte blob, two bits per day counted
+from the year's first day (archive.year_bounds), four days per byte:
+
+    0 unmarked   1 attended (present or late)   2 half day   3 absent
+
+A day with several sessions keeps its worst mark, as in the registers and
+the absenteeism report; with this ordering that is the largest code.
+
+The write path calls `record_days` with the (student, school, date) it
+touched, as it does streaks.record_days: one grouped read recomputes those
+days and the affected blobs are patched in place. A class's year is then
+one query for a few kilobytes (`class_year`), and `counts`, `rate` and
+`longest_absent_run` work on the blob, whole bytes through a lookup table.
+
+`rebuild()` recomputes from live and archived attendance and backs the
+`rebuild_attendance_bitmaps` command. Closing a year leaves its bitmaps, as
+it leaves the daily summaries and streaks.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from schools.models import School
+
+from . import archive
+from .models import Attendance, AttendanceBitmap
+
+UNMARKED, ATTENDED, HALF_DAY, ABSENT = range(4)
+CODES = {"PRESENT": ATTENDED, "LATE": ATTENDED, "HALF_DAY": HALF_DAY, "ABSENT": ABSENT}
+DAYS = 366
+SIZE = (DAYS + 3) // 4
+# Terms split the academic year into blocks of this many months.
+TERM_MONTHS = getattr(settings, 'ATTENDANCE_TERM_MONTHS', 4)
+
+# Byte value -> (attended, half day, absent) days among its four.
+_BYTE_COUNTS = [
+    tuple(sum((byte >> shift) & 3 == code for shift in (0, 2, 4, 6)) for code in (ATTENDED, HALF_DAY, ABSENT))
+    for byte in range(256)
+]
+
+
+# ----------------------
+#  ENCODING
+# ----------------------
+def position(day):
+    """(academic year, day index within it) for `day`."""
+    year = archive.academic_year(day)
+    return year, (day - archive.year_bounds(year)[0]).days
+
+
+def code_at(bits, index):
+    return (bits[index >> 2] >> ((index & 3) * 2)) & 3
+
+
+def set_code(buffer, index, code):
+    shift = (index & 3) * 2
+    buffer[index >> 2] = (buffer[index >> 2] & ~(3 << shift) & 0xFF) | (code << shift)
+
+
+def codes(bits, days=DAYS):
+    """The first `days` day codes of a blob, as a list."""
+    return [(bits[index >> 2] >> ((index & 3) * 2)) & 3 for index in range(days)]
+
+
+def counts(bits, start=0, end=DAYS):
+    """(attended, half day, absent) days with index in [start, end)."""
+    totals = [0, 0, 0]
+    first, last = -(-start // 4), end // 4  # whole bytes inside the range
+    if first >= last:
+        edges = range(start, end)
+    else:
+        for byte in bits[first:last]:
+            byte_counts = _BYTE_COUNTS[byte]
+            totals[0] += byte_counts[0]
+            totals[1] += byte_counts[1]
+            totals[2] += byte_counts[2]
+        edges = [*range(start, first * 4), *range(last * 4, end)]
+    for index in edges:
+        code = code_at(bits, index)
+        if code:
+            totals[code - 1] += 1
+    return tuple(totals)
+
+
+def rate(bits, start=0, end=DAYS):
+    """Attended share of the marked days in [start, end), a half day counting half; None if none."""
+    attended, half_day, absent = counts(bits, start, end)
+    marked = attended + half_day + absent
+    return (2 * attended + half_day) / (2 * marked) if marked else None
+
+
+def longest_absent_run(bits):
+    """Most consecutive marked days that were absent; unmarked days don't break a run."""
+    longest = run = 0
+    for code in codes(bits):
+        if code == ABSENT:
+            run += 1
+            longest = max(longest, run)
+        elif code:
+            run = 0
+    return longest
+
+
+def terms(year):
+    """[(label, start index, end index)] for academic year `year`, TERM_MONTHS months each."""
+    start, end = archive.year_bounds(year)
+    result, first = [], start
+    while first <= end:
+        month = first.month - 1 + TERM_MONTHS
+        after = date(first.year + month // 12, month % 12 + 1, 1)
+        last = min(after - timedelta(days=1), end)
+        label = f"{first:%b}–{last:%b}"
+        result.append((label, (first - start).days, (last - start).days + 1))
+        first = after
+    return result
+
+
+# ----------------------
+#  WRITING
+# ----------------------
+def _day_codes(pairs):
+    """{(student_id, date): code} for the given pairs, from one grouped query."""
+    rows = (
+        Attendance.objects
+        .filter(student_id__in={student_id for student_id, _ in pairs}, date__in={day for _, day in pairs})
+        .values("student_id", "date")
+        .annotate(
+            total=Count("id"),
+            absent=Count("id", filter=Q(status="ABSENT")),
+            half_day=Count("id", filter=Q(status="HALF_DAY")),
+        )
+        .order_by()
+    )
+    return {
+        (row["student_id"], row["date"]): (
+            ABSENT if row["absent"] else HALF_DAY if row["half_day"] else ATTENDED if row["total"] else UNMARKED
+        )
+        for row in rows
+    }
+
+
+def record_days(entries):
+    """
+    Update bitmaps after attendance writes (or deletes).
+    `entries` is an iterable of (student_id, school_id, date).
+    """
+    schools, pairs = {}, set()
+    for student_id, school_id, day in entries:
+        schools[student_id] = school_id
+        pairs.add((student_id, day))
+    if not pairs:
+        return
+
+    day_codes = _day_codes(pairs)
+    cells = defaultdict(dict)  # (student_id, year) -> {day index: code}
+    for student_id, day in pairs:
+        year, index = position(day)
+        cells[(student_id, year)][index] = day_codes.get((student_id, day), UNMARKED)
+
+    def locked(keys):
+        rows = AttendanceBitmap.objects.select_for_update().filter(
+            student_id__in={student_id for student_id, _ in keys}, year__in={year for _, year in keys},
+        )
+        return {(row.student_id, row.year): row for row in rows}
+
+    now = timezone.now()
+    with transaction.atomic():
+        bitmaps = locked(cells)
+        # Only a marked day creates a blob; clearing days in a missing one is a no-op.
+        missing = [key for key, days in cells.items() if key not in bitmaps and any(days.values())]
+        if missing:
+            AttendanceBitmap.objects.bulk_create([
+                AttendanceBitmap(student_id=student_id, school_id=schools[student_id], year=year, bits=bytes(SIZE))
+                for student_id, year in missing
+            ], ignore_conflicts=True)
+            bitmaps.update(locked(missing))
+
+        changed = []
+        for key, days in cells.items():
+            bitmap = bitmaps.get(key)
+            if bitmap is None:
+                continue
+            bits = bytearray(bitmap.bits).ljust(SIZE, b"\0")
+            for index, code in days.items():
+                set_code(bits, index, code)
+            if bits != bitmap.bits:
+                bitmap.bits, bitmap.updated_at = bytes(bits), now  # bulk_update skips auto_now
+                changed.append(bitmap)
+        AttendanceBitmap.objects.bulk_update(changed, ["bits", "updated_at"])
+
+
+def rebuild(school=None, student_ids=None, batch_size=1000):
+    """
+    Recompute bitmaps from live and archived attendance, streaming rows in
+    (student, date) order per school. Returns the number of bitmaps written.
+    """
+    schools = [school] if school is not None else School.objects.all()
+    filters = {"student_id__in": student_ids} if student_ids is not None else {}
+    written = 0
+    for school in schools:
+        rows = archive.rows(school, fields=["student_id", "date", "status"], **filters).order_by("student_id", "date")
+        with transaction.atomic():
+            AttendanceBitmap.objects.filter(school=school, **filters).delete()
+            batch = []
+            for student_id, student_rows in groupby(rows.iterator(), key=lambda row: row["student_id"]):
+                years = {}
+                for row in student_rows:
+                    year, index = position(row["date"])
+                    bits = years.setdefault(year, bytearray(SIZE))
+                    set_code(bits, index, max(code_at(bits, index), CODES.get(row["status"], UNMARKED)))
+                batch.extend(
+                    AttendanceBitmap(student_id=student_id, school=school, year=year, bits=bytes(bits))
+                    for year, bits in years.items()
+                )
+                if len(batch) >= batch_size:
+                    AttendanceBitmap.objects.bulk_create(batch)
+                    written += len(batch)
+                    batch = []
+            AttendanceBitmap.objects.bulk_create(batch)
+            written += len(batch)
+    return written
+
+
+# ----------------------
+#  READING
+# ----------------------
+def class_year(class_program, year):
+    """{student_id: blob} for `class_program`'s current students in academic year `year`: one query."""
+    return {
+        student_id: bytes(bits)
+        for student_id, bits in AttendanceBitmap.objects.filter(
+            student__class_program=class_program, year=year,
+        ).values_list("student_id", "bits")
+    }
@@ -0,0 +1,114 @@
+"""
+Group commit for attendance submissions.
+
+In the morning peak every teacher submits a roster at once, and on SQLite
+each submission takes the database write lock on its own: requests queue
+behind each other's commits and some give up with "database is locked".
+With ATTENDANCE_GROUP_COMMIT on, `bulk_mark` hands the submission to one
+writer thread per process instead. The writer takes whatever arrived within
+ATTENDANCE_GROUP_COMMIT_WINDOW_MS of the first submission (up to
+ATTENDANCE_GROUP_COMMIT_MAX_BATCH), applies each in its own savepoint inside
+one transaction, commits once, and only then wakes each caller with its
+BulkMarkResult or exception.
+
+One submission failing (e.g. a closed academic year) rolls back only its
+savepoint; a failed commit fails the whole batch.
+"""
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+from . import services
+
+logger = logging.getLogger(__name__)
+
+ENABLED = getattr(settings, 'ATTENDANCE_GROUP_COMMIT', False)
+WINDOW_MS = getattr(settings, 'ATTENDANCE_GROUP_COMMIT_WINDOW_MS', 5)
+MAX_BATCH = getattr(settings, 'ATTENDANCE_GROUP_COMMIT_MAX_BATCH', 50)
+# How long a caller waits for its batch before giving up.
+TIMEOUT = getattr(settings, 'ATTENDANCE_GROUP_COMMIT_TIMEOUT_SECONDS', 30)
+
+
+class WriteCoalescer:
+    def __init__(self, window_ms=WINDOW_MS, max_batch=MAX_BATCH):
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.pending = queue.Queue()
+        self.batches = 0
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, **kwargs):
+        """Queue one services.bulk_mark call; returns a Future of its result."""
+        future = Future()
+        self.pending.put((kwargs, future))
+        self._ensure_running()
+        return future
+
+    def _ensure_running(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="attendance-group-commit", daemon=True)
+                self._thread.start()
+
+    def _take_batch(self):
+        batch = [self.pending.get()]
+        try:
+            # Everything already waiting, then whatever arrives within the window.
+            while len(batch) < self.max_batch:
+                batch.append(self.pending.get_nowait())
+        except queue.Empty:
+            pass
+        if len(batch) < self.max_batch:
+            try:
+                batch.append(self.pending.get(timeout=self.window))
+                while len(batch) < self.max_batch:
+                    batch.append(self.pending.get_nowait())
+            except queue.Empty:
+                pass
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            close_old_connections()
+            outcomes = []
+            try:
+                with transaction.atomic():
+                    for kwargs, future in batch:
+                        try:
+                            with transaction.atomic():
+                                outcomes.append((future, services.bulk_mark(**kwargs), None))
+                        except Exception as e:
+                            outcomes.append((future, None, e))
+            except Exception as e:
+                logger.exception("Attendance group commit of %s submission(s) failed", len(batch))
+                outcomes = [(future, None, e) for _, future in batch]
+            finally:
+                # Don't sit on a connection (or SQLite's lock) between bursts.
+                if self.pending.empty():
+                    connection.close()
+            self.batches += 1
+            for future, result, error in outcomes:
+                if error is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(error)
+
+
+coalescer = WriteCoalescer()
+
+
+def bulk_mark(**kwargs):
+    """
+    services.bulk_mark, through the group-commit writer when
+    ATTENDANCE_GROUP_COMMIT is on. Callers must not hold a transaction open:
+    the write happens on another connection.
+    """
+    if not ENABLED:
+        return services.bulk_mark(**kwargs)
+    return coalescer.submit(**kwargs).result(timeout=TIMEOUT)
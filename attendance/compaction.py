@@ -0,0 +1,103 @@
+"""
+AttendanceLog compaction.
+
+Teachers correcting a roster toggle the same row several times in a
+minute, and every toggle is a log row. Once entries are older than
+ATTENDANCE_LOG_COMPACT_AFTER_DAYS, `compact()` collapses each run of
+changes to one attendance row into its first and last entries; the last
+entry's `collapsed` counts what was dropped, and its `previous_status`
+becomes the first entry's `new_status` so the chain still links up.
+
+Entries that matter for audit are kept verbatim and split runs: anything
+with a note (offline sync, explanations) and any edit made on a later day
+than the attendance date it changes.
+"""
+from dataclasses import dataclass
+from datetime import timedelta
+from itertools import groupby
+from operator import attrgetter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import AttendanceLog
+
+AFTER_DAYS = getattr(settings, 'ATTENDANCE_LOG_COMPACT_AFTER_DAYS', 30)
+
+
+@dataclass
+class CompactionResult:
+    attendance_rows: int = 0  # rows whose log was compacted
+    removed: int = 0  # log entries deleted
+
+
+def is_kept(entry):
+    """Entries compaction never touches. `entry` needs attendance_date annotated."""
+    return bool(entry.note) or timezone.localdate(entry.changed_at) != entry.attendance_date
+
+
+def _runs(entries):
+    """Split one row's entries (oldest first) into runs between kept entries."""
+    run = []
+    for entry in entries:
+        if is_kept(entry):
+            if run:
+                yield run
+            run = []
+        else:
+            run.append(entry)
+    if run:
+        yield run
+
+
+def compact(before=None, chunk_size=500):
+    """
+    Compact log entries older than `before` (default: AFTER_DAYS ago),
+    `chunk_size` attendance rows per transaction. Safe to re-run.
+    """
+    cutoff = before or timezone.now() - timedelta(days=AFTER_DAYS)
+    result = CompactionResult()
+    # Only rows with more than two old entries can have a run worth collapsing.
+    candidates = (
+        AttendanceLog.objects.filter(changed_at__lt=cutoff)
+        .values("attendance_id")
+        .annotate(entries=Count("id"))
+        .filter(entries__gt=2)
+        .order_by("attendance_id")
+        .values_list("attendance_id", flat=True)
+    )
+    last_id = 0
+    while True:
+        ids = list(candidates.filter(attendance_id__gt=last_id)[:chunk_size])
+        if not ids:
+            break
+        last_id = ids[-1]
+
+        with transaction.atomic():
+            entries = (
+                AttendanceLog.objects.select_for_update()
+                .filter(attendance_id__in=ids, changed_at__lt=cutoff)
+                .annotate(attendance_date=F("attendance__date"))
+                .only("id", "attendance_id", "changed_at", "note", "previous_status", "new_status", "collapsed")
+                .order_by("attendance_id", "changed_at", "id")
+            )
+            drop, keep = [], []
+            for _, row_entries in groupby(entries, key=attrgetter("attendance_id")):
+                compacted = False
+                for run in _runs(row_entries):
+                    if len(run) <= 2:
+                        continue
+                    middle, last = run[1:-1], run[-1]
+                    last.collapsed += sum(entry.collapsed + 1 for entry in middle)
+                    last.previous_status = run[0].new_status
+                    keep.append(last)
+                    drop.extend(entry.id for entry in middle)
+                    compacted = True
+                result.attendance_rows += compacted
+
+            AttendanceLog.objects.bulk_update(keep, ["previous_status", "collapsed"])
+            AttendanceLog.objects.filter(id__in=drop).delete()
+            result.removed += len(drop)
+    return result
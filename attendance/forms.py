@@ -1,8 +1,10 @@
 # attendance_app/forms.py
 from django import forms
 from django.core.exceptions import ValidationError
-from datetime import datetime
+from django.utils import timezone
+from datetime import datetime, timedelta
 from .models import Attendance
+from . import archive, registers, rosters
 from classes_app.models import ClassProgram
 from students.models import Student
 
@@ -41,9 +43,14 @@ class AttendanceEditForm(BaseSchoolScopedForm):
     def clean_date(self):
         value = self.cleaned_data["date"]
         try:
-            return datetime.strptime(value, "%Y-%m-%d").date()
+            day = datetime.strptime(value, "%Y-%m-%d").date()
         except ValueError:
             raise ValidationError("Invalid date format. Use YYYY-MM-DD.")
+        try:
+            archive.ensure_open(self.school.pk, [day])
+        except archive.ClosedYearError as e:
+            raise ValidationError(str(e))
+        return day
 
     def clean(self):
         cleaned = super().clean()
@@ -83,34 +90,34 @@ class AttendanceBulkStatusForm(BaseSchoolScopedForm):
         super().__init__(*args, school=school, **kwargs)
         self.school = school
 
-        # Populate student choices dynamically
-        students = Student.objects.filter(school=school)
-        self.fields["student_ids"].choices = [(s.id, s.full_name or str(s.id)) for s in students]
+        # Choices are the posted class's roster snapshot, not the whole school
+        self.class_program = None
+        class_id = self.data.get("class_program_id")
+        if class_id and str(class_id).isdigit():
+            self.class_program = ClassProgram.objects.filter(pk=class_id, school=school).first()
+        if self.class_program is not None:
+            roster = rosters.current(self.class_program)
+            self.fields["student_ids"].choices = [(pk, name or str(pk)) for pk, name in roster.students]
 
     def clean_date(self):
         value = self.cleaned_data["date"]
         try:
-            return datetime.strptime(value, "%Y-%m-%d").date()
+            day = datetime.strptime(value, "%Y-%m-%d").date()
         except ValueError:
             raise ValidationError("Invalid date format. Use YYYY-MM-DD.")
+        try:
+            archive.ensure_open(self.school.pk, [day])
+        except archive.ClosedYearError as e:
+            raise ValidationError(str(e))
+        return day
 
     def clean(self):
         cleaned = super().clean()
-        school = self.school
 
-        try:
-            cleaned["class_program"] = ClassProgram.objects.get(
-                pk=cleaned["class_program_id"], school=school
-            )
-        except ClassProgram.DoesNotExist:
+        if self.class_program is None:
             raise ValidationError("Class program not found in this school.")
-
-        # Validate student IDs belong to this school (and optionally to the class)
-        student_ids = cleaned.get("student_ids") or []
-        students = Student.objects.filter(id__in=student_ids, school=school)
-        if len(student_ids) != students.count():
-            raise ValidationError("One or more students are invalid for this school.")
-        cleaned["students"] = list(students)
+        cleaned["class_program"] = self.class_program
+        # student_ids are already limited to the class roster by their choices
 
         cleaned["session"] = cleaned.get("session") or None
         return cleaned
@@ -141,3 +148,67 @@ class AttendanceFilterForm(BaseSchoolScopedForm):
             return ClassProgram.objects.get(pk=value, school=self.school)
         except ClassProgram.DoesNotExist:
             raise ValidationError("Class program not found in this school.")
+
+
+class AttendanceImportForm(forms.Form):
+    file = forms.FileField(help_text="CSV or Excel (.xlsx) with date, student, class, session and status columns.")
+
+    def clean_file(self):
+        upload = self.cleaned_data["file"]
+        if not upload.name.lower().endswith((".csv", ".xlsx", ".xlsm")):
+            raise ValidationError("Upload a .csv or .xlsx file.")
+        return upload
+
+
+class AttendanceRegisterForm(BaseSchoolScopedForm):
+    """A month (YYYY-MM, default this month) or a start/end range, optionally one class."""
+    class_program = forms.IntegerField(required=False)
+    month = forms.CharField(required=False)
+    start = forms.DateField(required=False)
+    end = forms.DateField(required=False)
+
+    def clean(self):
+        cleaned = super().clean()
+        if self.errors:
+            return cleaned
+        class_id = cleaned.get("class_program")
+        cleaned["class_program"] = None
+        if class_id:
+            cleaned["class_program"] = ClassProgram.objects.filter(pk=class_id, school=self.school).first()
+            if cleaned["class_program"] is None:
+                raise ValidationError("Class program not found in this school.")
+
+        if cleaned.get("start") or cleaned.get("end"):
+            if not (cleaned.get("start") and cleaned.get("end")):
+                raise ValidationError("Give both start and end.")
+        else:
+            try:
+                first = datetime.strptime(cleaned.get("month") or timezone.localdate().strftime("%Y-%m"), "%Y-%m").date()
+            except ValueError:
+                raise ValidationError("Invalid month. Use YYYY-MM.")
+            cleaned["start"] = first
+            cleaned["end"] = (first + timedelta(days=31)).replace(day=1) - timedelta(days=1)
+        if not 0 <= (cleaned["end"] - cleaned["start"]).days < registers.MAX_DAYS:
+            raise ValidationError(f"Choose a range of 1 to {registers.MAX_DAYS} days.")
+        return cleaned
+
+
+class RegisterJobForm(BaseSchoolScopedForm):
+    month = forms.CharField(help_text="YYYY-MM")
+    class_program = forms.IntegerField(required=False)
+
+    def clean_month(self):
+        try:
+            return datetime.strptime(self.cleaned_data["month"], "%Y-%m").date()
+        except ValueError:
+            raise ValidationError("Invalid month. Use YYYY-MM.")
+
+    def clean_class_program(self):
+        class_id = self.cleaned_data.get("class_program")
+        if not class_id:
+            return None
+        class_program = ClassProgram.objects.filter(pk=class_id, school=self.school).first()
+        if class_program is None:
+            raise ValidationError("Class program not found in this school.")
+        return class_program
+
@@ -0,0 +1,163 @@
+"""
+Per-student attendance history stats, computed in the database.
+
+`records()` returns the student's live and archived rows as separate
+querysets (see archive.querysets), so closed years count too. A day, and so
+a month, is only ever in one of them.
+
+Totals are conditional aggregates, summed over the parts; the monthly
+breakdown carries running totals and absence runs are found with the
+gaps-and-islands trick, both via window functions. Django can't put a
+window over an aggregate, so those two wrap the union of per-part grouped
+queries in a small outer SELECT.
+
+`archived_changes()` unpacks the change logs close_year folded into
+ArchivedAttendance.changes.
+"""
+from datetime import date, datetime
+
+from django.db import connection
+from django.db.models import Case, Count, F, IntegerField, Min, Q, Value, When
+from django.db.models.functions import TruncMonth
+from django.utils.dateparse import parse_date, parse_datetime
+
+from accounts.models import User
+from students.models import Student
+
+from . import archive
+from .models import ArchivedAttendance, Attendance
+from .rollups import STATUS_FIELDS
+
+STATUS_COUNTS = {field: Count("id", filter=Q(status=status)) for status, field in STATUS_FIELDS.items()}
+
+
+def _as_date(value):
+    # Raw cursors skip Django's converters: SQLite hands back ISO strings.
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _union(parts):
+    return parts[0].union(*parts[1:], all=True) if len(parts) > 1 else parts[0]
+
+
+def _wrap(inner, outer_sql, extra_params=()):
+    inner_sql, params = inner.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(outer_sql.format(inner=inner_sql), (*params, *extra_params))
+        columns = [col[0] for col in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def records(student_id, school=None, start=None, end=None):
+    """The student's attendance as [live, archived] querysets (only those the range can reach)."""
+    if school is None:
+        school = Student.objects.filter(pk=student_id).values_list("school", flat=True).first()
+    start = parse_date(start) if isinstance(start, str) else start
+    end = parse_date(end) if isinstance(end, str) else end
+    return [qs.order_by() for qs in archive.querysets(school, start, end, student_id=student_id)]
+
+
+def totals(parts):
+    """Row counts per status plus attendance rate, one aggregate per part."""
+    result = dict.fromkeys(["total", "days", *STATUS_COUNTS], 0)
+    for qs in parts:
+        counts = qs.aggregate(total=Count("id"), days=Count("date", distinct=True), **STATUS_COUNTS)
+        for key, value in counts.items():
+            result[key] += value
+    result["rate"] = round(result["present"] / result["total"] * 100, 1) if result["total"] else 0
+    return result
+
+
+def monthly(parts):
+    """Per-month status counts with running totals, oldest month first."""
+    if not parts:
+        return []
+    inner = _union([qs.values(month=TruncMonth("date")).annotate(total=Count("id"), **STATUS_COUNTS) for qs in parts])
+    rows = _wrap(inner, """
+        SELECT month, total, present, absent, late, half_day,
+               SUM(present) OVER (ORDER BY month) AS running_present,
+               SUM(total) OVER (ORDER BY month) AS running_total
+        FROM ({inner}) months
+        ORDER BY month
+    """)
+    for row in rows:
+        row["month"] = _as_date(row["month"])
+        row["rate"] = round(row["present"] / row["total"] * 100, 1) if row["total"] else 0
+        row["running_rate"] = (
+            round(row["running_present"] / row["running_total"] * 100, 1) if row["running_total"] else 0
+        )
+    return rows
+
+
+def absence_runs(parts, limit=5):
+    """
+    Runs of consecutive absent days (every row that day ABSENT), the current
+    run (ending on the latest marked day) first, then longest first.
+    """
+    if not parts:
+        return []
+    inner = _union([
+        qs.values(day=F("date")).annotate(
+            absent=Min(Case(When(status=Attendance.Status.ABSENT, then=Value(1)), default=Value(0),
+                            output_field=IntegerField()))
+        )
+        for qs in parts
+    ])
+    runs = _wrap(inner, """
+        SELECT MIN(day) AS first_day, MAX(day) AS last_day, COUNT(*) AS length,
+               MAX(CASE WHEN day = last_marked THEN 1 ELSE 0 END) AS is_current
+        FROM (
+            SELECT day, absent,
+                   ROW_NUMBER() OVER (ORDER BY day)
+                     - ROW_NUMBER() OVER (PARTITION BY absent ORDER BY day) AS island,
+                   MAX(day) OVER () AS last_marked
+            FROM ({inner}) days
+        ) islands
+        WHERE absent = 1
+        GROUP BY island
+        ORDER BY is_current DESC, length DESC, last_day DESC
+        LIMIT %s
+    """, (limit,))
+    for run in runs:
+        run["first_day"] = _as_date(run["first_day"])
+        run["last_day"] = _as_date(run["last_day"])
+        run["is_current"] = bool(run["is_current"])
+    return runs
+
+
+def archived_changes(student_id, school=None, start=None, end=None, status=None):
+    """
+    Change-log entries of the student's archived rows, newest first, as
+    dicts shaped like AttendanceLog (changed_at, previous_status,
+    new_status, changed_by, note, collapsed) plus the row's date and session.
+    `start` / `end` bound the change date, `status` the new status, as the
+    live change list does.
+    """
+    archived = ArchivedAttendance.objects.filter(student_id=student_id).exclude(changes=[])
+    if school is not None:
+        archived = archived.filter(school=school)
+    start = parse_date(start) if isinstance(start, str) else start
+    end = parse_date(end) if isinstance(end, str) else end
+
+    entries = []
+    for row in archived.select_related("session"):
+        for previous, new, changed_by_id, changed_at, note, collapsed in row.changes:
+            changed_at = parse_datetime(changed_at)
+            if (start and changed_at.date() < start) or (end and changed_at.date() > end):
+                continue
+            if status and new.upper() != status.upper():
+                continue
+            entries.append({
+                "date": row.date, "session": row.session, "changed_at": changed_at,
+                "previous_status": previous, "new_status": new, "changed_by": changed_by_id,
+                "note": note, "collapsed": collapsed,
+            })
+    users = {user.pk: user for user in User.objects.filter(pk__in={e["changed_by"] for e in entries} - {None})}
+    for entry in entries:
+        entry["changed_by"] = users.get(entry["changed_by"])
+    entries.sort(key=lambda entry: entry["changed_at"], reverse=True)
+    return entries
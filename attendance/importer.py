@@ -0,0 +1,258 @@
+"""
+Bulk import of historical attendance from CSV or Excel.
+
+Schools moving to the system mid-year bring months of paper or exported
+attendance. `import_file` streams the file row by row (csv.DictReader, or
+openpyxl in read-only mode), resolves students, classes and sessions
+through lookups built once per school, and writes every BATCH_SIZE marks
+with one apply_marks call: upserts, logs, rollups and streaks as usual, but
+no parent notifications for history.
+
+The first row is a header. Columns, in any order and case:
+
+    date        YYYY-MM-DD (or an Excel date)
+    student_id  the student's id; or `student` with their full name
+    class       class name (default: the student's current class); or class_id
+    session     session name within the class (optional)
+    status      Present / Absent / Late / Half Day, the codes, or P / A / L / H
+
+A bad row is reported with its line number and skipped; the rest of the
+file is still imported. A later row for the same student, class, date and
+session overrides an earlier one.
+"""
+import csv
+import io
+import os
+from dataclasses import dataclass, field
+from datetime import date, datetime
+
+from django.conf import settings
+from django.db import DatabaseError
+
+from classes_app.models import ClassProgram, Session
+from students.models import Student
+
+from . import archive
+from .models import Attendance
+from .services import Mark, apply_marks
+
+BATCH_SIZE = getattr(settings, 'ATTENDANCE_IMPORT_BATCH_SIZE', 2000)
+MAX_ERRORS = 200  # reported; every error is counted
+NOTE = "Imported"
+
+
+class ImportFileError(ValueError):
+    """The file as a whole can't be read."""
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    failed: int = 0
+    errors: list = field(default_factory=list)  # (line, message), first MAX_ERRORS
+
+    def error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append((line, message))
+
+
+def _key(value):
+    """Case-, spacing- and underscore-insensitive form of a name or header."""
+    return " ".join(str(value).replace("_", " ").split()).casefold()
+
+
+STATUSES = {"p": "PRESENT", "a": "ABSENT", "l": "LATE", "h": "HALF_DAY"}  # _key(text) -> status
+STATUSES.update({_key(value): value for value in Attendance.Status.values})
+STATUSES.update({_key(label): value for value, label in Attendance.Status.choices})
+
+
+def _csv_rows(stream):
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        for record in csv.DictReader(text):
+            yield record
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise ImportFileError(f"Could not read the CSV file: {e}")
+    finally:
+        text.detach()
+
+
+def _excel_rows(stream):
+    from openpyxl import load_workbook
+
+    try:
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+    except Exception as e:
+        raise ImportFileError(f"Could not read the Excel file: {e}")
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None) or ()
+        for values in rows:
+            yield dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def read_rows(stream, name):
+    """Yield (line number, {normalized column: value}) from a CSV or .xlsx file."""
+    extension = os.path.splitext(name)[1].lower()
+    if extension == ".csv":
+        records = _csv_rows(stream)
+    elif extension in (".xlsx", ".xlsm"):
+        records = _excel_rows(stream)
+    else:
+        raise ImportFileError("Upload a .csv or .xlsx file.")
+    for line, record in enumerate(records, start=2):
+        row = {_key(column).replace(" ", "_"): value for column, value in record.items() if column is not None}
+        if any(value not in (None, "") for value in row.values()):
+            yield line, row
+
+
+class Lookups:
+    """A school's students, classes and sessions, read once per import."""
+
+    def __init__(self, school):
+        self.student_class = {}  # id -> current class id
+        self.students_named = {}  # name -> [ids]
+        for pk, name, class_id in Student.objects.filter(school=school).values_list(
+            "id", "full_name", "class_program_id"
+        ):
+            self.student_class[pk] = class_id
+            self.students_named.setdefault(_key(name), []).append(pk)
+
+        self.class_ids = set()
+        self.classes_named = {}  # name -> [ids]
+        for pk, name in ClassProgram.objects.filter(school=school).values_list("id", "name"):
+            self.class_ids.add(pk)
+            self.classes_named.setdefault(_key(name), []).append(pk)
+
+        self.sessions = {
+            (class_id, _key(name)): pk
+            for pk, class_id, name in Session.objects.filter(school=school).values_list(
+                "id", "class_program_id", "name"
+            )
+        }
+
+    @staticmethod
+    def _one(matches, what, value):
+        if not matches:
+            raise ValueError(f"Unknown {what} '{value}'.")
+        if len(matches) > 1:
+            raise ValueError(f"More than one {what} is named '{value}'; use the id column.")
+        return matches[0]
+
+    def student(self, row):
+        if row.get("student_id") not in (None, ""):
+            try:
+                pk = int(row["student_id"])
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid student id '{row['student_id']}'.")
+            if pk not in self.student_class:
+                raise ValueError(f"Unknown student id {pk}.")
+            return pk
+        if row.get("student") in (None, ""):
+            raise ValueError("Missing student.")
+        return self._one(self.students_named.get(_key(row["student"]), []), "student", row["student"])
+
+    def class_program(self, row, student_id):
+        if row.get("class_id") not in (None, ""):
+            try:
+                pk = int(row["class_id"])
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid class id '{row['class_id']}'.")
+            if pk not in self.class_ids:
+                raise ValueError(f"Unknown class id {pk}.")
+            return pk
+        if row.get("class") not in (None, ""):
+            return self._one(self.classes_named.get(_key(row["class"]), []), "class", row["class"])
+        if self.student_class[student_id] is None:
+            raise ValueError("The student has no class; add a class column.")
+        return self.student_class[student_id]
+
+    def session(self, row, class_id):
+        name = row.get("session")
+        if name in (None, ""):
+            return None
+        try:
+            return self.sessions[(class_id, _key(name))]
+        except KeyError:
+            raise ValueError(f"Unknown session '{name}' for this class.")
+
+
+def _parse_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value).strip())
+    except ValueError:
+        raise ValueError(f"Invalid date '{value}'; use YYYY-MM-DD.")
+
+
+def _parse_status(value):
+    try:
+        return STATUSES[_key(value)]
+    except KeyError:
+        raise ValueError(f"Unknown status '{value}'.")
+
+
+def parse_row(row, lookups):
+    """One row as a Mark; raises ValueError with a readable message."""
+    if row.get("date") in (None, ""):
+        raise ValueError("Missing date.")
+    if row.get("status") in (None, ""):
+        raise ValueError("Missing status.")
+    day = _parse_date(row["date"])
+    status = _parse_status(row["status"])
+    student_id = lookups.student(row)
+    class_id = lookups.class_program(row, student_id)
+    return Mark(student_id, class_id, day, lookups.session(row, class_id), status)
+
+
+def import_file(*, school, stream, name, user=None, batch_size=BATCH_SIZE):
+    """
+    Import attendance for `school` from an open binary file. Returns an
+    ImportResult; raises ImportFileError only if the file can't be read at all.
+    """
+    result = ImportResult()
+    lookups = Lookups(school)
+    closed = archive.closed_years(school.pk)
+    pending = {}  # natural key -> (line, Mark)
+
+    def flush():
+        if not pending:
+            return
+        batch = list(pending.values())
+        pending.clear()
+        try:
+            written = apply_marks(
+                school=school, marks=[mark for _, mark in batch], marked_by=user, note=NOTE, notify=False,
+            )
+        except (DatabaseError, ValueError) as e:
+            for line, _ in batch:
+                result.error(line, f"Not saved: {e}")
+            return
+        result.created += written.created
+        result.updated += written.updated
+        result.unchanged += written.unchanged
+
+    for line, row in read_rows(stream, name):
+        result.rows += 1
+        try:
+            mark = parse_row(row, lookups)
+        except ValueError as e:
+            result.error(line, str(e))
+            continue
+        if archive.academic_year(mark.date) in closed:
+            result.error(line, "The academic year is closed.")
+            continue
+        pending[mark.key] = (line, mark)
+        if len(pending) >= batch_size:
+            flush()
+    flush()
+    return result
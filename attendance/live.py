@@ -0,0 +1,199 @@
+"""
+Live attendance board: per-class submission status for today, polled by
+dashboards with conditional requests.
+
+One `Board` per process holds, for each school someone is watching, the
+current snapshot as ready-to-send JSON and its ETag. Requests only read the
+board; they never query (past the first one for a school). A single poller
+thread does all the reading:
+
+- the attendance write path (rollups.apply, after commit) marks a school
+  dirty and wakes the poller, which rebuilds that school's snapshot once;
+- every POLL_SECONDS it also reads one aggregate of today's summary rows
+  for the watched schools, so writes made by other processes show up too.
+
+Dashboards fetch every CLIENT_POLL_SECONDS with If-None-Match and mostly get
+a 304, so no request outlives a normal page view and a hundred open
+dashboards cost a hundred tiny requests per interval, not a hundred held
+worker threads. A school nobody has asked about for WATCH_SECONDS is
+dropped; the poller stops when no school is left. The ETag hashes the board
+without its `updated_at`, so every worker process answers with the same tag
+for the same board.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from classes_app.models import ClassProgram
+
+from .models import AttendanceDailySummary
+
+logger = logging.getLogger(__name__)
+
+POLL_SECONDS = getattr(settings, 'ATTENDANCE_LIVE_POLL_SECONDS', 5)
+# How often an open dashboard asks for the board.
+CLIENT_POLL_SECONDS = getattr(settings, 'ATTENDANCE_LIVE_CLIENT_SECONDS', 10)
+# Stop refreshing a school after this long without a request.
+WATCH_SECONDS = 3 * CLIENT_POLL_SECONDS
+# Gather a burst of submissions into one rebuild.
+DEBOUNCE_SECONDS = 0.25
+
+COUNTS = ["present", "absent", "late", "half_day"]
+
+
+def signatures(school_ids, day):
+    """{school_id: summary-state tuple} for `day`: changes whenever any mark does."""
+    rows = (
+        AttendanceDailySummary.objects.filter(school_id__in=school_ids, date=day)
+        .values("school_id")
+        .annotate(rows=Count("id"), **{field: Sum(field) for field in COUNTS})
+        .order_by()
+    )
+    return {row.pop("school_id"): tuple(row[key] for key in ("rows", *COUNTS)) for row in rows}
+
+
+def snapshot(school_id, day):
+    """Today's board for one school as a dict, one row per class."""
+    day_level = Q(attendancedailysummary__date=day, attendancedailysummary__session__isnull=True)
+    classes = (
+        ClassProgram.objects.filter(school_id=school_id)
+        .annotate(
+            **{
+                field: Coalesce(Sum(f"attendancedailysummary__{field}", filter=day_level), 0)
+                for field in COUNTS
+            },
+            session_rows=Count(
+                "attendancedailysummary",
+                filter=Q(attendancedailysummary__date=day, attendancedailysummary__session__isnull=False),
+            ),
+        )
+        .values("id", "name", "division__name", "session_rows", *COUNTS)
+        .order_by("division__name", "name")
+    )
+    roster = dict(
+        ClassProgram.objects.filter(school_id=school_id).annotate(n=Count("students")).values_list("id", "n")
+    )
+    rows = []
+    for row in classes:
+        marked = sum(row[field] for field in COUNTS)
+        rows.append({
+            "id": row["id"],
+            "name": row["name"],
+            "division": row["division__name"],
+            "students": roster.get(row["id"], 0),
+            "marked": marked,
+            "sessions": row["session_rows"],  # session-level summaries marked today
+            "submitted": bool(marked or row["session_rows"]),
+            **{field: row[field] for field in COUNTS},
+        })
+    return {
+        "date": day.isoformat(),
+        "updated_at": timezone.now().isoformat(),
+        "submitted": sum(row["submitted"] for row in rows),
+        "classes": rows,
+    }
+
+
+def etag(board):
+    """Quoted ETag of a snapshot, ignoring when it was built."""
+    content = json.dumps({key: value for key, value in board.items() if key != "updated_at"}, sort_keys=True)
+    return '"{}"'.format(hashlib.sha1(content.encode()).hexdigest()[:20])
+
+
+class Board:
+    def __init__(self, poll_seconds=POLL_SECONDS, watch_seconds=WATCH_SECONDS):
+        self.poll_seconds = poll_seconds
+        self.watch_seconds = watch_seconds
+        self.refreshes = 0
+        self._lock = threading.Lock()
+        self._schools = {}  # school id -> {"seen", "payload", "etag", "signature", "day"}
+        self._dirty = set()
+        self._wake = threading.Event()
+        self._thread = None
+
+    # -- write path ---------------------------------------------------
+    def changed(self, school_ids):
+        """Some of `school_ids` changed today; cheap, and a no-op for unwatched schools."""
+        with self._lock:
+            watched = {school_id for school_id in school_ids if school_id in self._schools}
+            self._dirty |= watched
+        if watched:
+            self._wake.set()
+
+    # -- requests -------------------------------------------------------
+    def current(self, school_id):
+        """(ETag, JSON payload) of the school's board; keeps the school watched."""
+        with self._lock:
+            state = self._schools.setdefault(school_id, {"payload": None})
+            state["seen"] = time.monotonic()
+            fresh = state["payload"] is None
+        if fresh:
+            self.refresh(school_id)
+        self._ensure_poller()
+        with self._lock:
+            return state["etag"], state["payload"]
+
+    # -- poller ---------------------------------------------------------
+    def refresh(self, school_id, signature=None):
+        day = timezone.localdate()
+        if signature is None:
+            signature = signatures([school_id], day).get(school_id)
+        board = snapshot(school_id, day)
+        payload = json.dumps(board, separators=(",", ":"))
+        with self._lock:
+            state = self._schools.get(school_id)
+            if state is not None:
+                state.update(payload=payload, etag=etag(board), signature=signature, day=day)
+                self.refreshes += 1
+
+    def poll(self):
+        """One poller pass: drop idle schools, rebuild every watched one that is dirty or changed elsewhere."""
+        cutoff = time.monotonic() - self.watch_seconds
+        with self._lock:
+            for school_id in [key for key, state in self._schools.items() if state["seen"] < cutoff]:
+                del self._schools[school_id]
+            watched = {
+                school_id: (state.get("signature"), state.get("day")) for school_id, state in self._schools.items()
+            }
+            dirty, self._dirty = self._dirty & set(watched), set()
+        if not watched:
+            return
+        day = timezone.localdate()
+        current = signatures(list(watched), day)
+        for school_id, (signature, seen_day) in watched.items():
+            if school_id in dirty or current.get(school_id) != signature or seen_day != day:
+                self.refresh(school_id, current.get(school_id))
+
+    def _ensure_poller(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="attendance-live-board", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            if self._wake.wait(self.poll_seconds):
+                time.sleep(DEBOUNCE_SECONDS)
+            self._wake.clear()
+            close_old_connections()
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Live attendance board refresh failed")
+            finally:
+                close_old_connections()
+            with self._lock:
+                if not self._schools:
+                    self._thread = None
+                    return
+
+
+board = Board()
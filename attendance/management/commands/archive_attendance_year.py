@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from attendance import archive
+from attendance.models import Attendance
+from schools.models import School
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves a finished academic year's attendance and its change log out of the live tables "
+        "into ArchivedAttendance and makes that year read-only."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--year", type=int,
+            help="Academic year to close, by the calendar year it starts in (default: every finished year)",
+        )
+        parser.add_argument("--school", type=int, help="Only this school id")
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument("--vacuum", action="store_true", help="Reclaim the freed space afterwards")
+
+    def handle(self, *args, **options):
+        current = archive.academic_year(timezone.localdate())
+        if options["year"] is not None and options["year"] >= current:
+            raise CommandError("Only past academic years can be closed.")
+
+        schools = School.objects.all()
+        if options["school"] is not None:
+            schools = schools.filter(pk=options["school"])
+
+        closed_any = False
+        for school in schools:
+            if options["year"] is not None:
+                years = [options["year"]]
+            else:
+                first = Attendance.objects.filter(school=school).order_by("date").values_list("date", flat=True).first()
+                years = range(archive.academic_year(first), current) if first else []
+            for year in years:
+                closed = archive.close_year(school, year, batch_size=options["batch_size"])
+                closed_any = True
+                self.stdout.write(
+                    f"{school}: {year}/{year + 1} closed, {closed.attendance_rows} attendance "
+                    f"and {closed.log_rows} log row(s) archived."
+                )
+
+        if options["vacuum"] and closed_any:
+            archive.vacuum()
+        self.stdout.write(self.style.SUCCESS("Done."))
@@ -0,0 +1,123 @@
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from attendance.models import Attendance
+from classes_app.models import ClassProgram, Division
+from core import keyset
+from schools.models import School
+from students.models import Student
+
+PAGE = 50
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Times attendance list pages (keyset vs OFFSET+COUNT) as the table grows. "
+        "Synthetic rows are written inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000],
+            help="Attendance row counts to measure at, e.g. 10000 100000 1000000 5000000",
+        )
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per query; the median is reported")
+        parser.add_argument("--students", type=int, default=400)
+        parser.add_argument("--classes", type=int, default=10)
+
+    def handle(self, *args, **options):
+        sizes = sorted(options["sizes"])
+        self.repeat = options["repeat"]
+        self.verbosity = options["verbosity"]
+        try:
+            with transaction.atomic():
+                self._run(sizes, options["students"], options["classes"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _seed_school(self, n_students, n_classes):
+        school = School.objects.create(name="Attendance benchmark", in_progress=False)
+        division = Division.objects.create(school=school, name="BENCHMARK")
+        classes = ClassProgram.objects.bulk_create([
+            ClassProgram(school=school, division=division, name=f"Bench {i}") for i in range(n_classes)
+        ])
+        students = Student.objects.bulk_create([
+            Student(
+                school=school, division=division, class_program=classes[i % n_classes],
+                full_name=f"Bench Student {i}", parent_name="Parent", parent_phone="",
+            )
+            for i in range(n_students)
+        ], batch_size=1000)
+        return school, classes, students
+
+    def _grow(self, school, students, start_day, rows_now, target):
+        """Append whole school days of attendance until `target` rows exist."""
+        statuses = ["PRESENT"] * 8 + ["ABSENT", "LATE"]
+        day = start_day + timedelta(days=rows_now // len(students))
+        batch = []
+        while rows_now < target:
+            for student in students:
+                batch.append(Attendance(
+                    school=school, student=student, class_program_id=student.class_program_id,
+                    date=day, status=random.choice(statuses),
+                ))
+            rows_now += len(students)
+            day += timedelta(days=1)
+            if len(batch) >= 20_000:
+                Attendance.objects.bulk_create(batch, batch_size=5000)
+                batch = []
+        Attendance.objects.bulk_create(batch, batch_size=5000)
+        return rows_now
+
+    def _time(self, fn):
+        runs = []
+        for _ in range(self.repeat):
+            started = time.perf_counter()
+            fn()
+            runs.append((time.perf_counter() - started) * 1000)
+        return statistics.median(runs)
+
+    def _run(self, sizes, n_students, n_classes):
+        school, classes, students = self._seed_school(n_students, n_classes)
+        base = Attendance.objects.filter(school=school).select_related("student", "class_program")
+        start_day = date(2000, 1, 1)
+        rows = 0
+
+        self.stdout.write(
+            f"{'rows':>10} {'first':>9} {'deep':>9} {'class':>9} {'status':>9} {'offset+count':>13}  (ms, median)"
+        )
+        for size in sizes:
+            rows = self._grow(school, students, start_day, rows, size)
+            if connection.vendor in ("sqlite", "postgresql"):
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE")
+
+            # A cursor halfway back through history, as if a user paged deep.
+            middle = base.order_by("-date", "-id").values_list("date", "id")[rows // 2]
+            deep_cursor = keyset.encode_cursor(list(middle))
+            ordered = base.order_by("-date", "-id")
+
+            first = self._time(lambda: keyset.paginate(base, ["-date", "-id"], None, PAGE))
+            deep = self._time(lambda: keyset.paginate(base, ["-date", "-id"], deep_cursor, PAGE))
+            by_class = self._time(lambda: keyset.paginate(
+                base.filter(class_program=classes[0]), ["-date", "-id"], None, PAGE))
+            by_status = self._time(lambda: keyset.paginate(
+                base.filter(status="ABSENT"), ["-date", "-id"], None, PAGE))
+            offset = self._time(lambda: (ordered.count(), list(ordered[rows // 2:rows // 2 + PAGE])))
+
+            self.stdout.write(
+                f"{rows:>10} {first:>9.2f} {deep:>9.2f} {by_class:>9.2f} {by_status:>9.2f} {offset:>13.2f}"
+            )
+
+        if self.verbosity >= 2:
+            self.stdout.write(ordered[:PAGE].explain())
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from attendance import registers
+
+
+class Command(BaseCommand):
+    help = "Builds queued monthly register PDF jobs, rendering classes in a process pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Build what is queued now, then exit")
+        parser.add_argument("--workers", type=int, default=registers.WORKERS, help="Render processes")
+        parser.add_argument("--interval", type=float, default=5.0, help="Seconds to sleep when nothing is queued")
+
+    def handle(self, *args, **options):
+        while True:
+            job = registers.claim_job()
+            if job is not None:
+                started = time.monotonic()
+                job = registers.build_job(job, workers=options["workers"])
+                self.stdout.write(
+                    f"Job {job.pk} ({job.school}, {job.month:%Y-%m}): {job.get_status_display()}, "
+                    f"{job.done} class(es) in {time.monotonic() - started:.1f}s"
+                )
+                continue
+            if options["once"]:
+                break
+            time.sleep(options["interval"])
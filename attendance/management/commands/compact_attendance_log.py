@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from attendance.compaction import AFTER_DAYS, compact
+
+
+class Command(BaseCommand):
+    help = (
+        "Collapses runs of AttendanceLog changes to the same attendance row into their first and "
+        "last entries. Noted and after-the-day edits are kept verbatim."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=AFTER_DAYS,
+            help=f"Only compact entries older than this many days (default {AFTER_DAYS})",
+        )
+        parser.add_argument("--chunk-size", type=int, default=500, help="Attendance rows per transaction")
+
+    def handle(self, *args, **options):
+        result = compact(
+            before=timezone.now() - timedelta(days=options["days"]), chunk_size=options["chunk_size"],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Compacted the log of {result.attendance_rows} attendance row(s), "
+            f"removing {result.removed} entr{'y' if result.removed == 1 else 'ies'}."
+        ))
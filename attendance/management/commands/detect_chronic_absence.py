@@ -0,0 +1,22 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from attendance.absenteeism import detect
+from schools.models import School
+
+
+class Command(BaseCommand):
+    help = "Ranks students below the attendance threshold or with recurring weekday absences."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--school", type=int, help="Only this school id")
+        parser.add_argument("--as-of", type=date.fromisoformat, help="Analysis date (YYYY-MM-DD, default today)")
+
+    def handle(self, *args, **options):
+        schools = School.objects.all()
+        if options["school"] is not None:
+            schools = schools.filter(pk=options["school"])
+        for school in schools:
+            flagged = detect(school, as_of=options["as_of"])
+            self.stdout.write(f"{school}: {flagged} student(s) flagged.")
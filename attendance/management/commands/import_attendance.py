@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from attendance import importer
+from schools.models import School
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports historical attendance from a CSV or Excel file (see attendance.importer for the columns). "
+        "Parents are not notified."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help=".csv or .xlsx file")
+        parser.add_argument("--school", type=int, required=True, help="School id")
+        parser.add_argument("--batch-size", type=int, default=importer.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        school = School.objects.filter(pk=options["school"]).first()
+        if school is None:
+            raise CommandError(f"No school with id {options['school']}.")
+        try:
+            with open(options["path"], "rb") as stream:
+                result = importer.import_file(
+                    school=school, stream=stream, name=options["path"], batch_size=options["batch_size"],
+                )
+        except (OSError, importer.ImportFileError) as e:
+            raise CommandError(str(e))
+
+        for line, message in result.errors:
+            self.stderr.write(f"line {line}: {message}")
+        if result.failed > len(result.errors):
+            self.stderr.write(f"... and {result.failed - len(result.errors)} more error(s)")
+        self.stdout.write(self.style.SUCCESS(
+            f"{result.rows} row(s): {result.created} created, {result.updated} updated, "
+            f"{result.unchanged} unchanged, {result.failed} failed."
+        ))
@@ -0,0 +1,127 @@
+import random
+import statistics
+import threading
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from accounts.models import User
+from attendance import services
+from attendance.coalescer import WriteCoalescer
+from attendance.models import Attendance, AttendanceDailySummary, AttendanceLog, AttendanceStreak
+from classes_app.models import ClassProgram, Division
+from notifications.models import OutboxMessage, StudentAlert
+from schools.models import School
+from students.models import Student
+
+
+class Command(BaseCommand):
+    help = (
+        "Reproduces the morning roster peak: every teacher submits a class at the same moment, "
+        "directly and through the group-commit writer. Synthetic data is deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--teachers", type=int, default=20, help="Concurrent submitters, one class each")
+        parser.add_argument("--students", type=int, default=30, help="Students per class")
+        parser.add_argument("--rounds", type=int, default=5, help="Submissions per teacher")
+        parser.add_argument("--mode", choices=["direct", "grouped", "both"], default="both")
+        parser.add_argument("--window-ms", type=float, default=5)
+
+    def handle(self, *args, **options):
+        modes = ["direct", "grouped"] if options["mode"] == "both" else [options["mode"]]
+        self.verbosity = options["verbosity"]
+        self.stdout.write(
+            f"{'mode':>8} {'ok':>6} {'errors':>7} {'locked':>7} {'p50':>8} {'p95':>8} {'max':>8} "
+            f"{'batches':>8}  (ms)"
+        )
+        for mode in modes:
+            school = self._seed(options["teachers"], options["students"])
+            try:
+                self._run(mode, school, options)
+            finally:
+                self._cleanup(school)
+
+    def _seed(self, n_classes, n_students):
+        school = School.objects.create(name="Attendance load test", in_progress=False)
+        division = Division.objects.create(school=school, name="LOADTEST")
+        self.teacher = User.objects.create_user(
+            username=f"loadtest-{school.pk}", password=None, role="TEACHER", school=school,
+        )
+        self.classes = ClassProgram.objects.bulk_create([
+            ClassProgram(school=school, division=division, name=f"Load {i}") for i in range(n_classes)
+        ])
+        students = Student.objects.bulk_create([
+            Student(
+                school=school, division=division, class_program=self.classes[i % n_classes],
+                full_name=f"Load Student {i}", parent_name="Parent", parent_phone="",
+            )
+            for i in range(n_classes * n_students)
+        ], batch_size=1000)
+        self.roster = {}
+        for student in students:
+            self.roster.setdefault(student.class_program_id, []).append(student.id)
+        return school
+
+    def _run(self, mode, school, options):
+        coalescer = WriteCoalescer(window_ms=options["window_ms"]) if mode == "grouped" else None
+        start = threading.Barrier(len(self.classes))
+        latencies, errors, lock = [], [], threading.Lock()
+        first_day = date.today() - timedelta(days=options["rounds"])
+
+        def teacher(class_program):
+            start.wait()
+            try:
+                for round_no in range(options["rounds"]):
+                    kwargs = dict(
+                        school=school, class_program=class_program, date=first_day + timedelta(days=round_no),
+                        session=None, marked_by=self.teacher,
+                        statuses={
+                            student_id: random.choice(["PRESENT"] * 8 + ["ABSENT", "LATE"])
+                            for student_id in self.roster[class_program.pk]
+                        },
+                    )
+                    began = time.perf_counter()
+                    try:
+                        if coalescer is None:
+                            services.bulk_mark(**kwargs)
+                        else:
+                            coalescer.submit(**kwargs).result(timeout=60)
+                        with lock:
+                            latencies.append((time.perf_counter() - began) * 1000)
+                    except Exception as e:
+                        with lock:
+                            errors.append(str(e))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=teacher, args=(c,)) for c in self.classes]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        locked = sum("locked" in error for error in errors)
+        p50 = statistics.median(latencies) if latencies else 0
+        p95 = statistics.quantiles(latencies, n=20, method="inclusive")[-1] if len(latencies) > 1 else p50
+        self.stdout.write(
+            f"{mode:>8} {len(latencies):>6} {len(errors):>7} {locked:>7} {p50:>8.1f} {p95:>8.1f} "
+            f"{max(latencies, default=0):>8.1f} {coalescer.batches if coalescer else '-':>8}"
+        )
+        if errors and self.verbosity >= 2:
+            self.stdout.write(f"  first error: {errors[0]}")
+
+    def _cleanup(self, school):
+        # Raw deletes: the attendance post_delete receivers would rebuild
+        # rollups and streaks row by row for data that is going away anyway.
+        for model in (AttendanceLog, Attendance, AttendanceDailySummary, AttendanceStreak, StudentAlert, OutboxMessage):
+            rows = model.objects.filter(school=school)
+            rows._raw_delete(rows.db)
+        # Divisions are PROTECTed, so take the school apart bottom-up.
+        Student.objects.filter(school=school).delete()
+        ClassProgram.objects.filter(school=school).delete()
+        Division.objects.filter(school=school).delete()
+        self.teacher.delete()
+        school.delete()
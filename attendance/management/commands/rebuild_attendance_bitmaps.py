@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from attendance.bitmaps import rebuild
+from schools.models import School
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes every student's yearly attendance bitmap from live and archived attendance. "
+        "Bitmaps are kept current on each write; run this after imports or manual SQL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--school", type=int, help="Only rebuild this school id")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        school = School.objects.get(pk=options["school"]) if options["school"] else None
+        written = rebuild(school=school, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} attendance bitmap(s)."))
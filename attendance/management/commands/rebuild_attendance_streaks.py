@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from attendance.streaks import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes every student's absence streak from attendance history. "
+        "Streaks are kept current on each write; run this after imports or manual SQL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--school", type=int, help="Only rebuild this school id")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        written = rebuild(school=options["school"], batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt absence streaks for {written} student(s)."))
@@ -0,0 +1,21 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from attendance.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes AttendanceDailySummary rows from attendance records. "
+        "Run once after deploying the rollup, and after imports or manual SQL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--school", type=int, help="Only rebuild this school id")
+        parser.add_argument("--start", type=date.fromisoformat, help="First date (YYYY-MM-DD)")
+        parser.add_argument("--end", type=date.fromisoformat, help="Last date (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        written = rebuild(school=options["school"], start=options["start"], end=options["end"])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} daily summary row(s)."))
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-18 23:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0005_attendance_offline_created_attendance_synced'),
+        ('schools', '0002_school_telegram_bot_token'),
+        ('students', '0006_alter_student_parent_phone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceStreak',
+            fields=[
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='attendance_streak', serialize=False, to='students.student')),
+                ('last_date', models.DateField(blank=True, null=True)),
+                ('current_absent_streak', models.PositiveIntegerField(default=0)),
+                ('streak_before_last', models.PositiveIntegerField(default=0)),
+                ('longest_absent_streak', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('school', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_set', to='schools.school')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-18 23:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0006_attendance_streak'),
+        ('classes_app', '0007_divisionlog_delete_divisionaudit'),
+        ('schools', '0002_school_telegram_bot_token'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceDailySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('present', models.IntegerField(default=0)),
+                ('absent', models.IntegerField(default=0)),
+                ('late', models.IntegerField(default=0)),
+                ('half_day', models.IntegerField(default=0)),
+                ('class_program', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='classes_app.classprogram')),
+                ('school', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_set', to='schools.school')),
+                ('session', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='classes_app.session')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['school', 'date'], name='att_summary_school_date'), models.Index(fields=['class_program', 'date'], name='att_summary_class_date')],
+                'constraints': [models.UniqueConstraint(fields=('school', 'class_program', 'date', 'session'), name='attendance_daily_summary_key')],
+            },
+        ),
+    ]
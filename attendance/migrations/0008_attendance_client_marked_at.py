@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-18 23:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0007_attendance_daily_summary'),
+        ('classes_app', '0007_divisionlog_delete_divisionaudit'),
+        ('schools', '0002_school_telegram_bot_token'),
+        ('students', '0006_alter_student_parent_phone'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance',
+            name='client_marked_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['class_program', 'updated_at'], name='att_class_updated'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0008_attendance_client_marked_at'),
+        ('classes_app', '0007_divisionlog_delete_divisionaudit'),
+        ('schools', '0002_school_telegram_bot_token'),
+        ('students', '0006_alter_student_parent_phone'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RosterSnapshot',
+            fields=[
+                ('class_program', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='roster_snapshot', serialize=False, to='classes_app.classprogram')),
+                ('version', models.PositiveIntegerField(default=1)),
+                ('built_version', models.PositiveIntegerField(default=0)),
+                ('students', models.JSONField(default=list)),
+                ('built_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='rostersnapshot',
+            name='school',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_set', to='schools.school'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0009_roster_snapshot'),
+        ('classes_app', '0007_divisionlog_delete_divisionaudit'),
+        ('schools', '0002_school_telegram_bot_token'),
+        ('students', '0006_alter_student_parent_phone'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['school', 'date', 'id'], name='att_school_date_id'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['class_program', 'date', 'id'], name='att_class_date_id'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['school', 'status', 'date', 'id'], name='att_school_status_date_id'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0010_attendance_list_indexes'),
+        ('classes_app', '0007_divisionlog_delete_divisionaudit'),
+        ('schools', '0002_school_telegram_bot_token'),
+        ('students', '0006_alter_student_parent_phone'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedAttendance',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('academic_year', models.PositiveSmallIntegerField()),
+                ('date', models.DateField()),
+                ('status', models.CharField(choices=[('PRESENT', 'Present'), ('ABSENT', 'Absent'), ('LATE', 'Late'), ('HALF_DAY', 'Half Day')], max_length=15)),
+                ('remarks', models.TextField(blank=True, null=True)),
+                ('marked_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('changes', models.JSONField(default=list)),
+                ('class_program', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='classes_app.classprogram')),
+                ('marked_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('school', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_set', to='schools.school')),
+                ('session', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='classes_app.session')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_attendance', to='students.student')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['school', 'academic_year', 'date'], name='att_archive_school_year'), models.Index(fields=['student', 'date'], name='att_archive_student_date')],
+            },
+        ),
+        migrations.CreateModel(
+            name='AttendanceYear',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('closed_at', models.DateTimeField(auto_now_add=True)),
+                ('attendance_rows', models.PositiveIntegerField(default=0)),
+                ('log_rows', models.PositiveIntegerField(default=0)),
+                ('closed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('school', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_set', to='schools.school')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('school', 'year'), name='attendance_year_per_school')],
+            },
+        ),
+    ]
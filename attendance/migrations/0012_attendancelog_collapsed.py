@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0011_academic_year_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendancelog',
+            name='collapsed',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
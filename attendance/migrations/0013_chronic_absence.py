@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0012_attendancelog_collapsed'),
+        ('schools', '0002_school_telegram_bot_token'),
+        ('students', '0006_alter_student_parent_phone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChronicAbsence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('as_of', models.DateField()),
+                ('rank', models.PositiveIntegerField()),
+                ('rate', models.FloatField()),
+                ('recent_rate', models.FloatField(blank=True, null=True)),
+                ('worst_window_rate', models.FloatField()),
+                ('marked_days', models.PositiveIntegerField()),
+                ('absent_days', models.PositiveIntegerField()),
+                ('weekday', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('flags', models.JSONField(default=list)),
+                ('school', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_set', to='schools.school')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chronic_absences', to='students.student')),
+            ],
+            options={
+                'ordering': ['rank'],
+                'indexes': [models.Index(fields=['school', 'as_of', 'rank'], name='chronic_absence_ranked')],
+                'constraints': [models.UniqueConstraint(fields=('school', 'as_of', 'student'), name='chronic_absence_per_run')],
+            },
+        ),
+    ]
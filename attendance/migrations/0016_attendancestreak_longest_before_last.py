@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-19 01:14
+
+from django.db import migrations, models
+from django.db.models import F, Q
+
+
+def seed_longest_before_last(apps, schema_editor):
+    """
+    Where the longest streak can't have ended on last_date it is also the
+    longest before it; otherwise leave it unknown so a re-mark rebuilds.
+    """
+    AttendanceStreak = apps.get_model("attendance", "AttendanceStreak")
+    known = Q(current_absent_streak__lt=F("longest_absent_streak")) | Q(longest_absent_streak=0)
+    AttendanceStreak.objects.filter(known).update(longest_before_last=F("longest_absent_streak"))
+    AttendanceStreak.objects.exclude(known).update(longest_before_last=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0015_attendance_bitmap'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendancestreak',
+            name='longest_before_last',
+            field=models.PositiveIntegerField(blank=True, default=0, null=True),
+        ),
+        migrations.RunPython(seed_longest_before_last, migrations.RunPython.noop),
+    ]
@@ -26,10 +26,26 @@ class Attendance(SchoolOwnedModel):
     
     synced = models.BooleanField(default=True)
     offline_created = models.BooleanField(default=False)  # set true when marked offline
+    # Device time of the offline mark behind the current status (see attendance.sync);
+    # cleared by server-side edits, so last-writer-wins compares like with like.
+    client_marked_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         unique_together = ("student", "class_program", "date", "session")
         ordering = ["-date", "class_program", "student"]
+        indexes = [
+            models.Index(fields=["class_program", "updated_at"], name="att_class_updated"),
+            # Keyset pages of the attendance list, newest (date, id) first,
+            # one per filter combination it offers (session rides on class).
+            models.Index(fields=["school", "date", "id"], name="att_school_date_id"),
+            models.Index(fields=["class_program", "date", "id"], name="att_class_date_id"),
+            models.Index(fields=["school", "status", "date", "id"], name="att_school_status_date_id"),
+        ]
+
+    @property
+    def effective_marked_at(self):
+        """When the current status was decided, for last-writer-wins."""
+        return self.client_marked_at or self.updated_at
 
     def __str__(self):
         return f"{self.student} - {self.class_program} ({self.status}) on {self.date}"
@@ -43,5 +59,236 @@ class AttendanceLog(SchoolOwnedModel):
     changed_by = models.ForeignKey("accounts.User", on_delete=models.SET_NULL, null=True)
     changed_at = models.DateTimeField(auto_now_add=True)
     note = models.TextField(blank=True, null=True)
+    # Intermediate changes folded into this entry by attendance.compaction
+    collapsed = models.PositiveIntegerField(default=0)
+
+
+
+
+class AttendanceStreak(SchoolOwnedModel):
+    """
+    Running absence state per student, maintained incrementally by the
+    attendance write path (see attendance.streaks). A day counts as absent
+    when every attendance row the student has that day is ABSENT; days with
+    no rows (weekends, holidays) don't break a streak.
+    """
+    student = models.OneToOneField(
+        "students.Student", on_delete=models.CASCADE, primary_key=True, related_name="attendance_streak"
+    )
+    last_date = models.DateField(null=True, blank=True)
+    current_absent_streak = models.PositiveIntegerField(default=0)
+    # Streak as it stood before last_date, so re-marking the latest day is O(1).
+    streak_before_last = models.PositiveIntegerField(default=0)
+    longest_absent_streak = models.PositiveIntegerField(default=0)
+    # Longest streak before last_date; null when unknown (re-marking then rebuilds).
+    longest_before_last = models.PositiveIntegerField(default=0, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.student} absent {self.current_absent_streak} day(s) as of {self.last_date}"
+
+
+class AttendanceBitmap(SchoolOwnedModel):
+    """
+    One student's academic year as two bits per day (see attendance.bitmaps):
+    unmarked, attended, half day or absent, the worst mark winning on days
+    with several sessions. Kept current by the attendance write path, so
+    year calendars and rates read one small row per student.
+    """
+    student = models.ForeignKey("students.Student", on_delete=models.CASCADE, related_name="attendance_bitmaps")
+    year = models.PositiveSmallIntegerField(help_text="Calendar year the academic year starts in")
+    bits = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["student", "year"], name="attendance_bitmap_student_year"),
+        ]
+
+    def __str__(self):
+        return f"{self.student} {self.year}/{self.year + 1}"
+
+
+class AttendanceDailySummary(SchoolOwnedModel):
+    """
+    Per-status attendance counts for one class, day and session, kept in
+    step by the attendance write path (see attendance.rollups). Analytics
+    read these instead of counting Attendance rows.
+
+    Readers should Sum() over rows: with a NULL class or session the unique
+    constraint can't stop a concurrent duplicate, and summing keeps that harmless.
+    """
+    class_program = models.ForeignKey("classes_app.ClassProgram", on_delete=models.CASCADE, null=True, blank=True)
+    date = models.DateField()
+    session = models.ForeignKey("classes_app.Session", on_delete=models.SET_NULL, null=True, blank=True)
+    present = models.IntegerField(default=0)
+    absent = models.IntegerField(default=0)
+    late = models.IntegerField(default=0)
+    half_day = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["school", "class_program", "date", "session"], name="attendance_daily_summary_key"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["school", "date"], name="att_summary_school_date"),
+            models.Index(fields=["class_program", "date"], name="att_summary_class_date"),
+        ]
+
+    @property
+    def total(self):
+        return self.present + self.absent + self.late + self.half_day
+
+    def __str__(self):
+        return f"{self.class_program} {self.date}: {self.present}/{self.total} present"
+
+
+class RosterSnapshot(SchoolOwnedModel):
+    """
+    A class's student list as served to the marking screen (see
+    attendance.rosters). `version` is bumped whenever enrolment changes; the
+    list is rebuilt lazily when `built_version` falls behind, and the version
+    feeds the roster API's ETag.
+    """
+    class_program = models.OneToOneField(
+        "classes_app.ClassProgram", on_delete=models.CASCADE, primary_key=True, related_name="roster_snapshot"
+    )
+    version = models.PositiveIntegerField(default=1)
+    built_version = models.PositiveIntegerField(default=0)
+    students = models.JSONField(default=list)  # [[id, full_name], ...] in name order
+    built_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.class_program} roster v{self.version}"
+
 
 
+class AttendanceYear(SchoolOwnedModel):
+    """
+    An academic year whose attendance has been moved out of the live tables
+    into ArchivedAttendance (see attendance.archive). Closed years are
+    read-only: marks dated inside them are rejected.
+    """
+    year = models.PositiveSmallIntegerField()  # calendar year the academic year starts in
+    closed_at = models.DateTimeField(auto_now_add=True)
+    closed_by = models.ForeignKey("accounts.User", on_delete=models.SET_NULL, null=True, blank=True)
+    attendance_rows = models.PositiveIntegerField(default=0)
+    log_rows = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["school", "year"], name="attendance_year_per_school"),
+        ]
+
+    def __str__(self):
+        return f"{self.school} {self.year}/{self.year + 1} (closed)"
+
+
+class ArchivedAttendance(SchoolOwnedModel):
+    """
+    An attendance row from a closed academic year, with its AttendanceLog
+    rows folded into `changes`, oldest first, as six-item arrays:
+    [previous_status, new_status, changed_by_id, changed_at (ISO 8601),
+    note, collapsed]. Keeps the original Attendance id. Written only by
+    attendance.archive; read back by attendance.history.archived_changes.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    academic_year = models.PositiveSmallIntegerField()
+    student = models.ForeignKey("students.Student", on_delete=models.CASCADE, related_name="archived_attendance")
+    class_program = models.ForeignKey(
+        "classes_app.ClassProgram", on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    date = models.DateField()
+    session = models.ForeignKey("classes_app.Session", on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    status = models.CharField(max_length=15, choices=Attendance.Status.choices)
+    remarks = models.TextField(blank=True, null=True)
+    marked_by = models.ForeignKey("accounts.User", on_delete=models.SET_NULL, null=True, related_name="+")
+    marked_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    changes = models.JSONField(default=list)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["school", "academic_year", "date"], name="att_archive_school_year"),
+            models.Index(fields=["student", "date"], name="att_archive_student_date"),
+        ]
+
+    def __str__(self):
+        return f"{self.student} ({self.status}) on {self.date} [archived]"
+
+
+class ChronicAbsence(SchoolOwnedModel):
+    """
+    One flagged student in a weekly absenteeism run (see attendance.absenteeism),
+    ranked worst first, so the report page is a plain indexed read.
+    """
+    WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+    student = models.ForeignKey("students.Student", on_delete=models.CASCADE, related_name="chronic_absences")
+    as_of = models.DateField()
+    rank = models.PositiveIntegerField()
+    rate = models.FloatField()  # share of marked days attended over the lookback
+    recent_rate = models.FloatField(null=True, blank=True)  # same, over the recent window
+    worst_window_rate = models.FloatField()  # lowest rate over any run of window days
+    marked_days = models.PositiveIntegerField()
+    absent_days = models.PositiveIntegerField()
+    weekday = models.PositiveSmallIntegerField(null=True, blank=True)  # 0 = Monday; recurring absence day
+    flags = models.JSONField(default=list)  # e.g. ["chronic", "declining", "weekday"]
+
+    class Meta:
+        ordering = ["rank"]
+        constraints = [
+            models.UniqueConstraint(fields=["school", "as_of", "student"], name="chronic_absence_per_run"),
+        ]
+        indexes = [
+            models.Index(fields=["school", "as_of", "rank"], name="chronic_absence_ranked"),
+        ]
+
+    @property
+    def weekday_name(self):
+        return self.WEEKDAYS[self.weekday] if self.weekday is not None else ""
+
+    def __str__(self):
+        return f"#{self.rank} {self.student} {self.rate:.0%} as of {self.as_of}"
+
+
+class RegisterJob(SchoolOwnedModel):
+    """
+    A month of class register PDFs, zipped, built in the background by
+    `manage.py build_attendance_registers` (see attendance.registers).
+    """
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "Pending"
+        RUNNING = "RUNNING", "Running"
+        DONE = "DONE", "Done"
+        FAILED = "FAILED", "Failed"
+
+    month = models.DateField(help_text="First day of the month")
+    class_program = models.ForeignKey(
+        "classes_app.ClassProgram", on_delete=models.CASCADE, null=True, blank=True, related_name="+",
+        help_text="Empty for every class",
+    )
+    requested_by = models.ForeignKey("accounts.User", on_delete=models.SET_NULL, null=True, related_name="+")
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    total = models.PositiveIntegerField(default=0)  # classes to render
+    done = models.PositiveIntegerField(default=0)
+    file = models.FileField(upload_to="attendance/registers/%Y/%m/", blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="register_job_queue"),
+        ]
+
+    @property
+    def progress(self):
+        return round(100 * self.done / self.total) if self.total else (100 if self.status == self.Status.DONE else 0)
+
+    def __str__(self):
+        return f"Registers {self.month:%Y-%m} ({self.get_status_display()})"
@@ -0,0 +1,78 @@
+"""
+One class's monthly register as a PDF, for filing and signing.
+
+`render` takes a compact, picklable payload (see registers.pdf_payloads)
+and returns the file's bytes. It touches neither Django nor the database,
+so process-pool workers run it without setting Django up, under any
+multiprocessing start method.
+"""
+import io
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import mm
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+FILLS = {"A": colors.HexColor("#FECACA"), "H": colors.HexColor("#FEF08A"), "L": colors.HexColor("#FED7AA")}
+WEEKEND = colors.HexColor("#F3F4F6")
+SIGNATURES = ["Class teacher: ______________________", "Principal: ______________________", "Date: ______________"]
+
+
+def render(payload):
+    """
+    payload: (filename, title, subtitle, day labels, weekend column indexes,
+    [(student name, codes, [P, L, H, A], rate percent or None)]), where
+    `codes` has one character per day ("P", "L", "H", "A" or " ").
+    Returns (filename, pdf bytes).
+    """
+    filename, title, subtitle, day_labels, weekends, students = payload
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buffer, pagesize=landscape(A4), title=title,
+        leftMargin=10 * mm, rightMargin=10 * mm, topMargin=10 * mm, bottomMargin=18 * mm,
+    )
+    styles = getSampleStyleSheet()
+
+    first_day = 2  # columns: #, student, days..., totals
+    data = [["#", "Student", *day_labels, "P", "L", "H", "A", "%"]]
+    style = [
+        ("FONT", (0, 0), (-1, -1), "Helvetica", 6.5),
+        ("FONT", (0, 0), (-1, 0), "Helvetica-Bold", 6.5),
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+        ("ALIGN", (first_day, 0), (-1, -1), "CENTER"),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#E5E7EB")),
+        ("TOPPADDING", (0, 0), (-1, -1), 1.5),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 1.5),
+    ]
+    for index in weekends:
+        style.append(("BACKGROUND", (first_day + index, 1), (first_day + index, -1), WEEKEND))
+    for row, (name, codes, counts, rate) in enumerate(students, start=1):
+        data.append([row, name[:32], *(code.strip() for code in codes), *counts, "" if rate is None else rate])
+        for index, code in enumerate(codes):
+            if code in FILLS:
+                style.append(("BACKGROUND", (first_day + index, row), (first_day + index, row), FILLS[code]))
+
+    width = doc.width
+    name_width, number_width, total_width = 42 * mm, 7 * mm, 7 * mm
+    day_width = (width - name_width - number_width - 5 * total_width) / max(len(day_labels), 1)
+    table = Table(
+        data, repeatRows=1,
+        colWidths=[number_width, name_width, *[day_width] * len(day_labels), *[total_width] * 5],
+    )
+    table.setStyle(TableStyle(style))
+
+    def signatures(canvas, doc):
+        # On every page, in the bottom margin, so a long class never pushes them off alone.
+        canvas.saveState()
+        canvas.setFont("Helvetica", 9)
+        for index, label in enumerate(SIGNATURES):
+            canvas.drawString(doc.leftMargin + index * width / 3, 9 * mm, label)
+        canvas.restoreState()
+
+    doc.build(
+        [Paragraph(title, styles["Heading2"]), Paragraph(subtitle, styles["Normal"]), Spacer(1, 4 * mm), table],
+        onFirstPage=signatures, onLaterPages=signatures,
+    )
+    return filename, buffer.getvalue()
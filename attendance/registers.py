@@ -0,0 +1,268 @@
+"""
+Attendance registers: one grid per class, students down, days across.
+
+`class_grids` reads the whole range in one query ordered by class, student
+and date (live and archived rows, through archive.rows) and pivots it one
+class at a time, so memory holds one class's grid, never the school's.
+A day with several sessions shows its worst mark, as in the absenteeism
+report; each row ends with the day counts and the attendance rate.
+
+Two outputs:
+
+- `write_register`: an .xlsx with a sheet per class, in openpyxl's
+  write-only mode, which streams rows to disk as they are appended.
+- `build_job`: a RegisterJob's monthly PDFs. The grids are fetched first as
+  compact payloads, rendered by register_pdf.render in a process pool of
+  ATTENDANCE_REGISTER_WORKERS (default: one per CPU), and written into the
+  ZIP as each one finishes, updating the job's progress.
+"""
+import logging
+import os
+import tempfile
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import timedelta
+from itertools import groupby
+from operator import itemgetter
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, PatternFill
+
+from django.conf import settings
+from django.core.files import File
+from django.db import connection, connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.text import slugify
+
+from classes_app.models import ClassProgram
+from students.models import Student
+
+from . import archive, register_pdf
+from .absenteeism import CREDIT
+from .models import RegisterJob
+
+logger = logging.getLogger(__name__)
+
+MAX_DAYS = 366
+WORKERS = getattr(settings, 'ATTENDANCE_REGISTER_WORKERS', os.cpu_count() or 1)
+# A RUNNING job untouched this long is presumed orphaned by a dead worker.
+STALE_AFTER = timedelta(hours=1)
+
+CODES = {"PRESENT": "P", "LATE": "L", "HALF_DAY": "H", "ABSENT": "A"}
+# Lower is worse; a day with several sessions shows its worst mark.
+SEVERITY = {"ABSENT": 0, "HALF_DAY": 1, "LATE": 2, "PRESENT": 3}
+FILLS = {
+    "A": PatternFill("solid", fgColor="FECACA"),
+    "H": PatternFill("solid", fgColor="FEF08A"),
+    "L": PatternFill("solid", fgColor="FED7AA"),
+}
+HEADER_FONT = Font(bold=True)
+CENTER = Alignment(horizontal="center")
+INVALID_TITLE = str.maketrans({c: "-" for c in "[]:*?/\\"})
+
+
+def _sheet_title(name, used):
+    title = name.translate(INVALID_TITLE)[:31] or "Class"
+    base, n = title, 2
+    while title.casefold() in used:
+        suffix = f" ({n})"
+        title, n = base[:31 - len(suffix)] + suffix, n + 1
+    used.add(title.casefold())
+    return title
+
+
+def class_grids(*, school, start, end, class_program=None):
+    """
+    Yield (class name, [(student name, [status or None per day])]) per
+    class, students by name: the roster plus anyone marked in the class.
+    One ordered query; one class's grid in memory at a time.
+    """
+    days = (end - start).days + 1
+    if not 0 < days <= MAX_DAYS:
+        raise ValueError(f"Choose a range of 1 to {MAX_DAYS} days.")
+
+    classes = ClassProgram.objects.filter(school=school).select_related("division")
+    filters = {}
+    if class_program is not None:
+        classes = classes.filter(pk=class_program.pk)
+        filters["class_program"] = class_program
+    class_names = {c.pk: f"{c.name} ({c.division.name})" for c in classes}
+    names, rosters = {}, {}
+    for pk, name, class_id in Student.objects.filter(school=school).values_list(
+        "id", "full_name", "class_program_id"
+    ):
+        names[pk] = name
+        if class_id in class_names:
+            rosters.setdefault(class_id, []).append(pk)
+
+    def grid(class_id, marks):
+        cells = {student_id: [None] * days for student_id in rosters.get(class_id, [])}
+        for row in marks:
+            statuses = cells.setdefault(row["student_id"], [None] * days)
+            index = (row["date"] - start).days
+            if statuses[index] is None or SEVERITY[row["status"]] < SEVERITY[statuses[index]]:
+                statuses[index] = row["status"]
+        return sorted(
+            ((names.get(pk, f"#{pk}"), statuses) for pk, statuses in cells.items()),
+            key=lambda item: item[0].casefold(),
+        )
+
+    marks = archive.rows(
+        school, start, end, fields=["class_program_id", "student_id", "date", "status"], **filters
+    ).order_by("class_program_id", "student_id", "date")
+    seen = set()
+    for class_id, class_marks in groupby(marks.iterator(), key=itemgetter("class_program_id")):
+        if class_id in class_names:  # else the class is gone
+            seen.add(class_id)
+            yield class_names[class_id], grid(class_id, class_marks)
+    # Classes with a roster but no marks in the range still get a register.
+    for class_id in sorted(set(rosters) - seen, key=class_names.get):
+        yield class_names[class_id], grid(class_id, ())
+
+
+def totals(statuses):
+    """[present, late, half day, absent] counts and the attendance rate (None if unmarked)."""
+    marked = [status for status in statuses if status is not None]
+    counts = [marked.count(status) for status in ("PRESENT", "LATE", "HALF_DAY", "ABSENT")]
+    rate = sum(CREDIT[status] for status in marked) / (2 * len(marked)) if marked else None
+    return counts, rate
+
+
+def _write_class(workbook, title, days, rows):
+    sheet = workbook.create_sheet(title=title)
+    sheet.freeze_panes = "B2"
+    sheet.column_dimensions["A"].width = 28
+
+    def header(value):
+        cell = WriteOnlyCell(sheet, value=value)
+        cell.font = HEADER_FONT
+        cell.alignment = CENTER
+        return cell
+
+    sheet.append(
+        [header("Student")] + [header(day.strftime("%d %b")) for day in days]
+        + [header(label) for label in ("P", "L", "H", "A", "Rate")]
+    )
+    for name, statuses in rows:
+        row = [name]
+        for status in statuses:
+            code = CODES.get(status)
+            cell = WriteOnlyCell(sheet, value=code)
+            cell.alignment = CENTER
+            if code in FILLS:
+                cell.fill = FILLS[code]
+            row.append(cell)
+        counts, rate = totals(statuses)
+        rate_cell = WriteOnlyCell(sheet, value=round(rate, 4) if rate is not None else None)
+        rate_cell.number_format = "0%"
+        sheet.append(row + counts + [rate_cell])
+
+
+def write_register(stream, *, school, start, end, class_program=None):
+    """
+    Write `school`'s attendance from `start` to `end` (inclusive) to `stream`
+    as .xlsx, optionally for one class. Returns the number of class sheets.
+    """
+    days = [start + timedelta(days=n) for n in range((end - start).days + 1)]
+    workbook = Workbook(write_only=True)
+    used, written = set(), 0
+    for class_name, rows in class_grids(school=school, start=start, end=end, class_program=class_program):
+        _write_class(workbook, _sheet_title(class_name, used), days, rows)
+        written += 1
+    if not written:
+        workbook.create_sheet(title="Attendance").append(["No attendance in this range."])
+
+    workbook.save(stream)
+    return written
+
+
+def month_bounds(month):
+    first = month.replace(day=1)
+    return first, (first + timedelta(days=31)).replace(day=1) - timedelta(days=1)
+
+
+def pdf_payloads(job):
+    """register_pdf.render payloads for `job`'s month, one per class."""
+    start, end = month_bounds(job.month)
+    days = [start + timedelta(days=n) for n in range((end - start).days + 1)]
+    day_labels = [str(day.day) for day in days]
+    weekends = [index for index, day in enumerate(days) if day.weekday() >= 5]
+    subtitle = f"Attendance register, {start:%B %Y}"
+    payloads = []
+    grids = class_grids(school=job.school, start=start, end=end, class_program=job.class_program)
+    for number, (class_name, rows) in enumerate(grids, start=1):
+        students = []
+        for name, statuses in rows:
+            counts, rate = totals(statuses)
+            codes = "".join(CODES.get(status, " ") for status in statuses)
+            students.append((name, codes, counts, None if rate is None else round(rate * 100)))
+        filename = f"{number:03d}-{slugify(class_name) or 'class'}.pdf"
+        payloads.append((filename, f"{job.school.name} — {class_name}", subtitle, day_labels, weekends, students))
+    return payloads
+
+
+def _rendered(payloads, workers):
+    """Yield (filename, bytes) as renders finish; at most 2 × workers in flight."""
+    if workers <= 1 or len(payloads) <= 1:
+        yield from map(register_pdf.render, payloads)
+        return
+    # Forked workers must not share this process's database connections.
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        queued, running = iter(payloads), set()
+        while True:
+            for payload in queued:
+                running.add(pool.submit(register_pdf.render, payload))
+                if len(running) >= 2 * workers:
+                    break
+            if not running:
+                return
+            finished, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                yield future.result()
+
+
+def build_job(job, workers=WORKERS):
+    """Render `job`'s registers into a ZIP attached to it. Marks the job DONE or FAILED."""
+    try:
+        payloads = pdf_payloads(job)
+        RegisterJob.objects.filter(pk=job.pk).update(total=len(payloads), done=0)
+        with tempfile.TemporaryFile() as stream:
+            # PDFs are already compressed; storing them keeps the ZIP cheap to write.
+            with zipfile.ZipFile(stream, "w", zipfile.ZIP_STORED) as archive_file:
+                for done, (filename, pdf) in enumerate(_rendered(payloads, workers), start=1):
+                    archive_file.writestr(filename, pdf)
+                    RegisterJob.objects.filter(pk=job.pk).update(done=done)
+            stream.seek(0)
+            scope = slugify(job.class_program.name) if job.class_program else "all-classes"
+            job.file.save(f"registers-{job.month:%Y-%m}-{scope}.zip", File(stream), save=False)
+        job.total = job.done = len(payloads)
+        job.status, job.finished_at = RegisterJob.Status.DONE, timezone.now()
+        job.save(update_fields=["file", "total", "done", "status", "error", "finished_at"])
+    except Exception as e:
+        logger.exception("Register job %s failed", job.pk)
+        job.status, job.error, job.finished_at = RegisterJob.Status.FAILED, str(e), timezone.now()
+        # Progress was written row by row above; keep it rather than this instance's stale counts.
+        job.save(update_fields=["status", "error", "finished_at"])
+        job.refresh_from_db(fields=["total", "done"])
+    return job
+
+
+def claim_job():
+    """Take the oldest pending (or orphaned) job and mark it RUNNING, or None."""
+    now = timezone.now()
+    with transaction.atomic():
+        due = RegisterJob.objects.filter(
+            Q(status=RegisterJob.Status.PENDING)
+            | Q(status=RegisterJob.Status.RUNNING, started_at__lt=now - STALE_AFTER)
+        )
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        job = due.select_related("school", "class_program").order_by("created_at", "id").first()
+        if job is not None:
+            job.status, job.started_at = RegisterJob.Status.RUNNING, now
+            job.save(update_fields=["status", "started_at"])
+    return job
+
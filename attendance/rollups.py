@@ -0,0 +1,138 @@
+"""
+Daily attendance rollups (AttendanceDailySummary).
+
+Every write adjusts the affected (school, class, date, session) row with
+F() deltas, so analytics read a handful of pre-counted rows per day instead
+of counting Attendance. `rebuild()` recomputes a range from scratch, live
+and archived rows alike, and backs the `rebuild_attendance_summary` command.
+"""
+from collections import Counter, defaultdict
+from itertools import chain
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import live
+from .models import ArchivedAttendance, Attendance, AttendanceDailySummary
+
+STATUS_FIELDS = {
+    Attendance.Status.PRESENT: "present",
+    Attendance.Status.ABSENT: "absent",
+    Attendance.Status.LATE: "late",
+    Attendance.Status.HALF_DAY: "half_day",
+}
+COUNT_FIELDS = list(STATUS_FIELDS.values())
+
+
+def row_key(attendance):
+    return (attendance.school_id, attendance.class_program_id, attendance.date, attendance.session_id)
+
+
+def new_deltas():
+    """{(school_id, class_program_id, date, session_id): Counter(field -> delta)}"""
+    return defaultdict(Counter)
+
+
+def add(deltas, key, status, n):
+    field = STATUS_FIELDS.get(status)
+    if field and key is not None:
+        deltas[key][field] += n
+
+
+def change_deltas(changes):
+    """Deltas for a batch of AttendanceChange (rows keep their key; only status moved)."""
+    deltas = new_deltas()
+    for change in changes:
+        key = row_key(change.attendance)
+        add(deltas, key, change.attendance.status, 1)
+        if not change.created:
+            add(deltas, key, change.old_status, -1)
+    return deltas
+
+
+def apply(deltas):
+    """One UPDATE per touched summary row, inserting the row the first time."""
+    with transaction.atomic():
+        for (school_id, class_program_id, day, session_id), counts in deltas.items():
+            counts = {field: n for field, n in counts.items() if n}
+            if not counts:
+                continue
+            rows = AttendanceDailySummary.objects.filter(
+                school_id=school_id, class_program_id=class_program_id, date=day, session_id=session_id,
+            )
+            bump = {field: F(field) + n for field, n in counts.items()}
+            if rows.update(**bump):
+                continue
+            try:
+                with transaction.atomic():
+                    # A missing row with a negative delta predates the rollup;
+                    # rebuild() fills those in.
+                    AttendanceDailySummary.objects.create(
+                        school_id=school_id, class_program_id=class_program_id, date=day,
+                        session_id=session_id, **{field: max(n, 0) for field, n in counts.items()},
+                    )
+            except IntegrityError:
+                rows.update(**bump)  # inserted concurrently
+
+    today = timezone.localdate()
+    changed = {school_id for school_id, _, day, _ in deltas if day == today}
+    if changed:
+        transaction.on_commit(lambda: live.board.changed(changed))
+
+
+def rebuild(school=None, start=None, end=None, batch_size=1000):
+    """Recompute summary rows (optionally for one school / date range). Returns rows written."""
+    scope = {}
+    if school is not None:
+        scope["school"] = school
+    if start is not None:
+        scope["date__gte"] = start
+    if end is not None:
+        scope["date__lte"] = end
+
+    counts = {
+        field: Count("id", filter=Q(status=status)) for status, field in STATUS_FIELDS.items()
+    }
+    # Closed years live in the archive; a day is only ever in one of the two tables.
+    grouped = [
+        model.objects.filter(**scope)
+        .values("school_id", "class_program_id", "date", "session_id")
+        .annotate(**counts)
+        .order_by()
+        for model in (Attendance, ArchivedAttendance)
+    ]
+    written, batch = 0, []
+    with transaction.atomic():
+        AttendanceDailySummary.objects.filter(**scope).delete()
+        for row in chain.from_iterable(rows.iterator() for rows in grouped):
+            batch.append(AttendanceDailySummary(**row))
+            if len(batch) >= batch_size:
+                AttendanceDailySummary.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        AttendanceDailySummary.objects.bulk_create(batch)
+        written += len(batch)
+    return written
+
+
+# ----------------------
+#  READING
+# ----------------------
+SUMS = {field: Coalesce(Sum(field), 0) for field in COUNT_FIELDS}
+
+
+def totals(summaries):
+    """Per-status totals (plus "total") over a filtered AttendanceDailySummary queryset."""
+    result = summaries.aggregate(**SUMS)
+    result["total"] = sum(result[field] for field in COUNT_FIELDS)
+    return result
+
+
+def by_date(summaries):
+    """Per-status counts per date, in date order: one grouped range scan."""
+    days = list(summaries.values("date").annotate(**SUMS).order_by("date"))
+    for day in days:
+        day["total"] = sum(day[field] for field in COUNT_FIELDS)
+    return days
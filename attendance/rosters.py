@@ -0,0 +1,53 @@
+"""
+Versioned class rosters (RosterSnapshot).
+
+Enrolment changes only bump a counter (see the Student signals in
+attendance.signals). Readers get the stored list, rebuilt at most once per
+version, and the roster API turns the version into an ETag so an unchanged
+roster costs a 304.
+"""
+from django.db.models import F
+from django.utils import timezone
+
+from students.models import Student
+
+from .models import RosterSnapshot
+
+
+def bump(class_program_ids):
+    """Invalidate the rosters of these classes (None entries ignored)."""
+    ids = {pk for pk in class_program_ids if pk}
+    if ids:
+        RosterSnapshot.objects.filter(class_program_id__in=ids).update(version=F("version") + 1)
+
+
+def version(class_program):
+    """Current roster version, creating the snapshot row on first use."""
+    snapshot, _ = RosterSnapshot.objects.get_or_create(
+        class_program=class_program, defaults={"school_id": class_program.school_id},
+    )
+    return snapshot.version
+
+
+def current(class_program):
+    """The class's RosterSnapshot, rebuilt first if enrolment changed since it was built."""
+    snapshot, _ = RosterSnapshot.objects.get_or_create(
+        class_program=class_program, defaults={"school_id": class_program.school_id},
+    )
+    if snapshot.built_version == snapshot.version:
+        return snapshot
+
+    # Read the version before the students: a bump landing in between leaves
+    # built_version behind, so the next reader rebuilds again.
+    built_version = snapshot.version
+    snapshot.students = [
+        [pk, name] for pk, name in
+        Student.objects.filter(class_program=class_program, school_id=class_program.school_id)
+        .order_by("full_name").values_list("id", "full_name")
+    ]
+    snapshot.built_version = built_version
+    snapshot.built_at = timezone.now()
+    RosterSnapshot.objects.filter(pk=snapshot.pk, built_version__lt=built_version).update(
+        students=snapshot.students, built_version=built_version, built_at=snapshot.built_at,
+    )
+    return snapshot
@@ -0,0 +1,209 @@
+"""
+Set-based attendance writes.
+
+Marking a whole class used to cost a get_or_create, a save (plus its signal)
+and a log insert per student. `apply_marks` reads the affected rows once,
+upserts everything in one statement, writes every AttendanceLog row in one
+insert and hands the changed rows to notification handling as one batch, in
+the same transaction. `bulk_mark` is the one-class case; offline sync
+(attendance.sync) sends marks for many classes at once.
+"""
+from dataclasses import dataclass, field
+from datetime import date as date_cls, datetime
+from typing import Optional
+
+from django.db import transaction
+from django.utils import timezone
+
+from students.models import Student
+
+from .models import Attendance, AttendanceLog
+from . import archive, bitmaps, rollups, streaks
+from .signals import AttendanceChange, process_attendance_changes
+
+NATURAL_KEY = ["student", "class_program", "date", "session"]
+
+
+@dataclass
+class Mark:
+    student_id: int
+    class_program_id: int
+    date: date_cls
+    session_id: Optional[int]
+    status: str
+    client_marked_at: Optional[datetime] = None  # offline marks only
+
+    @property
+    def key(self):
+        return (self.student_id, self.class_program_id, self.date, self.session_id)
+
+
+def row_key(row):
+    return (row.student_id, row.class_program_id, row.date, row.session_id)
+
+
+@dataclass
+class BulkMarkResult:
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    changes: list = field(default_factory=list)  # AttendanceChange per created/updated row
+
+
+def lock_students(student_ids):
+    """
+    Lock the students' rows. Every attendance writer takes this before reading
+    the rows it will write, so two writers for the same students queue here
+    and the second reads the first's inserts.
+    """
+    list(
+        Student.objects.select_for_update(no_key=True)
+        .filter(pk__in=set(student_ids)).order_by("pk").values_list("pk", flat=True)
+    )
+
+
+def lock_existing(marks):
+    """
+    Existing rows for `marks`, locked for update, keyed by natural key. With
+    the students locked first, a key missing here stays missing until the
+    transaction ends, so it is a create.
+    """
+    keys = {mark.key for mark in marks}
+    lock_students(key[0] for key in keys)
+    rows = Attendance.objects.select_for_update().filter(
+        student_id__in={key[0] for key in keys},
+        class_program_id__in={key[1] for key in keys},
+        date__in={key[2] for key in keys},
+    )
+    return {row_key(row): row for row in rows if row_key(row) in keys}
+
+
+def bulk_mark(*, school, class_program, date, session, statuses, marked_by=None, remarks=None,
+              note=None, notify=True):
+    """
+    Write attendance for one class/date/session.
+
+    `statuses` maps student id -> status. Rows whose status is unchanged are
+    left alone. Returns a BulkMarkResult.
+    """
+    # Forms pass the session as a raw id; other callers pass the instance.
+    session_id = getattr(session, "pk", session)
+    session_id = int(session_id) if session_id not in (None, "") else None
+    marks = [
+        Mark(student_id, class_program.pk, date, session_id, status)
+        for student_id, status in statuses.items()
+    ]
+    return apply_marks(
+        school=school, marks=marks, marked_by=marked_by, remarks=remarks, note=note, notify=notify,
+    )
+
+
+def _log_note(note, mark):
+    if mark is None or mark.client_marked_at is None:
+        return note
+    offline = f"Marked offline at {timezone.localtime(mark.client_marked_at):%Y-%m-%d %H:%M:%S}"
+    return f"{note}: {offline}" if note else offline
+
+
+def apply_marks(*, school, marks, marked_by=None, remarks=None, note=None, notify=True, existing=None):
+    """
+    Write a batch of Marks, any mix of classes, dates and sessions.
+
+    `existing` is lock_existing(marks) when the caller already read it in the
+    same transaction. Returns a BulkMarkResult.
+    """
+    if not marks:
+        return BulkMarkResult()
+
+    archive.ensure_open(school.pk, {mark.date for mark in marks})
+    now = timezone.now()
+    with transaction.atomic():
+        if existing is None:
+            existing = lock_existing(marks)
+
+        result = BulkMarkResult()
+        by_key = {}
+        to_create, to_update = [], []
+        for mark in marks:
+            by_key[mark.key] = mark
+            row = existing.get(mark.key)
+            if row is None:
+                to_create.append(Attendance(
+                    school=school, student_id=mark.student_id, class_program_id=mark.class_program_id,
+                    date=mark.date, session_id=mark.session_id, status=mark.status, remarks=remarks,
+                    marked_by=marked_by, client_marked_at=mark.client_marked_at,
+                    offline_created=mark.client_marked_at is not None,
+                ))
+            elif row.status != mark.status:
+                result.changes.append(AttendanceChange(row, old_status=row.status))
+                row.status = mark.status
+                row.marked_by = marked_by
+                row.client_marked_at = mark.client_marked_at
+                row.updated_at = now  # bulk writes skip auto_now on update
+                to_update.append(row)
+            else:
+                result.unchanged += 1
+
+        update_fields = ["status", "marked_by", "updated_at", "client_marked_at"]
+        # One upsert on the natural key. Created vs updated was decided from
+        # the locked read above, not from the upsert, which can't say which
+        # rows it inserted; its conflict path only catches writes that skip
+        # lock_students (admin, shell). Updated rows go in without their pk so
+        # the conflict is on the natural key, not the primary key.
+        upserts = [row for row in to_create if row.session_id is not None] + [
+            Attendance(
+                school=school, student_id=row.student_id, class_program_id=row.class_program_id,
+                date=row.date, session_id=row.session_id, status=row.status, marked_by=marked_by,
+                client_marked_at=row.client_marked_at,
+            )
+            for row in to_update if row.session_id is not None
+        ]
+        if upserts:
+            Attendance.objects.bulk_create(
+                upserts, update_conflicts=True, unique_fields=NATURAL_KEY, update_fields=update_fields,
+            )
+        # NULLs never conflict in a unique index, so session-less marks can't
+        # upsert; the select_for_update read covers them instead.
+        Attendance.objects.bulk_create([row for row in to_create if row.session_id is None])
+        Attendance.objects.bulk_update([row for row in to_update if row.session_id is None], update_fields)
+
+        if to_create and any(row.pk is None for row in to_create):
+            # Backends that cannot return ids from a bulk insert
+            ids = {
+                row_key(row): row.pk
+                for row in Attendance.objects.filter(
+                    student_id__in={row.student_id for row in to_create},
+                    class_program_id__in={row.class_program_id for row in to_create},
+                    date__in={row.date for row in to_create},
+                ).only("id", "student_id", "class_program_id", "date", "session_id")
+            }
+            for row in to_create:
+                row.pk = ids.get(row_key(row))
+
+        result.changes = [AttendanceChange(row, created=True) for row in to_create] + result.changes
+        result.created = len(to_create)
+        result.updated = len(to_update)
+
+        AttendanceLog.objects.bulk_create([
+            AttendanceLog(
+                school=school,
+                attendance_id=change.attendance.pk,
+                previous_status=change.old_status,
+                new_status=change.attendance.status,
+                changed_by=marked_by,
+                note=_log_note(note, by_key.get(row_key(change.attendance))),
+            )
+            for change in result.changes
+        ])
+
+        rollups.apply(rollups.change_deltas(result.changes))
+        days = [(change.attendance.student_id, school.pk, change.attendance.date) for change in result.changes]
+        streaks.record_days(days)
+        bitmaps.record_days(days)
+
+        if notify:
+            # Only writes announcements and outbox rows, so it belongs in this
+            # transaction; the drain_outbox worker does the slow deliveries.
+            process_attendance_changes(result.changes)
+
+    return result
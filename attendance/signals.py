@@ -1,218 +1,284 @@
 # attendance/signals.py
 
+from dataclasses import dataclass
+import hashlib
 from datetime import timedelta
+from typing import Optional
 import logging
-import requests
+import uuid
 
 from django.conf import settings
-from django.core.mail import send_mail
-from django.db.models.signals import pre_save, post_save
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
 from django.utils.formats import date_format
 
-from .models import Attendance
-from notifications.models import Announcement
-from schools.models import School
+from .models import Attendance, AttendanceStreak
+from . import archive, bitmaps, rollups, rosters, streaks
+from notifications.models import OutboxMessage, StudentAlert
+from notifications.outbox import enqueue_digests, enqueue_many, message as outbox_message
+from students.models import Student
 
 logger = logging.getLogger(__name__)
 
 # Config (override in settings.py if needed)
 SINGLE_TTL   = getattr(settings, 'ATTENDANCE_SINGLE_TTL', 1)   # days for single-event alerts
 CONSEC_TTL   = getattr(settings, 'ATTENDANCE_CONSECUTIVE_TTL', 3)  # days for consecutive alerts
-
-def send_sms(phone_number: str, message: str):
-    """Stub SMS sender. Replace with your provider (AfroMessages, Twilio, etc.)."""
-    try:
-        logger.debug(f"[SMS] to {phone_number}: {message}")
-    except Exception:
-        logger.exception("Failed to send SMS to %s", phone_number)
+# Minutes to gather a parent's alerts into one message per channel; 0 sends each on its own.
+DIGEST_MINUTES = getattr(settings, 'ATTENDANCE_DIGEST_MINUTES', 0)
 
 @receiver(pre_save, sender=Attendance)
 def _cache_old_status(sender, instance, **kwargs):
     """Cache previous status so we can detect real changes on save."""
+    archive.ensure_open(instance.school_id, [instance.date])
+    old = None
     if instance.pk:
-        try:
-            instance._old_status = Attendance.objects.values_list("status", flat=True).get(pk=instance.pk)
-        except Attendance.DoesNotExist:
-            instance._old_status = None
-    else:
-        instance._old_status = None
+        old = (
+            Attendance.objects.filter(pk=instance.pk)
+            .values_list("status", "school_id", "class_program_id", "date", "session_id")
+            .first()
+        )
+    instance._old_status = old[0] if old else None
+    instance._old_rollup_key = old[1:] if old else None
+    if instance._old_status is not None and instance._old_status != instance.status:
+        # A server-side edit: last-writer-wins should now use updated_at.
+        instance.client_marked_at = None
+
+@dataclass
+class AttendanceChange:
+    """One created or re-marked attendance row, as handed to notification handling."""
+    attendance: Attendance
+    old_status: Optional[str] = None
+    created: bool = False
+
 
 @receiver(post_save, sender=Attendance)
 def handle_attendance_notifications(sender, instance, created, **kwargs):
+    """Single-row saves (edit view, admin) go through the same batch path as bulk marking."""
+    days = [(instance.student_id, instance.school_id, instance.date)]
+    old_key = getattr(instance, "_old_rollup_key", None)
+    if old_key and old_key[2] != instance.date:
+        days.append((instance.student_id, instance.school_id, old_key[2]))
+    streaks.record_days(days)
+    process_attendance_changes([
+        AttendanceChange(instance, getattr(instance, "_old_status", None), created)
+    ])
+
+
+def alert_key(student_id, kind, day, detail=""):
+    """StudentAlert.dedupe_key: one alert per (student, kind, date[, detail])."""
+    return hashlib.sha256(f"{student_id}:{kind}:{day.isoformat()}:{detail}".encode()).hexdigest()
+
+
+def process_attendance_changes(changes):
     """
     - Single-event alerts: ABSENT, LATE, HALF_DAY (personalized per parent).
     - Correction alerts when status changes (old_status != new_status).
     - Consecutive-absence alerts (2+ ABSENT in a row).
-    - 24h dedupe by announcement title.
-    - Immediate EMAIL, SMS, Telegram, and in-app Announcement.
+    - One StudentAlert per (student, kind, date), deduped by its unique
+      hashed key; external messages go out only for alerts this batch
+      inserted.
+    - EMAIL, SMS and Telegram queued in the outbox (delivered by
+      `manage.py drain_outbox`).
+    - With ATTENDANCE_DIGEST_MINUTES set, external alerts other than
+      consecutive-absence escalations become one line each in a per-parent,
+      per-channel digest sent when the window closes.
+
+    Students, parents and absence streaks are loaded once for the whole batch.
     """
-    old_status = getattr(instance, "_old_status", None)
-    new_status = instance.status
+    if not changes:
+        return
+    now = timezone.now()
 
-    student   = instance.student
-    school    = instance.class_program.school
-    actor     = instance.marked_by
-    now       = timezone.now()
-    when_str  = date_format(instance.date, "DATE_FORMAT")
+    student_ids = {c.attendance.student_id for c in changes}
+    students = {
+        s.id: s for s in Student.objects.filter(id__in=student_ids).select_related("school").prefetch_related("parents__user")
+    }
+    # Precomputed by attendance.streaks, which the write path updates first.
+    absent_streaks = dict(
+        AttendanceStreak.objects.filter(
+            student_id__in={c.attendance.student_id for c in changes if c.attendance.status == "ABSENT"}
+        ).values_list("student_id", "current_absent_streak")
+    )
+    alerts = {}  # dedupe_key -> unsaved StudentAlert
+    for change in changes:
+        student = students.get(change.attendance.student_id)
+        if student is not None:
+            for alert in _alerts_for(change, student, absent_streaks.get(student.id, 0), now):
+                alerts.setdefault(alert.dedupe_key, alert)
+    if not alerts:
+        return
 
-    parent_email = getattr(student, "parent_email", None)
-    parent_phone = getattr(student, "parent_phone", None)
+    # Insert-or-ignore, then read back which keys this batch inserted: only
+    # those are delivered, even when a concurrent batch wrote a key first.
+    batch = uuid.uuid4()
+    for alert in alerts.values():
+        alert.batch = batch
+    StudentAlert.objects.bulk_create(alerts.values(), ignore_conflicts=True)
+    inserted = set(
+        StudentAlert.objects.filter(dedupe_key__in=alerts, batch=batch).values_list("dedupe_key", flat=True)
+    )
+
+    outbox, digests = [], []
+    for key, alert in alerts.items():
+        if key in inserted:
+            _queue_alert(alert, students[alert.student_id], now, outbox, digests)
+
+    # External deliveries go through the outbox, committed with the attendance rows.
+    enqueue_many(outbox)
+    if digests:
+        enqueue_digests(digests)
 
-    # Pull parent chat IDs safely (no formatting issues in Telegram)
-    telegram_chat_ids = student.parents.filter(
-        telegram_chat_id__isnull=False
-    ).values_list("telegram_chat_id", flat=True).distinct()
-
-    def make_announcement(title, message, ttl_days, priority, channels):
-        try:
-            Announcement.objects.create(
-                school=school,
-                title=title,
-                category="ATTENDANCE",
-                message=message,
-                target="PARENTS",
-                created_by=actor,
-                publish_at=now,
-                expires_at=now + timedelta(days=ttl_days),
-                pinned=False,
-                priority=priority,
-                delivery_channels=channels,
-            )
-        except Exception:
-            logger.exception("Failed to create Announcement: %s", title)
-
-    def already_sent(title: str) -> bool:
-        """Dedupe by announcement title within the last 24h."""
-        window = now - timedelta(hours=24)
-        return Announcement.objects.filter(
-            school=school,
-            created_by=actor,
-            title=title,
-            publish_at__gte=window,
-        ).exists()
 
+def _alerts_for(change, student, consec, now):
+    """The StudentAlerts one attendance change calls for (unsaved)."""
+    instance = change.attendance
+    old_status = change.old_status
+    new_status = instance.status
+    when_str = date_format(instance.date, "DATE_FORMAT")
+
+    def alert(kind, message, line, ttl_days, priority, detail=""):
+        made = StudentAlert(
+            school_id=instance.school_id, student_id=student.id, kind=kind, date=instance.date,
+            message=message, priority=priority, expires_at=now + timedelta(days=ttl_days),
+            dedupe_key=alert_key(student.id, kind, instance.date, detail),
+        )
+        made.line = line  # one-line form for digests
+        made.source = f"attendance:{instance.pk}"
+        return made
+
+    alerts = []
     # ――― Correction/update alert (e.g., ABSENT → PRESENT) ―――
-    if not created and old_status is not None and old_status != new_status:
-        title = f"{student.full_name} attendance updated"
-        msg = (
-            f"Dear Parent,\n\n"
+    if not change.created and old_status is not None and old_status != new_status:
+        alerts.append(alert(
+            StudentAlert.CORRECTED,
             f"{student.full_name}'s attendance status for {when_str} "
-            f"was updated from {old_status.lower()} to {new_status.lower()}.\n\n"
-            "Please note this correction."
-        )
-        # Send to Telegram (all parents), Email, and SMS
-        for chat_id in telegram_chat_ids:
-            send_telegram_message(school, chat_id, msg)
-        if parent_email:
-            try:
-                send_mail(title, msg, settings.DEFAULT_FROM_EMAIL, [parent_email], fail_silently=False)
-            except Exception:
-                logger.exception("Failed send_mail to %s", parent_email)
-        if parent_phone:
-            send_sms(parent_phone, msg)
-
-        # In-app announcement (no dedupe necessary for corrections)
-        make_announcement(title, msg, SINGLE_TTL, "IMPORTANT", ["DASH"])
+            f"was updated from {old_status.lower()} to {new_status.lower()}.",
+            f"{student.full_name}, {when_str}: updated from {old_status.lower()} to {new_status.lower()}.",
+            SINGLE_TTL, "IMPORTANT", detail=f"{old_status}>{new_status}",
+        ))
 
     # ――― Single-event alerts: ABSENT, LATE, HALF_DAY ―――
     if new_status in ("ABSENT", "LATE", "HALF_DAY"):
-        title = f"{student.full_name} marked {new_status.lower().capitalize()}"
-        if not already_sent(title):
-            prio = "INFO" if new_status == "HALF_DAY" else "IMPORTANT"
-            # Personalized per parent
-            for parent in student.parents.all():
-                parent_name = parent.user.get_full_name()
-                msg = (
-                    f"Dear Parent {parent_name},\n\n"
-                    f"{student.full_name} was marked {new_status.lower()} on {when_str}.\n\n"
-                    "Please contact the school if you have any questions."
-                )
-                channels = ["DASH"]
-                if parent_email: channels.append("EMAIL")
-                if parent_phone: channels.append("SMS")
-
-                make_announcement(title, msg, SINGLE_TTL, prio, channels)
-
-                if getattr(parent, "telegram_chat_id", None):
-                    send_telegram_message(school, parent.telegram_chat_id, msg)
-                if parent_email:
-                    try:
-                        send_mail(title, msg, settings.DEFAULT_FROM_EMAIL, [parent_email], fail_silently=False)
-                    except Exception:
-                        logger.exception("Failed send_mail to %s", parent_email)
-                if parent_phone:
-                    send_sms(parent_phone, msg)
+        alerts.append(alert(
+            new_status,
+            f"{student.full_name} was marked {new_status.lower()} on {when_str}.",
+            f"{student.full_name}, {when_str}: marked {new_status.lower().replace('_', ' ')}.",
+            SINGLE_TTL, "INFO" if new_status == "HALF_DAY" else "IMPORTANT",
+        ))
 
     # ――― Consecutive-absence escalation (2+ days ABSENT) ―――
-    if new_status == "ABSENT":
-        logs = Attendance.objects.filter(student=student).order_by("-date", "-id")
-        consec = 0
-        for log in logs:
-            if log.status == "ABSENT":
-                consec += 1
-            else:
-                break
-
-        if consec > 1:
-            title = f"{student.full_name} absent {consec} days"
-            if not already_sent(title):
-                msg = (
-                    f"Dear Parent,\n\n"
-                    f"{student.full_name} has now been absent {consec} consecutive days "
-                    f"(last on {when_str}).\n\n"
-                    "Please reach out to the school if your child will not return."
-                )
-                channels = ["DASH"]
-                if parent_email: channels.append("EMAIL")
-                if parent_phone: channels.append("SMS")
-
-                make_announcement(title, msg, CONSEC_TTL, "URGENT", channels)
-
-                for chat_id in telegram_chat_ids:
-                    send_telegram_message(school, chat_id, msg)
-                if parent_email:
-                    try:
-                        send_mail(title, msg, settings.DEFAULT_FROM_EMAIL, [parent_email], fail_silently=False)
-                    except Exception:
-                        logger.exception("Failed send_mail for consecutive alert to %s", parent_email)
-                if parent_phone:
-                    send_sms(parent_phone, msg)
+    if new_status == "ABSENT" and consec > 1:
+        alerts.append(alert(
+            StudentAlert.CONSECUTIVE_ABSENCE,
+            f"{student.full_name} has now been absent {consec} consecutive days (last on {when_str}).",
+            None, CONSEC_TTL, "URGENT",
+        ))
 
     logger.debug(
         "AttendanceSignal | %s | %s → %s | consec=%s",
         student.full_name,
         old_status,
         new_status,
-        locals().get("consec", 0),
+        consec,
     )
+    return alerts
 
-def send_telegram_message(school: School, chat_id: str, message: str):
-    """Send a Telegram message to a specific chat_id using the school's bot token.
-    Uses plain text (no parse_mode) to avoid Markdown/HTML parsing errors.
-    """
-    token = school.telegram_bot_token
-    if not token:
-        logger.warning(
-            f"School '{school.name}' is missing a Telegram Bot Token. Message not sent to {chat_id}."
-        )
+
+def _queue_alert(alert, student, now, outbox, digests):
+    """Queue one new alert to the student's parents on every channel they have."""
+    school = student.school
+    parent_email = getattr(student, "parent_email", None)
+    parent_phone = getattr(student, "parent_phone", None)
+    parents = list(student.parents.all())
+    title = f"{student.full_name}: {alert.get_kind_display().lower()}"
+
+    def queue(channel, recipient, body, subject=""):
+        # Escalations (no digest line) always go out on their own, at once.
+        if DIGEST_MINUTES and alert.line:
+            digests.append(outbox_message(
+                school, channel, recipient, f"• {alert.line}",
+                subject=f"Attendance updates from {school.name}", source="attendance:digest",
+                deliver_after=now + timedelta(minutes=DIGEST_MINUTES),
+                digest_key=f"attendance:{school.id}:{channel}:{recipient}",
+            ))
+            return
+        outbox.append(outbox_message(school, channel, recipient, body, subject=subject, source=alert.source))
+
+    if alert.kind in (StudentAlert.ABSENT, StudentAlert.LATE, StudentAlert.HALF_DAY):
+        # Personalized per parent
+        for parent in parents:
+            msg = (
+                f"Dear Parent {parent.user.get_full_name()},\n\n{alert.message}\n\n"
+                "Please contact the school if you have any questions."
+            )
+            if parent.telegram_chat_id:
+                queue(OutboxMessage.TELEGRAM, parent.telegram_chat_id, msg)
+            if parent_email:
+                queue(OutboxMessage.EMAIL, parent_email, msg, title)
+            if parent_phone:
+                queue(OutboxMessage.SMS, parent_phone, msg)
         return
 
-    TELEGRAM_API_URL = f"https://api.telegram.org/bot{token}/sendMessage"
-    try:
-        # Avoid parse_mode entirely to prevent "can't parse entities" errors.
-        response = requests.post(
-            TELEGRAM_API_URL,
-            json={"chat_id": chat_id, "text": message},
-            timeout=5,
+    closing = (
+        "Please note this correction." if alert.kind == StudentAlert.CORRECTED
+        else "Please reach out to the school if your child will not return."
+    )
+    msg = f"Dear Parent,\n\n{alert.message}\n\n{closing}"
+    for chat_id in {p.telegram_chat_id for p in parents if p.telegram_chat_id}:
+        queue(OutboxMessage.TELEGRAM, chat_id, msg)
+    if parent_email:
+        queue(OutboxMessage.EMAIL, parent_email, msg, title)
+    if parent_phone:
+        queue(OutboxMessage.SMS, parent_phone, msg)
+
+
+@receiver(post_save, sender=Attendance)
+def update_daily_summary(sender, instance, created, **kwargs):
+    deltas = rollups.new_deltas()
+    rollups.add(deltas, getattr(instance, "_old_rollup_key", None), getattr(instance, "_old_status", None), -1)
+    rollups.add(deltas, rollups.row_key(instance), instance.status, 1)
+    rollups.apply(deltas)
+
+
+@receiver(post_save, sender=Attendance)
+def update_bitmap(sender, instance, created, **kwargs):
+    days = [(instance.student_id, instance.school_id, instance.date)]
+    old_key = getattr(instance, "_old_rollup_key", None)
+    if old_key and old_key[2] != instance.date:
+        days.append((instance.student_id, instance.school_id, old_key[2]))
+    bitmaps.record_days(days)
+
+
+@receiver(post_delete, sender=Attendance)
+def correct_rollups_on_delete(sender, instance, **kwargs):
+    deltas = rollups.new_deltas()
+    rollups.add(deltas, rollups.row_key(instance), instance.status, -1)
+    rollups.apply(deltas)
+    streaks.rebuild(student_ids=[instance.student_id])
+    bitmaps.record_days([(instance.student_id, instance.school_id, instance.date)])
+
+
+# ----------------------
+#  ROSTER VERSIONS
+# ----------------------
+@receiver(pre_save, sender=Student)
+def _cache_old_enrolment(sender, instance, **kwargs):
+    instance._old_enrolment = None
+    if instance.pk:
+        instance._old_enrolment = (
+            Student.objects.filter(pk=instance.pk).values_list("class_program_id", "full_name").first()
         )
-        if response.status_code != 200:
-            logger.error(
-                f"Failed to send Telegram message to {chat_id} (School: {school.name}). "
-                f"Status: {response.status_code}, Response: {response.text}"
-            )
-        else:
-            logger.debug(f"[TELEGRAM] Message sent to {chat_id} (School: {school.name}).")
-    except requests.exceptions.RequestException:
-        logger.exception("Failed to send Telegram message due to network error.")
+
+
+@receiver(post_save, sender=Student)
+def bump_roster_on_enrolment_change(sender, instance, created, **kwargs):
+    old = getattr(instance, "_old_enrolment", None)
+    if created or old != (instance.class_program_id, instance.full_name):
+        rosters.bump([instance.class_program_id, old[0] if old else None])
+
+
+@receiver(post_delete, sender=Student)
+def bump_roster_on_student_delete(sender, instance, **kwargs):
+    rosters.bump([instance.class_program_id])
+
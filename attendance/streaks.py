@@ -0,0 +1,152 @@
+"""
+Incremental absence streaks (AttendanceStreak).
+
+Marking a day at or after a student's latest recorded day is O(1): one
+grouped read of that day's rows plus the student's streak row, which keeps
+the current and longest streaks as they stood before its latest day so
+that day can be re-marked. Editing an older day rebuilds just that student
+from history, archived years included. `rebuild()` also backs the `rebuild_attendance_streaks` command.
+"""
+from collections import defaultdict
+from itertools import groupby
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import ArchivedAttendance, Attendance, AttendanceStreak
+
+
+def _absent_days(pairs):
+    """{(student_id, date): bool} for the given pairs, from one grouped query."""
+    student_ids = {student_id for student_id, _ in pairs}
+    dates = {day for _, day in pairs}
+    rows = (
+        Attendance.objects
+        .filter(student_id__in=student_ids, date__in=dates)
+        .values("student_id", "date")
+        .annotate(total=Count("id"), absent=Count("id", filter=Q(status="ABSENT")))
+        .order_by()
+    )
+    return {
+        (row["student_id"], row["date"]): row["total"] > 0 and row["absent"] == row["total"]
+        for row in rows
+    }
+
+
+def _advance(state, day, absent):
+    """Fold one day into a streak state; returns False if the day is in the past."""
+    if state.last_date is None or day > state.last_date:
+        state.streak_before_last = state.current_absent_streak
+        state.longest_before_last = state.longest_absent_streak
+        state.current_absent_streak = state.current_absent_streak + 1 if absent else 0
+        state.last_date = day
+    elif day == state.last_date and state.longest_before_last is not None:
+        state.current_absent_streak = state.streak_before_last + 1 if absent else 0
+    else:
+        return False
+    state.longest_absent_streak = max(state.longest_before_last, state.current_absent_streak)
+    return True
+
+
+def record_days(entries):
+    """
+    Update streaks after attendance writes.
+    `entries` is an iterable of (student_id, school_id, date).
+    """
+    schools, days = {}, defaultdict(set)
+    for student_id, school_id, day in entries:
+        schools[student_id] = school_id
+        days[student_id].add(day)
+    if not days:
+        return
+
+    absent = _absent_days({(s, d) for s, ds in days.items() for d in ds})
+    now = timezone.now()
+    with transaction.atomic():
+        states = {
+            state.student_id: state
+            for state in AttendanceStreak.objects.select_for_update().filter(student_id__in=days)
+        }
+        to_create, to_update, to_rebuild = [], [], []
+        for student_id, student_days in days.items():
+            state = states.get(student_id)
+            is_new = state is None
+            if is_new:
+                state = AttendanceStreak(student_id=student_id, school_id=schools[student_id])
+            for day in sorted(student_days):
+                # A day left with no rows (moved or deleted) needs the student's history.
+                day_absent = absent.get((student_id, day))
+                if day_absent is None or not _advance(state, day, day_absent):
+                    to_rebuild.append(student_id)
+                    break
+            else:
+                state.updated_at = now  # bulk_update skips auto_now
+                (to_create if is_new else to_update).append(state)
+
+        AttendanceStreak.objects.bulk_create(to_create, ignore_conflicts=True)
+        AttendanceStreak.objects.bulk_update(
+            to_update,
+            [
+                "last_date", "current_absent_streak", "streak_before_last", "longest_absent_streak",
+                "longest_before_last", "updated_at",
+            ],
+        )
+        if to_rebuild:
+            rebuild(student_ids=to_rebuild)
+
+
+def rebuild(student_ids=None, school=None, batch_size=1000):
+    """
+    Recompute streaks from attendance history, streaming rows in
+    (student, date) order. Returns the number of students written.
+    """
+    scope = {}
+    if student_ids is not None:
+        scope["student_id__in"] = student_ids
+    if school is not None:
+        scope["school"] = school
+    # Closed years live in the archive; a day is only ever in one of the two tables.
+    live, archived = (
+        model.objects.filter(**scope)
+        .values("student_id", "school_id", "date")
+        .annotate(total=Count("id"), absent=Count("id", filter=Q(status="ABSENT")))
+        .order_by()
+        for model in (Attendance, ArchivedAttendance)
+    )
+    rows = live.union(archived, all=True).order_by("student_id", "date")
+
+    written, batch = 0, []
+
+    def flush():
+        fields = [
+            "school", "last_date", "current_absent_streak", "streak_before_last",
+            "longest_absent_streak", "longest_before_last", "updated_at",
+        ]
+        with transaction.atomic():
+            AttendanceStreak.objects.bulk_create(
+                batch, update_conflicts=True, unique_fields=["student"], update_fields=fields,
+            )
+        batch.clear()
+
+    for student_id, student_rows in groupby(rows.iterator(), key=lambda row: row["student_id"]):
+        state = None
+        for row in student_rows:
+            if state is None:
+                state = AttendanceStreak(student_id=student_id, school_id=row["school_id"])
+            _advance(state, row["date"], row["total"] > 0 and row["absent"] == row["total"])
+        batch.append(state)
+        written += 1
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    # Students whose attendance was all deleted
+    if student_ids is not None:
+        seen = set(Attendance.objects.filter(student_id__in=student_ids).values_list("student_id", flat=True))
+        seen |= set(
+            ArchivedAttendance.objects.filter(student_id__in=student_ids).values_list("student_id", flat=True)
+        )
+        AttendanceStreak.objects.filter(student_id__in=set(student_ids) - seen).delete()
+    return written
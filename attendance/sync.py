@@ -0,0 +1,175 @@
+"""
+Batch upload of attendance marked offline.
+
+A device posts (optionally gzip-compressed) JSON:
+
+    {"since": "<server_time from the previous sync, or null>",
+     "classes": [<extra class ids to include in the diff>],
+     "marks": [{"student": 1, "class_program": 2, "date": "2025-03-03",
+                "session": null, "status": "ABSENT",
+                "marked_at": "2025-03-03T08:05:00+03:00"}, ...]}
+
+Conflicts are last-writer-wins on when each side decided the status: the
+device's `marked_at` against the row's effective_marked_at, with the server
+winning ties. Winning marks are written by one apply_marks call and logged
+in AttendanceLog with their device time. The response lists stale and
+rejected marks plus every row in the touched classes changed since `since`,
+as compact arrays.
+"""
+import gzip
+import io
+import json
+from datetime import date
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from classes_app.models import ClassProgram, Session
+from students.models import Student
+
+from . import archive
+from .models import Attendance
+from .services import Mark, apply_marks, lock_existing
+
+MAX_BYTES = getattr(settings, 'ATTENDANCE_SYNC_MAX_BYTES', 5 * 1024 * 1024)  # decompressed
+MAX_MARKS = getattr(settings, 'ATTENDANCE_SYNC_MAX_MARKS', 5000)
+
+CHANGE_FIELDS = ["id", "student_id", "class_program_id", "date", "session_id", "status", "updated_at"]
+
+
+class SyncError(ValueError):
+    pass
+
+
+def decode(body, content_encoding=""):
+    """Parse a request body into the payload dict; raises SyncError."""
+    raw = body
+    if "gzip" in (content_encoding or "").lower():
+        try:
+            with gzip.GzipFile(fileobj=io.BytesIO(body)) as stream:
+                raw = stream.read(MAX_BYTES + 1)
+        except (OSError, EOFError):
+            raise SyncError("Body is not valid gzip.")
+    if len(raw) > MAX_BYTES:
+        raise SyncError(f"Payload larger than {MAX_BYTES} bytes.")
+    try:
+        payload = json.loads(raw)
+    except ValueError:
+        raise SyncError("Body is not valid JSON.")
+    if not isinstance(payload, dict) or not isinstance(payload.get("marks"), list):
+        raise SyncError("Payload must be an object with a 'marks' list.")
+    if len(payload["marks"]) > MAX_MARKS:
+        raise SyncError(f"At most {MAX_MARKS} marks per sync.")
+    return payload
+
+
+def _parse_mark(item, now):
+    session = item.get("session")
+    marked_at = parse_datetime(item["marked_at"])
+    if marked_at is None or item["status"] not in Attendance.Status.values:
+        raise ValueError
+    if timezone.is_naive(marked_at):
+        marked_at = timezone.make_aware(marked_at)
+    return Mark(
+        student_id=int(item["student"]),
+        class_program_id=int(item["class_program"]),
+        date=date.fromisoformat(item["date"]),
+        session_id=int(session) if session not in (None, "") else None,
+        status=item["status"],
+        # A device clock running fast must not win every future conflict.
+        client_marked_at=min(marked_at, now),
+    )
+
+
+def _in_school(school, marks):
+    """Drop marks naming a student, class or session outside `school`."""
+    students = set(
+        Student.objects.filter(school=school, id__in={m.student_id for m in marks}).values_list("id", flat=True)
+    )
+    classes = set(
+        ClassProgram.objects.filter(school=school, id__in={m.class_program_id for m in marks})
+        .values_list("id", flat=True)
+    )
+    sessions = dict(
+        Session.objects.filter(school=school, id__in={m.session_id for m in marks if m.session_id})
+        .values_list("id", "class_program_id")
+    )
+    return lambda m: (
+        m.student_id in students
+        and m.class_program_id in classes
+        and (m.session_id is None or sessions.get(m.session_id) == m.class_program_id)
+    )
+
+
+def sync(*, school, user, payload):
+    now = timezone.now()
+    rejected = []  # [index, reason]
+    latest = {}  # natural key -> (index, Mark); the device's own newest mark wins
+    for index, item in enumerate(payload["marks"]):
+        try:
+            mark = _parse_mark(item, now)
+        except (AttributeError, KeyError, TypeError, ValueError):
+            rejected.append([index, "invalid"])
+            continue
+        previous = latest.get(mark.key)
+        if previous is None or (mark.client_marked_at, mark.status) > (
+            previous[1].client_marked_at, previous[1].status
+        ):
+            latest[mark.key] = (index, mark)
+
+    candidates = list(latest.values())
+    allowed = _in_school(school, [mark for _, mark in candidates]) if candidates else None
+    closed = archive.closed_among(school.pk, {mark.date for _, mark in candidates})
+    stale = []  # [index, attendance id, server status, server time]
+    with transaction.atomic():
+        existing = lock_existing([mark for _, mark in candidates])
+        winners = []
+        for index, mark in candidates:
+            if not allowed(mark):
+                rejected.append([index, "not_found"])
+                continue
+            if archive.academic_year(mark.date) in closed:
+                rejected.append([index, "closed_year"])
+                continue
+            row = existing.get(mark.key)
+            if row is not None and row.status != mark.status and mark.client_marked_at <= row.effective_marked_at:
+                stale.append([index, row.pk, row.status, row.effective_marked_at.isoformat()])
+                continue
+            winners.append(mark)
+        result = apply_marks(
+            school=school, marks=winners, marked_by=user, note="Offline sync", existing=existing,
+        )
+
+    # Diff: what else changed in these classes since the device last synced.
+    class_ids = {mark.class_program_id for _, mark in candidates}
+    class_ids.update(int(c) for c in payload.get("classes") or [] if str(c).isdigit())
+    changes = Attendance.objects.none()
+    since = parse_datetime(str(payload["since"])) if payload.get("since") else None
+    if since is not None and timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    if class_ids:
+        changes = Attendance.objects.filter(school=school, class_program_id__in=class_ids)
+        if since is not None:
+            changes = changes.filter(updated_at__gt=since)
+        else:
+            # First sync from this device: just the days it marked.
+            changes = changes.filter(date__in={mark.date for _, mark in candidates})
+        changes = changes.exclude(pk__in=[change.attendance.pk for change in result.changes])
+
+    return {
+        # Taken before our writes: the next sync may resend a row, never miss one.
+        "server_time": now.isoformat(),
+        "created": result.created,
+        "updated": result.updated,
+        "unchanged": result.unchanged,
+        "stale": stale,
+        "rejected": sorted(rejected),
+        "fields": CHANGE_FIELDS,
+        "changes": [
+            [pk, student_id, class_id, day.isoformat(), session_id, status, updated_at.isoformat()]
+            for pk, student_id, class_id, day, session_id, status, updated_at
+            in changes.order_by().values_list(*CHANGE_FIELDS)
+        ],
+    }
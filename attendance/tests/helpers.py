@@ -0,0 +1,34 @@
+# attendance/tests/helpers.py
+from accounts.models import User
+from classes_app.models import ClassProgram, Division, Session
+from schools.models import School
+from students.models import Student
+
+
+class ClassFixtureMixin:
+    """A school with one class of students, built without fixture data."""
+    class_size = 5
+
+    def setUp(self):
+        self.school = School.objects.create(name="Attendance School", in_progress=False)
+        self.division = Division.objects.create(school=self.school, name="PRIMARY_1_4")
+        self.class_program = ClassProgram.objects.create(
+            school=self.school, division=self.division, name="Grade 2B"
+        )
+        self.teacher = User.objects.create_user(
+            username="teacher", password="x", role="TEACHER", school=self.school
+        )
+        self.session = Session.objects.create(
+            school=self.school, class_program=self.class_program, name="Period 1"
+        )
+        self.students = [
+            Student.objects.create(
+                school=self.school,
+                division=self.division,
+                class_program=self.class_program,
+                full_name=f"Student {i}",
+                parent_name="Parent",
+                parent_phone="",  # skip parent account creation
+            )
+            for i in range(self.class_size)
+        ]
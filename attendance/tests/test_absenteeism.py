@@ -0,0 +1,88 @@
+# attendance/tests/test_absenteeism.py
+from array import array
+from datetime import date, timedelta
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from attendance import absenteeism
+from attendance.models import ChronicAbsence
+from attendance.services import bulk_mark
+
+from .helpers import ClassFixtureMixin
+
+
+class ChronicAbsenceTests(ClassFixtureMixin, TestCase):
+    start = date(2025, 3, 3)  # a Monday
+    weeks = 6
+
+    def setUp(self):
+        super().setUp()
+        self.days = [
+            self.start + timedelta(days=week * 7 + weekday)
+            for week in range(self.weeks) for weekday in range(5)
+        ]
+        self.as_of = self.days[-1]
+        mondays, tail = self.students[0], self.students[1]
+        for index, day in enumerate(self.days):
+            statuses = {student.id: "PRESENT" for student in self.students}
+            if day.weekday() == 0:
+                statuses[mondays.id] = "ABSENT"
+            if index >= len(self.days) - 8:
+                statuses[tail.id] = "ABSENT"
+            bulk_mark(
+                school=self.school, class_program=self.class_program, date=day,
+                session=None, statuses=statuses, notify=False,
+            )
+
+    def test_flags_and_ranking(self):
+        self.assertEqual(absenteeism.detect(self.school, as_of=self.as_of), 2)
+        tail, mondays = absenteeism.latest(self.school)
+
+        self.assertEqual((tail.rank, tail.student, tail.absent_days), (1, self.students[1], 8))
+        self.assertEqual(tail.flags, ["chronic", "declining"])
+        self.assertEqual(tail.worst_window_rate, 0.2)  # ten days, eight absent
+        self.assertIsNone(tail.weekday)
+
+        self.assertEqual((mondays.rank, mondays.student), (2, self.students[0]))
+        self.assertEqual(mondays.rate, 0.8)
+        self.assertEqual(mondays.flags, ["chronic", "weekday"])
+        self.assertEqual(mondays.weekday_name, "Monday")
+
+    def test_rerun_replaces_the_run(self):
+        absenteeism.detect(self.school, as_of=self.as_of)
+        absenteeism.detect(self.school, as_of=self.as_of)
+        self.assertEqual(ChronicAbsence.objects.filter(school=self.school).count(), 2)
+
+    def test_too_few_days_are_not_judged(self):
+        absenteeism.detect(self.school, as_of=self.days[absenteeism.MIN_DAYS - 2])
+        self.assertFalse(ChronicAbsence.objects.exists())
+
+    def test_worst_mark_of_the_day_counts(self):
+        bulk_mark(
+            school=self.school, class_program=self.class_program, date=self.days[0],
+            session=self.session, statuses={self.students[2].id: "ABSENT"}, notify=False,
+        )
+        columns = {
+            student_id: (days, credits)
+            for student_id, days, credits in absenteeism.student_columns(self.school, self.start, self.as_of)
+        }
+        days, credits = columns[self.students[2].id]
+        self.assertEqual(len(days), len(self.days))
+        self.assertEqual(credits[0], 0)
+
+    def test_worst_window(self):
+        first = self.start.toordinal()
+        days = array("l", range(first, first + 20))
+        credits = array("b", [2] * 5 + [0, 1, 0] + [2] * 12)
+        result = absenteeism.analyse(days, credits, date.fromordinal(first + 19))
+        self.assertEqual(result["worst_window_rate"], round(15 / 20, 4))
+
+    def test_command_and_report(self):
+        call_command("detect_chronic_absence", "--as-of", self.as_of.isoformat(), stdout=open("/dev/null", "w"))
+        self.client.force_login(self.teacher)
+        response = self.client.get(reverse("attendance:absenteeism"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row.student for row in response.context["flagged"]], self.students[1::-1])
+        self.assertEqual(response.context["as_of"], self.as_of)
@@ -0,0 +1,156 @@
+# attendance/tests/test_archive.py
+import io
+from datetime import date
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from attendance import absenteeism, archive, rollups
+from attendance.forms import AttendanceBulkStatusForm
+from attendance.models import (
+    ArchivedAttendance, Attendance, AttendanceDailySummary, AttendanceLog, AttendanceStreak, AttendanceYear,
+)
+from attendance.services import bulk_mark
+from attendance.sync import sync
+
+from .helpers import ClassFixtureMixin
+
+
+class AcademicYearArchiveTests(ClassFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.current = archive.academic_year(timezone.localdate())
+        self.old_year = self.current - 2
+        self.old_day = archive.year_bounds(self.old_year)[0]
+        self.new_day = archive.year_bounds(self.current)[0]
+        for day in (self.old_day, self.new_day):
+            bulk_mark(
+                school=self.school, class_program=self.class_program, date=day, session=self.session,
+                statuses={s.id: "ABSENT" for s in self.students}, marked_by=self.teacher, notify=False,
+            )
+        # One re-mark in the old year, so a row carries two log entries
+        bulk_mark(
+            school=self.school, class_program=self.class_program, date=self.old_day, session=self.session,
+            statuses={self.students[0].id: "PRESENT"}, marked_by=self.teacher, note="Late bus", notify=False,
+        )
+
+    def test_academic_year_boundaries(self):
+        start, end = archive.year_bounds(2024)
+        self.assertEqual(archive.academic_year(start), 2024)
+        self.assertEqual(archive.academic_year(end), 2024)
+        self.assertEqual(archive.academic_year(date(2024, 1, 15)), 2023)
+
+    def test_close_year_moves_rows_and_folds_logs(self):
+        summaries = rollups.totals(AttendanceDailySummary.objects.filter(school=self.school))
+        closed = archive.close_year(self.school, self.old_year)
+
+        n = len(self.students)
+        self.assertEqual((closed.attendance_rows, closed.log_rows), (n, n + 1))
+        self.assertFalse(Attendance.objects.filter(date=self.old_day).exists())
+        self.assertEqual(Attendance.objects.filter(date=self.new_day).count(), n)
+        self.assertEqual(AttendanceLog.objects.count(), n)
+
+        remarked = ArchivedAttendance.objects.get(student=self.students[0])
+        self.assertEqual(remarked.status, "PRESENT")
+        self.assertEqual([c[:2] for c in remarked.changes], [[None, "ABSENT"], ["ABSENT", "PRESENT"]])
+        self.assertEqual(remarked.changes[1][4], "Late bus")
+        # Summaries and streaks keep the archived days
+        self.assertEqual(rollups.totals(AttendanceDailySummary.objects.filter(school=self.school)), summaries)
+        self.assertTrue(AttendanceStreak.objects.filter(student=self.students[1]).exists())
+
+    def test_rebuilds_keep_closed_years(self):
+        summaries = rollups.totals(AttendanceDailySummary.objects.filter(school=self.school))
+        streak = AttendanceStreak.objects.get(student=self.students[1])
+        self.assertEqual(streak.longest_absent_streak, 2)  # old day + new day
+        archive.close_year(self.school, self.old_year)
+
+        call_command("rebuild_attendance_summary", stdout=io.StringIO())
+        call_command("rebuild_attendance_streaks", stdout=io.StringIO())
+        self.assertEqual(rollups.totals(AttendanceDailySummary.objects.filter(school=self.school)), summaries)
+        self.assertEqual(AttendanceStreak.objects.get(student=self.students[1]).longest_absent_streak, 2)
+
+        # Deleting a live row rebuilds that student from history, archive included.
+        Attendance.objects.get(student=self.students[1], date=self.new_day).delete()
+        streak = AttendanceStreak.objects.get(student=self.students[1])
+        self.assertEqual((streak.longest_absent_streak, streak.last_date), (1, self.old_day))
+
+    def test_readers_see_closed_years(self):
+        student = self.students[0]
+        admin = User.objects.create_user(username="head", password="x", role="SCHOOL_ADMIN", school=self.school)
+        self.client.force_login(admin)
+        history_url = reverse("attendance:history", args=[student.id])
+
+        def snapshot():
+            page = self.client.get(history_url).context
+            listed = self.client.get(reverse("attendance:list")).context["attendances"]
+            data = self.client.get(reverse("attendance:attendance_analytics_data")).json()
+            return (
+                page["stats"], page["monthly"], page["absence_runs"],
+                [(row.id, row.status) for row in listed], data["summary"]["students"], data["top_absent"],
+                list(absenteeism.student_columns(self.school, self.old_day, self.new_day)),
+            )
+
+        before = snapshot()
+        live_changes = len(self.client.get(history_url).context["logs"])
+        archive.close_year(self.school, self.old_year)
+
+        self.assertEqual(snapshot(), before)
+        page = self.client.get(history_url).context
+        self.assertEqual(len(page["logs"]) + len(page["archived_changes"]), live_changes)
+        self.assertEqual(
+            [(c["previous_status"], c["new_status"], c["note"]) for c in page["archived_changes"]],
+            [("ABSENT", "PRESENT", "Late bus"), (None, "ABSENT", None)],
+        )
+
+    def test_closed_year_is_read_only(self):
+        archive.close_year(self.school, self.old_year)
+
+        with self.assertRaises(archive.ClosedYearError):
+            bulk_mark(
+                school=self.school, class_program=self.class_program, date=self.old_day, session=None,
+                statuses={self.students[0].id: "ABSENT"}, notify=False,
+            )
+        with self.assertRaises(archive.ClosedYearError):
+            Attendance.objects.create(
+                school=self.school, student=self.students[0], class_program=self.class_program,
+                date=self.old_day, status="ABSENT",
+            )
+        form = AttendanceBulkStatusForm({
+            "class_program_id": self.class_program.id, "date": self.old_day.isoformat(),
+            "status": "PRESENT", "student_ids": [self.students[0].id],
+        }, school=self.school)
+        self.assertIn("date", form.errors)
+
+        response = sync(school=self.school, user=self.teacher, payload={"marks": [{
+            "student": self.students[0].id, "class_program": self.class_program.id,
+            "date": self.old_day.isoformat(), "session": None, "status": "ABSENT",
+            "marked_at": timezone.now().isoformat(),
+        }]})
+        self.assertEqual(response["rejected"], [[0, "closed_year"]])
+
+    def test_current_year_cannot_be_closed(self):
+        with self.assertRaises(archive.ClosedYearError):
+            archive.close_year(self.school, self.current)
+
+    def test_rows_facade_routes_by_range(self):
+        archive.close_year(self.school, self.old_year)
+        n = len(self.students)
+
+        self.assertEqual(len(archive.rows(self.school)), 2 * n)
+        old = archive.rows(self.school, *archive.year_bounds(self.old_year))
+        self.assertEqual(old.model, ArchivedAttendance)
+        self.assertEqual({row["date"] for row in old}, {self.old_day})
+        new = archive.rows(self.school, *archive.year_bounds(self.current))
+        self.assertEqual(new.model, Attendance)
+        self.assertEqual(len(archive.rows(self.school, status="PRESENT")), 1)
+
+    def test_command_closes_every_finished_year(self):
+        call_command("archive_attendance_year", school=self.school.id, stdout=io.StringIO())
+        self.assertEqual(
+            set(AttendanceYear.objects.values_list("year", flat=True)),
+            set(range(self.old_year, self.current)),
+        )
+        self.assertEqual(ArchivedAttendance.objects.count(), len(self.students))
@@ -0,0 +1,119 @@
+# attendance/tests/test_bitmaps.py
+from datetime import date, timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import User
+from attendance import archive, bitmaps
+from attendance.models import Attendance, AttendanceBitmap
+from attendance.services import bulk_mark
+
+from .helpers import ClassFixtureMixin
+
+
+class EncodingTests(SimpleTestCase):
+    def test_codes_round_trip_and_count(self):
+        bits = bytearray(bitmaps.SIZE)
+        pattern = [bitmaps.ATTENDED, bitmaps.ABSENT, bitmaps.UNMARKED, bitmaps.HALF_DAY, bitmaps.ABSENT] * 73
+        for index, code in enumerate(pattern):
+            bitmaps.set_code(bits, index, code)
+
+        self.assertEqual(bitmaps.codes(bits, len(pattern)), pattern)
+        self.assertEqual(bitmaps.counts(bits), (73, 73, 146))
+        # Ranges that start and end mid-byte count the same as a day-by-day walk.
+        for start, end in [(0, 1), (3, 9), (5, 6), (1, 363), (100, 100)]:
+            day_codes = pattern[start:end]
+            self.assertEqual(
+                bitmaps.counts(bits, start, end),
+                tuple(day_codes.count(code) for code in (bitmaps.ATTENDED, bitmaps.HALF_DAY, bitmaps.ABSENT)),
+            )
+        self.assertAlmostEqual(bitmaps.rate(bits, 0, 5), (2 + 1) / (2 * 4))
+        self.assertIsNone(bitmaps.rate(bits, 2, 3))
+
+    def test_longest_absent_run_skips_unmarked_days(self):
+        bits = bytearray(bitmaps.SIZE)
+        for index, code in enumerate([3, 0, 3, 0, 0, 3, 1, 3, 3]):
+            bitmaps.set_code(bits, index, code)
+        self.assertEqual(bitmaps.longest_absent_run(bits), 3)
+
+    def test_terms_cover_the_year(self):
+        terms = bitmaps.terms(2024)
+        start, end = archive.year_bounds(2024)
+        self.assertEqual(terms[0][1], 0)
+        self.assertEqual(terms[-1][2], (end - start).days + 1)
+        self.assertTrue(all(a[2] == b[1] for a, b in zip(terms, terms[1:])))
+
+
+class AttendanceBitmapTests(ClassFixtureMixin, TestCase):
+    day = date(2025, 3, 3)
+
+    def mark(self, statuses, day=None, session=None):
+        return bulk_mark(
+            school=self.school, class_program=self.class_program, date=day or self.day,
+            session=session, statuses={self.students[i].id: status for i, status in statuses.items()}, notify=False,
+        )
+
+    def code(self, student, day=None):
+        year, index = bitmaps.position(day or self.day)
+        return bitmaps.code_at(AttendanceBitmap.objects.get(student=student, year=year).bits, index)
+
+    def test_write_path_keeps_bitmaps_current(self):
+        self.mark({0: "PRESENT", 1: "LATE", 2: "ABSENT"})
+        self.assertEqual(
+            [self.code(s) for s in self.students[:3]], [bitmaps.ATTENDED, bitmaps.ATTENDED, bitmaps.ABSENT],
+        )
+        self.mark({0: "HALF_DAY", 1: "ABSENT"})
+        self.assertEqual([self.code(s) for s in self.students[:2]], [bitmaps.HALF_DAY, bitmaps.ABSENT])
+        self.assertEqual(AttendanceBitmap.objects.count(), 3)
+
+    def test_worst_session_wins_and_delete_clears(self):
+        self.mark({0: "PRESENT"})
+        self.mark({0: "ABSENT"}, session=self.session)
+        self.assertEqual(self.code(self.students[0]), bitmaps.ABSENT)
+
+        Attendance.objects.get(student=self.students[0], session=self.session).delete()
+        self.assertEqual(self.code(self.students[0]), bitmaps.ATTENDED)
+
+        row = Attendance.objects.get(student=self.students[0])
+        row.date = self.day + timedelta(days=1)
+        row.save()
+        self.assertEqual(self.code(self.students[0]), bitmaps.UNMARKED)
+        self.assertEqual(self.code(self.students[0], row.date), bitmaps.ATTENDED)
+
+    def test_rebuild_matches_incremental(self):
+        for offset, status in enumerate(["PRESENT", "ABSENT", "HALF_DAY", "LATE"]):
+            self.mark({0: status, 1: "ABSENT"}, day=self.day + timedelta(days=offset))
+        self.mark({0: "PRESENT"}, day=date(2025, 9, 1))  # next academic year
+        expected = set(AttendanceBitmap.objects.values_list("student_id", "year", "bits"))
+        self.assertEqual(len(expected), 3)
+
+        AttendanceBitmap.objects.all().delete()
+        call_command("rebuild_attendance_bitmaps", "--school", self.school.pk, stdout=StringIO())
+        self.assertEqual(set(AttendanceBitmap.objects.values_list("student_id", "year", "bits")), expected)
+
+    def test_class_year_view(self):
+        for offset in range(3):
+            self.mark({0: "ABSENT", 1: "PRESENT"}, day=self.day + timedelta(days=offset))
+        admin = User.objects.create_user(username="head", password="x", role="SCHOOL_ADMIN", school=self.school)
+        self.client.force_login(admin)
+
+        year, index = bitmaps.position(self.day)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse("attendance:class_year", args=[self.class_program.pk]), {"year": year},
+            )
+        # One bitmap query for the whole class; no attendance rows read.
+        self.assertEqual(sum("attendance_attendancebitmap" in q["sql"] for q in queries), 1)
+        self.assertFalse(any('"attendance_attendance"' in q["sql"] for q in queries))
+        rows = {row["name"]: row for row in response.context["rows"]}
+        self.assertEqual(len(rows), len(self.students))
+        self.assertEqual(rows["Student 0"]["codes"][index:index + 3], "333")
+        self.assertEqual((rows["Student 0"]["rate"], rows["Student 0"]["longest_absent_run"]), (0, 3))
+        self.assertEqual(rows["Student 1"]["rate"], 1)
+        self.assertIsNone(rows["Student 2"]["rate"])
+        self.assertEqual(len(rows["Student 0"]["terms"]), len(response.context["terms"]))
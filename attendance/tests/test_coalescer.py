@@ -0,0 +1,34 @@
+# attendance/tests/test_coalescer.py
+from concurrent.futures import wait
+from datetime import date
+
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from attendance import archive
+from attendance.coalescer import WriteCoalescer
+from attendance.models import Attendance, AttendanceYear
+
+from .helpers import ClassFixtureMixin
+
+
+class GroupCommitTests(ClassFixtureMixin, TransactionTestCase):
+    def submit(self, coalescer, day, student):
+        return coalescer.submit(
+            school=self.school, class_program=self.class_program, date=day, session=None,
+            statuses={student.id: "PRESENT"}, marked_by=self.teacher, notify=False,
+        )
+
+    def test_concurrent_submissions_share_one_commit(self):
+        coalescer = WriteCoalescer(window_ms=200)
+        closed_year = archive.academic_year(timezone.localdate()) - 3
+        AttendanceYear.objects.create(school=self.school, year=closed_year)
+
+        futures = [self.submit(coalescer, date(2025, 3, 3 + i), student) for i, student in enumerate(self.students)]
+        rejected = self.submit(coalescer, archive.year_bounds(closed_year)[0], self.students[0])
+        wait(futures + [rejected], timeout=10)
+
+        self.assertEqual([f.result().created for f in futures], [1] * len(self.students))
+        self.assertIsInstance(rejected.exception(), archive.ClosedYearError)
+        self.assertEqual(coalescer.batches, 1)
+        self.assertEqual(Attendance.objects.count(), len(self.students))
@@ -0,0 +1,72 @@
+# attendance/tests/test_compaction.py
+from datetime import date, datetime, time, timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from attendance.compaction import compact
+from attendance.models import Attendance, AttendanceLog
+from attendance.services import bulk_mark
+
+from .helpers import ClassFixtureMixin
+
+
+class AttendanceLogCompactionTests(ClassFixtureMixin, TestCase):
+    day = date(2025, 3, 3)
+
+    def toggle(self, student, statuses, note=None):
+        for status in statuses:
+            bulk_mark(
+                school=self.school, class_program=self.class_program, date=self.day, session=self.session,
+                statuses={student.id: status}, marked_by=self.teacher, note=note, notify=False,
+            )
+
+    def age_entries(self, start=time(8, 0)):
+        """Spread the log over the attendance day, a minute apart, oldest first."""
+        first = timezone.make_aware(datetime.combine(self.day, start))
+        for minute, log in enumerate(AttendanceLog.objects.order_by("id")):
+            AttendanceLog.objects.filter(pk=log.pk).update(changed_at=first + timedelta(minutes=minute))
+
+    def chain(self, student):
+        return list(
+            AttendanceLog.objects.filter(attendance__student=student)
+            .order_by("changed_at", "id").values_list("previous_status", "new_status", "collapsed")
+        )
+
+    def test_toggle_run_collapses_to_first_and_last(self):
+        student = self.students[0]
+        self.toggle(student, ["PRESENT", "ABSENT", "LATE", "ABSENT", "PRESENT"])
+        self.age_entries()
+
+        result = compact()
+
+        self.assertEqual((result.attendance_rows, result.removed), (1, 3))
+        # The kept entries still chain: the last one now follows the first.
+        self.assertEqual(self.chain(student), [(None, "PRESENT", 0), ("PRESENT", "PRESENT", 3)])
+        self.assertEqual(Attendance.objects.get(student=student).status, "PRESENT")
+        self.assertEqual(compact().removed, 0)  # idempotent
+
+    def test_noted_and_later_edits_are_kept_verbatim(self):
+        student = self.students[0]
+        self.toggle(student, ["PRESENT", "ABSENT", "LATE"])
+        self.toggle(student, ["PRESENT"], note="Doctor's note")
+        self.toggle(student, ["ABSENT", "LATE", "ABSENT"])
+        self.age_entries()
+        # The last correction was made the following day
+        late_edit = AttendanceLog.objects.latest("id")
+        AttendanceLog.objects.filter(pk=late_edit.pk).update(changed_at=late_edit.changed_at + timedelta(days=1))
+
+        result = compact()
+
+        # Run 1 (3 entries) loses its middle; the noted entry splits it from
+        # run 2, which is only two same-day entries once the next-day edit is kept.
+        self.assertEqual(result.removed, 1)
+        self.assertEqual(self.chain(student), [
+            (None, "PRESENT", 0), ("PRESENT", "LATE", 1), ("LATE", "PRESENT", 0),
+            ("PRESENT", "ABSENT", 0), ("ABSENT", "LATE", 0), ("LATE", "ABSENT", 0),
+        ])
+
+    def test_recent_entries_are_left_alone(self):
+        self.toggle(self.students[0], ["PRESENT", "ABSENT", "LATE", "ABSENT"])
+        self.assertEqual(compact().removed, 0)
+        self.assertEqual(AttendanceLog.objects.count(), 4)
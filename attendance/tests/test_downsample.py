@@ -0,0 +1,71 @@
+# attendance/tests/test_downsample.py
+import math
+from datetime import date, timedelta
+
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from attendance.models import AttendanceDailySummary
+from core import downsample
+
+from .helpers import ClassFixtureMixin
+
+
+class DownsampleTests(SimpleTestCase):
+    def test_short_series_are_returned_whole(self):
+        self.assertEqual(downsample.lttb([3, 1, 2], 10), [0, 1, 2])
+        self.assertEqual(downsample.minmax([3, 1, 2], 10), [0, 1, 2])
+
+    def test_lttb_keeps_endpoints_and_spikes(self):
+        ys = [50.0] * 1000
+        ys[137], ys[612] = 100.0, 0.0
+        kept = downsample.lttb(ys, 50)
+
+        self.assertEqual(len(kept), 50)
+        self.assertEqual((kept[0], kept[-1]), (0, 999))
+        self.assertEqual(kept, sorted(set(kept)))
+        self.assertIn(137, kept)
+        self.assertIn(612, kept)
+
+    def test_lttb_follows_the_shape(self):
+        ys = [math.sin(i / 50) for i in range(2000)]
+        kept = downsample.lttb(ys, 100)
+        self.assertAlmostEqual(max(ys[i] for i in kept), 1, places=2)
+        self.assertAlmostEqual(min(ys[i] for i in kept), -1, places=2)
+
+    def test_minmax_keeps_every_bucket_extreme(self):
+        ys = [i % 7 for i in range(1000)]
+        kept = downsample.minmax(ys, 40)
+        self.assertLessEqual(len(kept), 40)
+        self.assertEqual(kept, sorted(set(kept)))
+        self.assertEqual({ys[i] for i in kept[1:-1]}, {0, 6})
+
+    def test_points_are_clamped(self):
+        self.assertEqual(downsample.points(None), downsample.MAX_POINTS)
+        self.assertEqual(downsample.points("junk"), downsample.MAX_POINTS)
+        self.assertEqual(downsample.points("1"), downsample.MIN_POINTS)
+        self.assertEqual(downsample.points(10 ** 9), downsample.MAX_POINTS)
+
+
+class AnalyticsTrendTests(ClassFixtureMixin, TestCase):
+    def test_long_ranges_are_downsampled(self):
+        start = date(2022, 1, 1)
+        AttendanceDailySummary.objects.bulk_create([
+            AttendanceDailySummary(
+                school=self.school, class_program=self.class_program, date=start + timedelta(days=n),
+                present=4 if n != 500 else 0, absent=1 if n != 500 else 5,
+            )
+            for n in range(1000)
+        ])
+
+        data = self.client.get(reverse("attendance:attendance_analytics_data"), {"points": 120}).json()
+
+        labels = data["trend"]["labels"]
+        self.assertEqual(len(labels), 120)
+        self.assertEqual((labels[0], labels[-1]), (start.isoformat(), (start + timedelta(days=999)).isoformat()))
+        self.assertIn((start + timedelta(days=500)).isoformat(), labels)
+        self.assertEqual(min(data["trend"]["values"]), 0)
+        self.assertEqual(data["stacked"]["labels"], labels)
+        self.assertTrue(all(len(ds["data"]) == 120 for ds in data["stacked"]["datasets"]))
+        # The summary still covers every day.
+        self.assertEqual(data["summary"]["total"], 5000)
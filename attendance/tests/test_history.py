@@ -0,0 +1,65 @@
+# attendance/tests/test_history.py
+from datetime import date, timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+
+from attendance import history
+from attendance.models import AttendanceLog
+from attendance.services import bulk_mark
+from attendance.views import AttendanceHistoryView
+
+from .helpers import ClassFixtureMixin
+
+
+class AttendanceHistoryTests(ClassFixtureMixin, TestCase):
+    start = date(2025, 1, 27)
+    # Mon 27 Jan .. Tue 4 Feb: P A A P A A A (two absence runs; the last is current)
+    pattern = ["PRESENT", "ABSENT", "ABSENT", "PRESENT", "ABSENT", "ABSENT", "ABSENT"]
+
+    def setUp(self):
+        super().setUp()
+        self.student = self.students[0]
+        for offset, status in enumerate(self.pattern):
+            bulk_mark(
+                school=self.school, class_program=self.class_program,
+                date=self.start + timedelta(days=offset), session=None,
+                statuses={self.student.id: status}, marked_by=self.teacher, notify=False,
+            )
+        self.records = history.records(self.student.id, school=self.school)
+
+    def test_totals(self):
+        stats = history.totals(self.records)
+        self.assertEqual((stats["total"], stats["present"], stats["absent"]), (7, 2, 5))
+        self.assertEqual(stats["rate"], round(2 / 7 * 100, 1))
+
+    def test_monthly_running_totals(self):
+        months = history.monthly(self.records)
+        self.assertEqual([m["month"] for m in months], [date(2025, 1, 1), date(2025, 2, 1)])
+        self.assertEqual([(m["total"], m["present"]) for m in months], [(5, 2), (2, 0)])
+        self.assertEqual([m["running_total"] for m in months], [5, 7])
+        self.assertEqual(months[-1]["running_present"], 2)
+
+    def test_absence_runs_current_first(self):
+        runs = history.absence_runs(self.records)
+        self.assertEqual(
+            [(r["first_day"], r["length"], r["is_current"]) for r in runs],
+            [(date(2025, 1, 31), 3, True), (date(2025, 1, 28), 2, False)],
+        )
+
+    def test_view_pages_by_keyset(self):
+        self.teacher.set_password("x")
+        self.teacher.save()
+        self.client.login(username="teacher", password="x")
+        url = reverse("attendance:history", args=[self.student.id])
+
+        with mock.patch.object(AttendanceHistoryView, "page_size", 4):
+            first = self.client.get(url)
+            older = self.client.get(f"{url}?{first.context['older_query']}")
+
+        newest_first = list(AttendanceLog.objects.order_by("-changed_at", "-id"))
+        self.assertEqual(list(first.context["logs"]), newest_first[:4])
+        self.assertEqual(list(older.context["logs"]), newest_first[4:])
+        self.assertNotIn("older_query", older.context)
+        self.assertEqual(first.context["current_absence_run"]["length"], 3)
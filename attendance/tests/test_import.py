@@ -0,0 +1,97 @@
+# attendance/tests/test_import.py
+import io
+from datetime import date, datetime
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+from openpyxl import Workbook
+
+from accounts.models import User
+from attendance import importer
+from attendance.models import Attendance, AttendanceDailySummary, AttendanceLog, AttendanceYear
+from notifications.models import OutboxMessage, StudentAlert
+
+from .helpers import ClassFixtureMixin
+
+
+class AttendanceImportTests(ClassFixtureMixin, TestCase):
+    def run_import(self, text, **kwargs):
+        return importer.import_file(
+            school=self.school, stream=io.BytesIO(text.encode()), name="history.csv", **kwargs
+        )
+
+    def test_rows_resolve_by_id_and_name(self):
+        first, second = self.students[:2]
+        result = self.run_import(
+            "Date,Student ID,Student,Class,Session,Status\n"
+            f"2025-03-03,{first.pk},,,,Present\n"
+            f"2025-03-03,,  student 1 ,grade 2b,,A\n"
+            f"2025-03-03,{first.pk},,,period 1,half day\n",
+            batch_size=2,
+        )
+        self.assertEqual((result.rows, result.created, result.failed), (3, 3, 0))
+        rows = {(row.student_id, row.session_id): row.status for row in Attendance.objects.all()}
+        self.assertEqual(rows, {
+            (first.pk, None): "PRESENT",
+            (second.pk, None): "ABSENT",
+            (first.pk, self.session.pk): "HALF_DAY",
+        })
+        self.assertEqual(AttendanceLog.objects.filter(note=importer.NOTE).count(), 3)
+        self.assertEqual(AttendanceDailySummary.objects.get(session=None).absent, 1)
+        self.assertFalse(StudentAlert.objects.exists() or OutboxMessage.objects.exists())
+
+    def test_bad_rows_are_reported_and_skipped(self):
+        student = self.students[0]
+        result = self.run_import(
+            "date,student_id,status\n"
+            f"2025-03-03,{student.pk},PRESENT\n"
+            f"03/04/2025,{student.pk},PRESENT\n"
+            f"2025-03-05,999999,PRESENT\n"
+            f"2025-03-06,{student.pk},EXCUSED\n"
+            ",,\n"
+            f"2025-03-07,{student.pk},ABSENT\n"
+        )
+        self.assertEqual((result.rows, result.created, result.failed), (5, 2, 3))
+        self.assertEqual([line for line, _ in result.errors], [3, 4, 5])
+        self.assertIn("Unknown student id", result.errors[1][1])
+
+    def test_later_row_wins_and_reimport_is_unchanged(self):
+        student = self.students[0]
+        text = f"date,student_id,status\n2025-03-03,{student.pk},ABSENT\n2025-03-03,{student.pk},LATE\n"
+        self.assertEqual(self.run_import(text).created, 1)
+        self.assertEqual(Attendance.objects.get().status, "LATE")
+        self.assertEqual(self.run_import(text).unchanged, 1)
+
+    def test_closed_year_rows_are_rejected(self):
+        AttendanceYear.objects.create(school=self.school, year=2024)
+        result = self.run_import(f"date,student_id,status\n2025-03-03,{self.students[0].pk},PRESENT\n")
+        self.assertEqual(result.errors, [(2, "The academic year is closed.")])
+        self.assertFalse(Attendance.objects.exists())
+
+    def test_excel(self):
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(["Date", "Student", "Status"])
+        sheet.append([datetime(2025, 3, 3), "Student 3", "L"])
+        stream = io.BytesIO()
+        workbook.save(stream)
+        stream.seek(0)
+
+        result = importer.import_file(school=self.school, stream=stream, name="history.xlsx")
+        self.assertEqual(result.created, 1)
+        row = Attendance.objects.get()
+        self.assertEqual((row.student, row.date, row.status), (self.students[3], date(2025, 3, 3), "LATE"))
+
+    def test_upload_view(self):
+        admin = User.objects.create_user(username="admin", password="x", role="SCHOOL_ADMIN", school=self.school)
+        self.client.force_login(admin)
+        upload = SimpleUploadedFile(
+            "history.csv", f"date,student_id,status\n2025-03-03,{self.students[0].pk},ABSENT\n".encode()
+        )
+        response = self.client.post(reverse("attendance:import"), {"file": upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["result"].created, 1)
+
+        response = self.client.post(reverse("attendance:import"), {"file": SimpleUploadedFile("x.pdf", b"%PDF")})
+        self.assertFalse(response.context["form"].is_valid())
@@ -0,0 +1,64 @@
+# attendance/tests/test_list.py
+from datetime import date, timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+
+from attendance.models import Attendance
+from attendance.services import bulk_mark
+from attendance.views import AttendanceListView
+from core import keyset
+
+from .helpers import ClassFixtureMixin
+
+
+class AttendanceListTests(ClassFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        for offset in range(3):
+            bulk_mark(
+                school=self.school, class_program=self.class_program,
+                date=date(2025, 3, 3) + timedelta(days=offset), session=None,
+                statuses={s.id: "PRESENT" for s in self.students}, marked_by=self.teacher, notify=False,
+            )
+        self.teacher.set_password("x")
+        self.teacher.save()
+        self.client.login(username="teacher", password="x")
+        self.url = reverse("attendance:list")
+
+    def ordered_ids(self):
+        return list(
+            Attendance.objects.filter(school=self.school).order_by("-date", "-id").values_list("id", flat=True)
+        )
+
+    def test_keyset_pages_cover_every_row_once(self):
+        qs = Attendance.objects.filter(school=self.school)
+        seen, cursor = [], None
+        while True:
+            page = keyset.paginate(qs, ["-date", "-id"], cursor, size=4)
+            seen += [row.id for row in page.items]
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(seen, self.ordered_ids())
+
+    def test_bad_cursor_is_first_page(self):
+        qs = Attendance.objects.filter(school=self.school)
+        for cursor in ["garbage", keyset.encode_cursor(["not-a-date", 1]), keyset.encode_cursor([1])]:
+            page = keyset.paginate(qs, ["-date", "-id"], cursor, size=4)
+            self.assertEqual([row.id for row in page.items], self.ordered_ids()[:4])
+
+    def test_view_pages_without_count(self):
+        with mock.patch.object(AttendanceListView, "page_size", 10):
+            first = self.client.get(self.url, {"status": "PRESENT"})
+            second = self.client.get(f"{self.url}?{first.context['next_page_query']}")
+
+        ids = self.ordered_ids()
+        self.assertTrue(first.context["is_first_page"])
+        self.assertEqual([a.id for a in first.context["attendances"]], ids[:10])
+        self.assertIn("status=PRESENT", first.context["next_page_query"])
+        self.assertFalse(second.context["is_first_page"])
+        self.assertEqual([a.id for a in second.context["attendances"]], ids[10:])
+        self.assertNotIn("next_page_query", second.context)
+        self.assertEqual(second.context["first_page_query"], "status=PRESENT")
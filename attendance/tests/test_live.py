@@ -0,0 +1,114 @@
+# attendance/tests/test_live.py
+import json
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from attendance import live
+from attendance.services import bulk_mark
+from classes_app.models import ClassProgram
+
+from .helpers import ClassFixtureMixin
+
+
+class LiveBoardMixin(ClassFixtureMixin):
+    def mark(self, statuses, day=None, session=None):
+        bulk_mark(
+            school=self.school, class_program=self.class_program, date=day or timezone.localdate(),
+            session=session, statuses={self.students[i].id: status for i, status in statuses.items()},
+            notify=False,
+        )
+
+    def board_of(self, board):
+        return json.loads(board.current(self.school.pk)[1])
+
+
+@mock.patch.object(live.Board, "_ensure_poller")
+class LiveBoardTests(LiveBoardMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.waiting = ClassProgram.objects.create(school=self.school, division=self.division, name="Grade 3A")
+
+    def test_snapshot(self, _):
+        self.mark({0: "PRESENT", 1: "ABSENT", 2: "LATE"})
+        self.mark({3: "ABSENT"}, day=timezone.localdate() - timedelta(days=1))
+        board = live.snapshot(self.school.pk, timezone.localdate())
+        self.assertEqual(board["submitted"], 1)
+        submitted, waiting = board["classes"]
+        self.assertEqual(
+            (submitted["name"], submitted["submitted"], submitted["marked"], submitted["students"]),
+            ("Grade 2B", True, 3, len(self.students)),
+        )
+        self.assertEqual((submitted["present"], submitted["absent"], submitted["late"]), (1, 1, 1))
+        self.assertEqual((waiting["name"], waiting["submitted"], waiting["marked"]), ("Grade 3A", False, 0))
+
+    def test_session_only_classes_count_as_submitted(self, _):
+        self.mark({0: "PRESENT"}, session=self.session)
+        submitted = live.snapshot(self.school.pk, timezone.localdate())["classes"][0]
+        self.assertEqual((submitted["submitted"], submitted["marked"], submitted["sessions"]), (True, 0, 1))
+
+    def test_todays_writes_publish_after_commit(self, _):
+        with mock.patch.object(live.board, "changed") as changed:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.mark({0: "PRESENT"}, day=timezone.localdate() - timedelta(days=1))
+            changed.assert_not_called()
+            with self.captureOnCommitCallbacks(execute=True):
+                self.mark({0: "PRESENT"})
+            changed.assert_called_once_with({self.school.pk})
+
+    def test_poll_rebuilds_only_on_change(self, _):
+        board = live.Board()
+        board.current(self.school.pk)
+        self.assertEqual(board.refreshes, 1)
+        board.poll()
+        self.assertEqual(board.refreshes, 1)
+
+        self.mark({0: "PRESENT"})  # e.g. from another process: seen by the signature check
+        board.poll()
+        self.assertEqual(self.board_of(board)["submitted"], 1)
+
+        board.changed({self.school.pk, 999})
+        board.poll()
+        self.assertEqual(board.refreshes, 3)
+
+    def test_idle_schools_are_dropped(self, _):
+        board = live.Board(watch_seconds=30)
+        board.current(self.school.pk)
+        with mock.patch.object(live.time, "monotonic", return_value=live.time.monotonic() + 60):
+            board.poll()
+        board.changed({self.school.pk})  # nobody watching any more
+        board.poll()
+        self.assertEqual(board.refreshes, 1)
+
+    def test_data_view(self, _):
+        admin = User.objects.create_user(username="head", password="x", role="SCHOOL_ADMIN", school=self.school)
+        self.client.force_login(admin)
+        self.mark({0: "ABSENT"})
+        with mock.patch.object(live, "board", live.Board()):
+            response = self.client.get(reverse("attendance:live_board_data"))
+            self.assertEqual(response["Content-Type"], "application/json")
+            self.assertEqual(response.json()["submitted"], 1)
+            tag = response["ETag"]
+            response = self.client.get(reverse("attendance:live_board_data"), HTTP_IF_NONE_MATCH=tag)
+            self.assertEqual(response.status_code, 304)
+
+        self.client.force_login(self.teacher)
+        self.assertNotEqual(self.client.get(reverse("attendance:live_board_data")).status_code, 200)
+
+
+class LiveBoardPollerTests(LiveBoardMixin, TransactionTestCase):
+    def test_write_refreshes_watched_board(self):
+        board = live.Board(poll_seconds=30)
+        with mock.patch.object(live, "board", board):
+            tag, _ = board.current(self.school.pk)
+            self.mark({0: "PRESENT", 1: "ABSENT"})
+            deadline = time.monotonic() + 5
+            while board.current(self.school.pk)[0] == tag and time.monotonic() < deadline:
+                time.sleep(0.05)
+        self.assertEqual(board.refreshes, 2)
+        self.assertEqual(self.board_of(board)["classes"][0]["marked"], 2)
@@ -0,0 +1,159 @@
+# attendance/tests/test_registers.py
+import io
+import tempfile
+import zipfile
+from datetime import date
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from openpyxl import load_workbook
+
+from attendance import archive, register_pdf, registers
+from attendance.models import RegisterJob
+from attendance.services import bulk_mark
+from classes_app.models import ClassProgram
+
+from .helpers import ClassFixtureMixin
+
+
+class AttendanceRegisterTests(ClassFixtureMixin, TestCase):
+    def mark(self, day, statuses, session=None):
+        bulk_mark(
+            school=self.school, class_program=self.class_program, date=day, session=session,
+            statuses={self.students[i].id: status for i, status in statuses.items()}, notify=False,
+        )
+
+    def export(self, **kwargs):
+        stream = io.BytesIO()
+        registers.write_register(stream, school=self.school, **kwargs)
+        stream.seek(0)
+        return load_workbook(stream)
+
+    def test_students_by_days_matrix(self):
+        self.mark(date(2025, 3, 3), {0: "PRESENT", 1: "ABSENT", 2: "LATE"})
+        self.mark(date(2025, 3, 3), {0: "HALF_DAY"}, session=self.session)
+        self.mark(date(2025, 3, 5), {0: "PRESENT", 1: "PRESENT"})
+
+        sheet = self.export(start=date(2025, 3, 1), end=date(2025, 3, 31))["Grade 2B (PRIMARY_1_4)"]
+        rows = list(sheet.iter_rows(values_only=True))
+        self.assertEqual(rows[0][:4], ("Student", "01 Mar", "02 Mar", "03 Mar"))
+        self.assertEqual(rows[0][-5:], ("P", "L", "H", "A", "Rate"))
+        self.assertEqual(len(rows), 1 + len(self.students))  # unmarked roster students too
+
+        by_name = {row[0]: row for row in rows[1:]}
+        # The worst of the day's sessions, then totals and the rate.
+        self.assertEqual(by_name["Student 0"][3], "H")
+        self.assertEqual(by_name["Student 0"][5], "P")
+        self.assertEqual(by_name["Student 0"][-5:], (1, 0, 1, 0, 0.75))
+        self.assertEqual(by_name["Student 1"][3:6], ("A", None, "P"))
+        self.assertEqual(by_name["Student 4"][-5:], (0, 0, 0, 0, None))
+
+    def test_one_sheet_per_class(self):
+        other = ClassProgram.objects.create(school=self.school, division=self.division, name="Grade 3A")
+        self.mark(date(2025, 3, 3), {0: "PRESENT"})
+        workbook = self.export(start=date(2025, 3, 1), end=date(2025, 3, 31))
+        self.assertEqual(workbook.sheetnames, ["Grade 2B (PRIMARY_1_4)"])
+
+        workbook = self.export(start=date(2025, 3, 1), end=date(2025, 3, 31), class_program=other)
+        self.assertEqual(workbook.sheetnames, ["Attendance"])
+
+    def test_archived_years_are_included(self):
+        self.mark(date(2025, 3, 3), {1: "ABSENT"})
+        archive.close_year(self.school, 2024)
+        self.mark(date(2025, 9, 1), {1: "LATE"})
+        sheet = self.export(start=date(2025, 3, 1), end=date(2025, 9, 30)).active
+        row = next(row for row in sheet.iter_rows(values_only=True) if row[0] == "Student 1")
+        self.assertEqual(row[-5:], (0, 1, 0, 1, 0.5))
+
+    def test_range_is_limited(self):
+        with self.assertRaises(ValueError):
+            self.export(start=date(2025, 1, 1), end=date(2026, 1, 31))
+
+    def test_export_view(self):
+        self.mark(date(2025, 3, 3), {0: "ABSENT"})
+        self.client.force_login(self.teacher)
+        response = self.client.get(
+            reverse("attendance:register_export"), {"month": "2025-03", "class_program": self.class_program.pk}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("attendance_grade-2b_20250301_20250331.xlsx", response["Content-Disposition"])
+        sheet = load_workbook(io.BytesIO(b"".join(response.streaming_content))).active
+        self.assertEqual(sheet.max_column, 1 + 31 + 5)
+
+        response = self.client.get(reverse("attendance:register_export"), {"month": "March"})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(prefix="registers-test-"))
+class RegisterJobTests(ClassFixtureMixin, TestCase):
+    month = date(2025, 3, 1)
+
+    def setUp(self):
+        super().setUp()
+        self.other = ClassProgram.objects.create(school=self.school, division=self.division, name="Grade 3A")
+        self.students[4].class_program = self.other
+        self.students[4].save()
+        bulk_mark(
+            school=self.school, class_program=self.class_program, date=date(2025, 3, 3), session=None,
+            statuses={self.students[0].id: "ABSENT", self.students[1].id: "PRESENT"}, notify=False,
+        )
+
+    def pdfs(self, job):
+        with job.file.open("rb") as stream, zipfile.ZipFile(stream) as archive_file:
+            return {name: archive_file.read(name) for name in archive_file.namelist()}
+
+    def test_build_renders_a_pdf_per_class(self):
+        job = RegisterJob.objects.create(school=self.school, month=self.month)
+        for workers in (1, 2):  # inline, then in a process pool
+            with self.subTest(workers=workers):
+                job = registers.build_job(registers.claim_job() or job, workers=workers)
+                self.assertEqual(job.status, RegisterJob.Status.DONE, job.error)
+                self.assertEqual((job.done, job.total, job.progress), (2, 2, 100))
+                pdfs = self.pdfs(job)
+                self.assertEqual(sorted(pdfs), ["001-grade-2b-primary_1_4.pdf", "002-grade-3a-primary_1_4.pdf"])
+                self.assertTrue(all(pdf.startswith(b"%PDF") for pdf in pdfs.values()))
+
+    def test_failed_job_keeps_its_progress(self):
+        rendered, original = [], register_pdf.render
+
+        def render(payload):
+            if rendered:
+                raise RuntimeError("renderer crashed")
+            rendered.append(payload)
+            return original(payload)
+
+        RegisterJob.objects.create(school=self.school, month=self.month)
+        with mock.patch.object(registers.register_pdf, "render", side_effect=render):
+            job = registers.build_job(registers.claim_job(), workers=1)
+        self.assertEqual(job.status, RegisterJob.Status.FAILED)
+        self.assertEqual(job.error, "renderer crashed")
+        job = RegisterJob.objects.get(pk=job.pk)
+        self.assertEqual((job.done, job.total), (1, 2))
+
+    def test_claim_takes_each_job_once(self):
+        job = RegisterJob.objects.create(school=self.school, month=self.month, class_program=self.other)
+        self.assertEqual(registers.claim_job(), job)
+        self.assertIsNone(registers.claim_job())
+        self.assertEqual(RegisterJob.objects.get().status, RegisterJob.Status.RUNNING)
+
+    def test_queue_poll_and_download(self):
+        self.client.force_login(self.teacher)
+        response = self.client.post(
+            reverse("attendance:register_jobs"), {"month": "2025-03", "class_program": self.class_program.pk}
+        )
+        self.assertRedirects(response, reverse("attendance:register_jobs"))
+        job = RegisterJob.objects.get()
+        self.assertEqual((job.month, job.class_program, job.requested_by), (self.month, self.class_program, self.teacher))
+
+        status = self.client.get(reverse("attendance:register_job_status", args=[job.pk])).json()
+        self.assertEqual(status["status"], "PENDING")
+        self.assertEqual(self.client.get(reverse("attendance:register_job_download", args=[job.pk])).status_code, 404)
+
+        call_command("build_attendance_registers", "--once", "--workers", "1", stdout=io.StringIO())
+        status = self.client.get(reverse("attendance:register_job_status", args=[job.pk])).json()
+        self.assertEqual((status["status"], status["done"], status["total"]), ("DONE", 1, 1))
+        response = self.client.get(reverse("attendance:register_job_download", args=[job.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("registers-2025-03-grade-2b.zip", response["Content-Disposition"])
@@ -0,0 +1,61 @@
+# attendance/tests/test_rollups.py
+from datetime import date
+
+from django.test import TestCase
+
+from attendance import rollups
+from attendance.models import Attendance, AttendanceDailySummary
+from attendance.services import bulk_mark
+
+from .helpers import ClassFixtureMixin
+
+
+class DailySummaryTests(ClassFixtureMixin, TestCase):
+    day = date(2025, 3, 3)
+
+    def mark(self, statuses, session=None):
+        return bulk_mark(
+            school=self.school, class_program=self.class_program, date=self.day,
+            session=session, statuses=statuses, notify=False,
+        )
+
+    def counts(self):
+        return rollups.totals(AttendanceDailySummary.objects.filter(school=self.school))
+
+    def test_bulk_mark_moves_counts_between_statuses(self):
+        self.mark({s.id: "PRESENT" for s in self.students}, session=self.session)
+        self.mark({self.students[0].id: "ABSENT", self.students[1].id: "LATE"}, session=self.session)
+
+        counts = self.counts()
+        self.assertEqual(
+            (counts["present"], counts["absent"], counts["late"], counts["total"]),
+            (len(self.students) - 2, 1, 1, len(self.students)),
+        )
+        self.assertEqual(AttendanceDailySummary.objects.count(), 1)
+
+    def test_single_row_edit_and_delete(self):
+        row = Attendance.objects.create(
+            school=self.school, student=self.students[0], class_program=self.class_program,
+            date=self.day, status="PRESENT",
+        )
+        row.status = "HALF_DAY"
+        row.save()
+        self.assertEqual((self.counts()["present"], self.counts()["half_day"]), (0, 1))
+
+        row.delete()
+        self.assertEqual(self.counts()["total"], 0)
+
+    def test_rebuild_matches_incremental_counts(self):
+        self.mark({s.id: "PRESENT" for s in self.students})
+        self.mark({self.students[2].id: "ABSENT"})
+        expected = self.counts()
+
+        AttendanceDailySummary.objects.all().delete()
+        self.assertEqual(rollups.rebuild(school=self.school), 1)
+        self.assertEqual(self.counts(), expected)
+
+    def test_by_date_is_one_query(self):
+        self.mark({s.id: "PRESENT" for s in self.students})
+        with self.assertNumQueries(1):
+            days = rollups.by_date(AttendanceDailySummary.objects.filter(school=self.school))
+        self.assertEqual([(d["date"], d["present"]) for d in days], [(self.day, len(self.students))])
@@ -0,0 +1,85 @@
+# attendance/tests/test_rosters.py
+from datetime import date
+
+from django.test import TestCase
+from django.urls import reverse
+
+from attendance import rosters
+from attendance.forms import AttendanceBulkStatusForm
+from attendance.models import RosterSnapshot
+from attendance.services import bulk_mark
+from classes_app.models import ClassProgram
+from students.models import Student
+
+from .helpers import ClassFixtureMixin
+
+
+class RosterSnapshotTests(ClassFixtureMixin, TestCase):
+    day = date(2025, 3, 3)
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.teacher)
+        self.url = reverse("attendance:roster_api")
+        self.params = {"class_program_id": self.class_program.id, "date": self.day.isoformat()}
+
+    def test_snapshot_is_rebuilt_only_after_enrolment_changes(self):
+        first = rosters.current(self.class_program)
+        self.assertEqual([pk for pk, _ in first.students], sorted(s.id for s in self.students))
+        with self.assertNumQueries(1):
+            rosters.current(self.class_program)
+
+        other = ClassProgram.objects.create(school=self.school, division=self.division, name="Grade 3A")
+        moved = self.students[0]
+        moved.class_program = other
+        moved.save()
+
+        snapshot = RosterSnapshot.objects.get(pk=self.class_program.pk)
+        self.assertEqual(snapshot.version, first.version + 1)
+        self.assertNotIn(moved.id, [pk for pk, _ in rosters.current(self.class_program).students])
+
+    def test_unchanged_roster_is_a_304(self):
+        first = self.client.get(self.url, self.params)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(len(first.json()), len(self.students))
+
+        again = self.client.get(self.url, self.params, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(again.status_code, 304)
+
+    def test_etag_changes_with_marks_and_enrolment(self):
+        etag = self.client.get(self.url, self.params)["ETag"]
+        bulk_mark(
+            school=self.school, class_program=self.class_program, date=self.day, session=None,
+            statuses={self.students[0].id: "ABSENT"}, notify=False,
+        )
+        marked = self.client.get(self.url, self.params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(marked.status_code, 200)
+        statuses = {row["id"]: row["status"] for row in marked.json()}
+        self.assertEqual(statuses[self.students[0].id], "ABSENT")
+
+        Student.objects.create(
+            school=self.school, division=self.division, class_program=self.class_program,
+            full_name="Newcomer", parent_name="Parent", parent_phone="",
+        )
+        enrolled = self.client.get(self.url, self.params, HTTP_IF_NONE_MATCH=marked["ETag"])
+        self.assertEqual(enrolled.status_code, 200)
+        self.assertIn("Newcomer", [row["name"] for row in enrolled.json()])
+
+    def test_bulk_form_only_offers_the_class_roster(self):
+        other = ClassProgram.objects.create(school=self.school, division=self.division, name="Grade 3A")
+        outsider = Student.objects.create(
+            school=self.school, division=self.division, class_program=other,
+            full_name="Outsider", parent_name="Parent", parent_phone="",
+        )
+        data = {
+            "class_program_id": self.class_program.id, "date": self.day.isoformat(), "status": "PRESENT",
+            "student_ids": [self.students[0].id, outsider.id],
+        }
+        form = AttendanceBulkStatusForm(data, school=self.school)
+        self.assertEqual(len(form.fields["student_ids"].choices), len(self.students))
+        self.assertFalse(form.is_valid())
+
+        data["student_ids"] = [self.students[0].id]
+        form = AttendanceBulkStatusForm(data, school=self.school)
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.cleaned_data["student_ids"], [self.students[0].id])
@@ -0,0 +1,153 @@
+# attendance/tests/test_services.py
+from datetime import date, timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from attendance.models import Attendance, AttendanceLog
+from attendance import services
+from attendance.services import bulk_mark
+from students.models import Student
+
+from .helpers import ClassFixtureMixin
+
+
+class BulkMarkTests(ClassFixtureMixin, TestCase):
+    day = date(2025, 3, 3)
+
+    def mark(self, statuses, session=None, **kwargs):
+        return bulk_mark(
+            school=self.school, class_program=self.class_program, date=self.day,
+            session=session, statuses=statuses, **kwargs,
+        )
+
+    def test_marks_whole_class_with_one_log_insert(self):
+        statuses = {s.id: "PRESENT" for s in self.students}
+        with mock.patch("attendance.services.process_attendance_changes") as notify:
+            with self.captureOnCommitCallbacks(execute=True):
+                result = self.mark(statuses, session=self.session)
+
+        self.assertEqual(result.created, len(self.students))
+        self.assertEqual(Attendance.objects.filter(session=self.session).count(), len(self.students))
+        self.assertEqual(AttendanceLog.objects.count(), len(self.students))
+        notify.assert_called_once()
+        self.assertEqual(len(notify.call_args.args[0]), len(self.students))
+
+    def test_row_written_while_waiting_for_the_lock_is_an_update(self):
+        student = self.students[0]
+        lock_students = services.lock_students
+
+        def racing(student_ids):
+            # Another writer held the students and committed its insert first.
+            lock_students(student_ids)
+            Attendance.objects.get_or_create(
+                school=self.school, student=student, class_program=self.class_program,
+                date=self.day, session=self.session, defaults={"status": "ABSENT"},
+            )
+
+        with mock.patch.object(services, "lock_students", side_effect=racing):
+            result = self.mark({student.id: "PRESENT"}, session=self.session, notify=False)
+
+        self.assertEqual((result.created, result.updated), (0, 1))
+        self.assertFalse(result.changes[0].created)
+        log = AttendanceLog.objects.get(attendance__student=student, new_status="PRESENT")
+        self.assertEqual(log.previous_status, "ABSENT")
+
+    def test_upsert_updates_only_changed_rows(self):
+        for session in (self.session, None):
+            self.mark({s.id: "PRESENT" for s in self.students}, session=session, notify=False)
+            statuses = {s.id: "PRESENT" for s in self.students}
+            statuses[self.students[0].id] = "ABSENT"
+
+            result = self.mark(statuses, session=session, notify=False)
+
+            self.assertEqual((result.created, result.updated, result.unchanged), (0, 1, len(self.students) - 1))
+            row = Attendance.objects.get(student=self.students[0], session=session)
+            self.assertEqual(row.status, "ABSENT")
+            log = AttendanceLog.objects.filter(attendance=row).latest("id")
+            self.assertEqual((log.previous_status, log.new_status), ("PRESENT", "ABSENT"))
+
+    def test_query_count_does_not_grow_with_class_size(self):
+        statuses = {s.id: "ABSENT" for s in self.students}
+        # closed-year check (the fixture date is in a past academic year), student
+        # lock, read, upsert, log insert, summary update/insert, streak
+        # read/lock/insert, bitmap read/lock/insert/re-lock/update, plus savepoints
+        with self.assertNumQueries(25):
+            self.mark(statuses, session=self.session, notify=False)
+
+    def test_batch_notifications_escalate_consecutive_absence(self):
+        from notifications.models import StudentAlert
+
+        student = self.students[0]
+        bulk_mark(
+            school=self.school, class_program=self.class_program, date=date(2025, 3, 2),
+            session=None, statuses={student.id: "ABSENT"}, marked_by=self.teacher, notify=False,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.mark({student.id: "ABSENT"}, marked_by=self.teacher)
+
+        alert = StudentAlert.objects.get(student=student, kind=StudentAlert.CONSECUTIVE_ABSENCE)
+        self.assertIn("absent 2 consecutive days", alert.message)
+
+    def test_alerts_are_per_student_and_deduped(self):
+        from notifications.models import Announcement, OutboxMessage, StudentAlert
+
+        student = self.students[0]
+        Student.objects.filter(pk=student.pk).update(parent_phone="+251900000000")
+        for status in ("ABSENT", "PRESENT", "ABSENT"):
+            self.mark({student.id: status}, marked_by=self.teacher)
+
+        kinds = sorted(StudentAlert.objects.filter(student=student).values_list("kind", flat=True))
+        # One ABSENT alert for the day; the two corrections differ in direction
+        self.assertEqual(kinds, ["ABSENT", "CORRECTED", "CORRECTED"])
+        self.assertEqual(OutboxMessage.objects.filter(channel=OutboxMessage.SMS).count(), 2)
+        self.assertFalse(Announcement.objects.filter(category="ATTENDANCE").exists())
+
+    def test_alert_written_by_a_concurrent_batch_is_not_delivered_twice(self):
+        from notifications.models import OutboxMessage, StudentAlert
+
+        student = self.students[0]
+        Student.objects.filter(pk=student.pk).update(parent_phone="+251900000000")
+        bulk_create = StudentAlert.objects.bulk_create
+
+        def racing_bulk_create(alerts, **kwargs):
+            # Another submission inserts (and delivers) the same alert first.
+            alerts = list(alerts)
+            rival = StudentAlert(
+                school=self.school, student=student, kind=alerts[0].kind, date=alerts[0].date,
+                message=alerts[0].message, dedupe_key=alerts[0].dedupe_key,
+            )
+            rival.save()
+            return bulk_create(alerts, **kwargs)
+
+        self.mark({student.id: "ABSENT"}, marked_by=self.teacher)
+        sent = OutboxMessage.objects.count()
+        with mock.patch.object(StudentAlert.objects, "bulk_create", side_effect=racing_bulk_create):
+            self.mark({student.id: "PRESENT"}, marked_by=self.teacher)  # a correction, texted to the parent
+
+        self.assertTrue(StudentAlert.objects.filter(student=student, kind=StudentAlert.CORRECTED).exists())
+        self.assertEqual(OutboxMessage.objects.count(), sent)
+
+    def test_digest_mode_sends_one_message_per_parent_channel(self):
+        from notifications.models import OutboxMessage
+
+        siblings = self.students[:2]
+        Student.objects.filter(id__in=[s.id for s in siblings]).update(parent_phone="+251900000000")
+        with mock.patch("attendance.signals.DIGEST_MINUTES", 60):
+            for status in ("PRESENT", "LATE", "ABSENT"):
+                self.mark({s.id: status for s in siblings}, marked_by=self.teacher)
+
+        # Four corrections across two children, one SMS to the shared number
+        digest = OutboxMessage.objects.get(channel=OutboxMessage.SMS)
+        self.assertGreater(digest.next_attempt_at, timezone.now() + timedelta(minutes=59))
+        lines = digest.body.splitlines()
+        self.assertEqual(lines[0], f"Attendance updates from {self.school.name}")
+        self.assertEqual(len(lines), 1 + 4)
+        self.assertIn(f"• {siblings[1].full_name}, ", lines[-1])
+
+    def test_session_may_be_given_as_a_form_id(self):
+        self.mark({self.students[0].id: "PRESENT"}, session=self.session)
+        result = self.mark({self.students[0].id: "ABSENT"}, session=str(self.session.pk), notify=False)
+        self.assertEqual((result.created, result.updated), (0, 1))
+
@@ -0,0 +1,97 @@
+# attendance/tests/test_streaks.py
+from datetime import date, timedelta
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from attendance.models import Attendance, AttendanceStreak
+from attendance.services import bulk_mark
+from attendance.streaks import rebuild
+
+from .helpers import ClassFixtureMixin
+
+
+class AttendanceStreakTests(ClassFixtureMixin, TestCase):
+    start = date(2025, 3, 3)
+
+    def mark(self, day, status, student=None, session=None):
+        student = student or self.students[0]
+        return bulk_mark(
+            school=self.school, class_program=self.class_program, date=day,
+            session=session, statuses={student.id: status}, notify=False,
+        )
+
+    def streak(self, student=None):
+        return AttendanceStreak.objects.get(student=student or self.students[0])
+
+    def test_consecutive_absences_increment_and_reset(self):
+        for offset in range(3):
+            self.mark(self.start + timedelta(days=offset), "ABSENT")
+        self.assertEqual(self.streak().current_absent_streak, 3)
+
+        self.mark(self.start + timedelta(days=3), "PRESENT")
+        streak = self.streak()
+        self.assertEqual((streak.current_absent_streak, streak.longest_absent_streak), (0, 3))
+
+    def test_remarking_latest_day_replaces_it(self):
+        self.mark(self.start, "ABSENT")
+        self.mark(self.start + timedelta(days=1), "ABSENT")
+        self.mark(self.start + timedelta(days=1), "PRESENT")
+        self.assertEqual(self.streak().current_absent_streak, 0)
+        self.mark(self.start + timedelta(days=1), "ABSENT")
+        self.assertEqual(self.streak().current_absent_streak, 2)
+
+    def test_remarking_latest_day_restores_longest(self):
+        self.mark(self.start, "PRESENT")
+        self.mark(self.start + timedelta(days=1), "ABSENT")
+        self.mark(self.start + timedelta(days=1), "PRESENT")
+        streak = self.streak()
+        self.assertEqual((streak.current_absent_streak, streak.longest_absent_streak), (0, 0))
+
+    def test_moving_a_row_to_another_day_updates_both(self):
+        self.mark(self.start, "PRESENT")
+        self.mark(self.start + timedelta(days=1), "ABSENT")
+        row = Attendance.objects.get(student=self.students[0], date=self.start + timedelta(days=1))
+        row.date = self.start + timedelta(days=2)
+        row.save()
+        self.mark(self.start + timedelta(days=3), "ABSENT")
+
+        streak = self.streak()
+        self.assertEqual((streak.current_absent_streak, streak.longest_absent_streak), (2, 2))
+        self.assertEqual(streak.last_date, self.start + timedelta(days=3))
+
+    def test_day_is_absent_only_if_every_session_is(self):
+        self.mark(self.start, "ABSENT", session=self.session)
+        self.mark(self.start, "PRESENT")
+        self.assertEqual(self.streak().current_absent_streak, 0)
+
+    def test_editing_a_past_day_rebuilds_the_student(self):
+        for offset in range(3):
+            self.mark(self.start + timedelta(days=offset), "ABSENT")
+        self.mark(self.start + timedelta(days=1), "PRESENT")
+        streak = self.streak()
+        self.assertEqual((streak.current_absent_streak, streak.longest_absent_streak), (1, 1))
+
+    def test_single_row_save_and_delete(self):
+        row = Attendance.objects.create(
+            school=self.school, student=self.students[1], class_program=self.class_program,
+            date=self.start, status="ABSENT",
+        )
+        self.assertEqual(self.streak(self.students[1]).current_absent_streak, 1)
+        row.delete()
+        self.assertFalse(AttendanceStreak.objects.filter(student=self.students[1]).exists())
+
+    def test_rebuild_matches_incremental_state(self):
+        for offset, status in enumerate(["ABSENT", "ABSENT", "PRESENT", "ABSENT"]):
+            self.mark(self.start + timedelta(days=offset), status)
+        expected = self.streak()
+        AttendanceStreak.objects.all().delete()
+
+        call_command("rebuild_attendance_streaks", stdout=open("/dev/null", "w"))
+
+        rebuilt = self.streak()
+        self.assertEqual(
+            (rebuilt.current_absent_streak, rebuilt.longest_absent_streak, rebuilt.last_date),
+            (expected.current_absent_streak, expected.longest_absent_streak, expected.last_date),
+        )
+        self.assertEqual(rebuild(student_ids=[self.students[2].id]), 0)
@@ -0,0 +1,96 @@
+# attendance/tests/test_sync.py
+import gzip
+import json
+from datetime import date, timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from attendance.models import Attendance, AttendanceLog
+from attendance.services import bulk_mark
+from attendance.sync import SyncError, decode, sync
+
+from .helpers import ClassFixtureMixin
+
+
+class OfflineSyncTests(ClassFixtureMixin, TestCase):
+    day = date(2025, 3, 3)
+
+    def item(self, student, status, marked_at, **extra):
+        return {
+            "student": student.id, "class_program": self.class_program.id, "date": self.day.isoformat(),
+            "session": self.session.id, "status": status, "marked_at": marked_at.isoformat(), **extra,
+        }
+
+    def sync(self, marks, **payload):
+        return sync(school=self.school, user=self.teacher, payload={"marks": marks, **payload})
+
+    def test_new_marks_are_created_offline_and_audited(self):
+        marked_at = timezone.now() - timedelta(hours=2)
+        response = self.sync([self.item(s, "PRESENT", marked_at) for s in self.students])
+
+        self.assertEqual(response["created"], len(self.students))
+        rows = Attendance.objects.filter(session=self.session)
+        self.assertTrue(all(row.offline_created for row in rows))
+        self.assertTrue(all(row.client_marked_at == marked_at for row in rows))
+        self.assertTrue(all("Marked offline" in log.note for log in AttendanceLog.objects.all()))
+
+    def test_last_writer_wins_against_server_edits(self):
+        before_edit = timezone.now() - timedelta(minutes=5)
+        bulk_mark(
+            school=self.school, class_program=self.class_program, date=self.day, session=self.session,
+            statuses={self.students[0].id: "ABSENT", self.students[1].id: "ABSENT"}, notify=False,
+        )
+        after_edit = timezone.now()
+
+        response = self.sync([
+            self.item(self.students[0], "PRESENT", before_edit),  # older than the server: loses
+            self.item(self.students[1], "LATE", after_edit),  # newer: wins
+        ])
+
+        self.assertEqual(response["updated"], 1)
+        self.assertEqual([entry[:3] for entry in response["stale"]], [
+            [0, Attendance.objects.get(student=self.students[0]).pk, "ABSENT"],
+        ])
+        statuses = dict(Attendance.objects.values_list("student_id", "status"))
+        self.assertEqual((statuses[self.students[0].id], statuses[self.students[1].id]), ("ABSENT", "LATE"))
+
+    def test_newest_mark_within_a_batch_wins_and_foreign_ids_are_rejected(self):
+        now = timezone.now()
+        response = self.sync([
+            self.item(self.students[0], "ABSENT", now - timedelta(minutes=2)),
+            self.item(self.students[0], "PRESENT", now - timedelta(minutes=1)),
+            {**self.item(self.students[1], "PRESENT", now), "student": 999999},
+            {"student": "x"},
+        ])
+        self.assertEqual(Attendance.objects.get(student=self.students[0]).status, "PRESENT")
+        self.assertEqual(response["rejected"], [[2, "not_found"], [3, "invalid"]])
+
+    def test_diff_returns_rows_changed_since_last_sync(self):
+        first = self.sync([self.item(self.students[0], "PRESENT", timezone.now())])
+        bulk_mark(
+            school=self.school, class_program=self.class_program, date=self.day, session=self.session,
+            statuses={self.students[3].id: "ABSENT"}, notify=False,
+        )
+        second = self.sync([], since=first["server_time"], classes=[self.class_program.id])
+
+        by_field = [dict(zip(second["fields"], row)) for row in second["changes"]]
+        self.assertEqual({row["student_id"] for row in by_field}, {self.students[0].id, self.students[3].id})
+
+    def test_endpoint_accepts_gzip(self):
+        self.client.force_login(self.teacher)
+        body = gzip.compress(json.dumps(
+            {"marks": [self.item(self.students[0], "ABSENT", timezone.now())]}
+        ).encode())
+        response = self.client.post(
+            reverse("attendance:sync_api"), body, content_type="application/json",
+            headers={"Content-Encoding": "gzip"},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["created"], 1)
+
+    def test_decode_rejects_bad_bodies(self):
+        for body, encoding in [(b"not json", ""), (b"\x1f\x8bjunk", "gzip"), (b'{"marks": 1}', "")]:
+            with self.assertRaises(SyncError):
+                decode(body, encoding)
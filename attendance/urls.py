@@ -7,9 +7,19 @@ from .views import (
     AttendanceBulkMarkStatusView,
     AttendanceHistoryView,
     RosterApiView,
+    AttendanceSyncView,
     AttendanceAnalyticsView,
     AttendanceAnalyticsDataView,
     StudentAttendanceAnalyticsView,
+    ChronicAbsenceView,
+    AttendanceImportView,
+    AttendanceRegisterExportView,
+    RegisterJobListView,
+    RegisterJobStatusView,
+    RegisterJobDownloadView,
+    LiveBoardView,
+    LiveBoardDataView,
+    ClassYearView,
 )
 
 app_name = "attendance"
@@ -21,6 +31,16 @@ urlpatterns = [
     path("bulk/status/", AttendanceBulkMarkStatusView.as_view(), name="bulk_status"),
     path("history/<int:student_id>/", AttendanceHistoryView.as_view(), name="history"),
     path("api/roster/", RosterApiView.as_view(), name="roster_api"), 
+    path("api/sync/", AttendanceSyncView.as_view(), name="sync_api"),
+    path("import/", AttendanceImportView.as_view(), name="import"),
+    path("export/register/", AttendanceRegisterExportView.as_view(), name="register_export"),
+    path("registers/", RegisterJobListView.as_view(), name="register_jobs"),
+    path("registers/<int:pk>/status/", RegisterJobStatusView.as_view(), name="register_job_status"),
+    path("registers/<int:pk>/download/", RegisterJobDownloadView.as_view(), name="register_job_download"),
+    path("live/", LiveBoardView.as_view(), name="live_board"),
+    path("live/board/", LiveBoardDataView.as_view(), name="live_board_data"),
+    path("classes/<int:class_id>/year/", ClassYearView.as_view(), name="class_year"),
+    path("absenteeism/", ChronicAbsenceView.as_view(), name="absenteeism"),
     
     path(
         "analytics/",
@@ -1,20 +1,32 @@
 # attendance_app/views.py
+import tempfile
 from datetime import date as date_cls
 from django.contrib import messages
 from django.db import transaction
-from django.http import HttpResponseBadRequest, JsonResponse
-from django.shortcuts import get_object_or_404
-from django.views.generic import ListView, View
+from django.http import FileResponse, HttpResponse, HttpResponseBadRequest, JsonResponse
+from django.shortcuts import get_object_or_404, redirect
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_date
+from django.utils.decorators import method_decorator
+from django.utils.text import slugify
+from django.views.decorators.gzip import gzip_page
+from django.views.generic import FormView, ListView, View
+from core import downsample, keyset
 from core.mixins import RoleRequiredMixin, UserScopedMixin
-from .models import Attendance, AttendanceLog
+from .models import Attendance, AttendanceLog, AttendanceStreak, RegisterJob
+from . import absenteeism, archive, bitmaps, coalescer, history, importer, live, registers, rosters, services, sync
 from .forms import (
     AttendanceEditForm,
     AttendanceBulkStatusForm,
     AttendanceFilterForm,
+    AttendanceImportForm,
+    AttendanceRegisterForm,
+    RegisterJobForm,
 )
 from classes_app.models import ClassProgram
 from students.models import Student
-from django.db.models import Max, F, Subquery, OuterRef
+from django.db.models import Count, Max, F, Subquery, OuterRef
 from collections import defaultdict
 
 
@@ -24,32 +36,48 @@ class AttendanceListView(RoleRequiredMixin, UserScopedMixin, ListView):
     template_name = "attendance/attendance_list.html"
     context_object_name = "attendances"
     allowed_roles = ["SUPER_ADMIN", "SCHOOL_ADMIN", "TEACHER", "PARENT"]
+    page_size = 50
 
     def get_queryset(self):
-        qs = super().get_queryset().select_related("student", "class_program")
         school = self.get_school()
 
         form = AttendanceFilterForm(self.request.GET or None, school=school)
+        self.selected_class = None
+        filters, day = {}, None
         if form.is_valid():
             cd = form.cleaned_data
-            if cd["class_program"]:
-                qs = qs.filter(class_program=cd["class_program"])
-            if cd["date"]:
-                qs = qs.filter(date=cd["date"])
-            if cd["session"]:
-                qs = qs.filter(session=cd["session"])
-            if cd["status"]:
-                qs = qs.filter(status=cd["status"])
-        return qs.order_by(
-            "class_program__division__name", "class_program__name",
-            "student__full_name", "student__parent_name"
-        )
+            self.selected_class = cd["class_program"]
+            day = cd["date"]
+            filters = {
+                field: cd[field] for field in ("class_program", "session", "status") if cd[field]
+            }
+        if school is None and not self.request.user.is_super_admin():
+            parts = []
+        else:
+            # Live and archived rows (closed years) alike; the same keyset
+            # pages through both.
+            parts = [
+                qs.select_related("student", "class_program")
+                for qs in archive.querysets(school, day, day, **filters)
+            ]
+        # Newest first, paged by keyset on (date, id): see the composite
+        # indexes on Attendance.Meta and benchmark_attendance_list.
+        self.page = keyset.paginate_merged(parts, ["-date", "-id"], self.request.GET.get("after"), self.page_size)
+        return self.page.items
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         school = self.get_school()
         ctx["classes"] = ClassProgram.objects.filter(school=school).order_by("division__name", "name")
         ctx["today"] = date_cls.today()
+        ctx["selected_class"] = self.selected_class
+        params = self.request.GET.copy()
+        params.pop("after", None)
+        ctx["first_page_query"] = params.urlencode()
+        if self.page.has_next:
+            params["after"] = self.page.next_cursor
+            ctx["next_page_query"] = params.urlencode()
+        ctx["is_first_page"] = "after" not in self.request.GET
         return ctx
 
 
@@ -63,6 +91,7 @@ class AttendanceEditView(RoleRequiredMixin, UserScopedMixin, View):
             return HttpResponseBadRequest("; ".join([f"{k}: {','.join(v)}" for k, v in form.errors.items()]))
 
         cd = form.cleaned_data
+        services.lock_students([cd["student"].pk])  # same queue as bulk marks
         att, created = Attendance.objects.select_for_update().get_or_create(
             school = self.get_school(),
             student=cd["student"],
@@ -85,7 +114,7 @@ class AttendanceEditView(RoleRequiredMixin, UserScopedMixin, View):
                 att.status = cd["status"]
                 att.remarks = cd["remarks"]
                 att.marked_by = request.user
-                att.save(update_fields=["status", "remarks", "marked_by"])
+                att.save(update_fields=["status", "remarks", "marked_by", "updated_at", "client_marked_at"])
 
         messages.success(request, f"Attendance {'created' if created else 'updated'} for {cd['student']}.")
         return JsonResponse({"ok": True, "created": created, "attendance_id": att.id})
@@ -94,43 +123,27 @@ class AttendanceEditView(RoleRequiredMixin, UserScopedMixin, View):
 class AttendanceBulkMarkPresentView(RoleRequiredMixin, UserScopedMixin, View):
     allowed_roles = ["SUPER_ADMIN", "SCHOOL_ADMIN", "TEACHER"]
 
-    @transaction.atomic
+    # No view-level transaction: bulk_mark is atomic, and with group commit
+    # on it runs on the writer thread's connection (see attendance.coalescer).
     def post(self, request, *args, **kwargs):
         # Reuse the bulk form, pin status to PRESENT
         mutable = request.POST.copy()
         mutable["status"] = Attendance.Status.PRESENT
         form = AttendanceBulkStatusForm(mutable, school=request.user.school)
-        print("POST data:", mutable)
-        print("Form is valid?", form.is_valid())
-        print("Form errors:", form.errors)
 
         if not form.is_valid():
             return HttpResponseBadRequest("; ".join([f"{k}: {','.join(v)}" for k, v in form.errors.items()]))
 
         cd = form.cleaned_data
-        created_count = 0
-        for stu in cd["students"]:
-            att, created = Attendance.objects.get_or_create(
-                school = self.get_school(),
-                student=stu,
-                class_program=cd["class_program"],
-                date=cd["date"],
-                session=cd["session"],
-                defaults={"status": cd["status"], "marked_by": request.user},
-            )
-            if created:
-                created_count += 1
-            elif att.status != cd["status"]:
-                AttendanceLog.objects.create(
-                    school = self.get_school(),
-                    attendance=att,
-                    previous_status=att.status,
-                    new_status=cd["status"],
-                    changed_by=request.user,
-                )
-                att.status = cd["status"]
-                att.marked_by = request.user
-                att.save(update_fields=["status", "marked_by"])
+        result = coalescer.bulk_mark(
+            school=self.get_school(),
+            class_program=cd["class_program"],
+            date=cd["date"],
+            session=cd["session"],
+            statuses={student_id: cd["status"] for student_id in cd["student_ids"]},
+            marked_by=request.user,
+        )
+        created_count = result.created
 
         messages.success(request, f"Marked {created_count} new records as PRESENT.")
         return JsonResponse({"ok": True, "created": created_count})
@@ -139,46 +152,38 @@ class AttendanceBulkMarkPresentView(RoleRequiredMixin, UserScopedMixin, View):
 class AttendanceBulkMarkStatusView(RoleRequiredMixin,UserScopedMixin, View):
     allowed_roles = ["SUPER_ADMIN", "SCHOOL_ADMIN", "TEACHER"]
 
-    @transaction.atomic
     def post(self, request, *args, **kwargs):
         form = AttendanceBulkStatusForm(request.POST, school=request.user.school)
         if not form.is_valid():
             return HttpResponseBadRequest("; ".join([f"{k}: {','.join(v)}" for k, v in form.errors.items()]))
 
         cd = form.cleaned_data
-        updates = 0
-        for stu in cd["students"]:
-            att, created = Attendance.objects.get_or_create(
-                student=stu,
-                school = self.get_school(),
-                class_program=cd["class_program"],
-                date=cd["date"],
-                session=cd["session"],
-                defaults={"status": cd["status"], "marked_by": request.user},
-            )
-            if not created and att.status != cd["status"]:
-                AttendanceLog.objects.create(
-                    school = self.get_school(),
-                    attendance=att,
-                    previous_status=att.status,
-                    new_status=cd["status"],
-                    changed_by=request.user,
-                )
-                att.status = cd["status"]
-                att.marked_by = request.user
-                att.save(update_fields=["status", "marked_by"])
-                updates += 1
+        result = coalescer.bulk_mark(
+            school=self.get_school(),
+            class_program=cd["class_program"],
+            date=cd["date"],
+            session=cd["session"],
+            statuses={student_id: cd["status"] for student_id in cd["student_ids"]},
+            marked_by=request.user,
+        )
+        updates = result.updated
 
         messages.success(request, f"Updated {updates} records to {cd['status']}.")
         return JsonResponse({"ok": True, "updated": updates})
 
 
 class AttendanceHistoryView(RoleRequiredMixin, UserScopedMixin, ListView):
+    """
+    A student's change log, newest first, paged by keyset on (changed_at, id)
+    via ?before=<cursor>, with closed years' changes after the last page;
+    stats, monthly breakdown and absence runs cover live and archived rows
+    and are computed in the database (see attendance.history).
+    """
     model = AttendanceLog
     template_name = "attendance/attendance_history.html"
     context_object_name = "logs"
     allowed_roles = ["SUPER_ADMIN", "SCHOOL_ADMIN", "TEACHER"]
-    paginate_by = 100  # safe default for long histories
+    page_size = 100  # safe default for long histories
 
     def get_queryset(self):
         student_id = self.kwargs["student_id"]
@@ -191,8 +196,9 @@ class AttendanceHistoryView(RoleRequiredMixin, UserScopedMixin, ListView):
             "attendance",
             "changed_by",
             "attendance__student",
-            "attendance__class_program"
-        ).order_by("-changed_at")
+            "attendance__class_program",
+            "attendance__session",
+        )
 
         # Filters from GET
         start = self.request.GET.get("start")
@@ -212,38 +218,70 @@ class AttendanceHistoryView(RoleRequiredMixin, UserScopedMixin, ListView):
         if status:
             qs = qs.filter(new_status__iexact=status)
 
-        return qs
+        page = keyset.paginate(qs, ["-changed_at", "-id"], self.request.GET.get("before"), self.page_size)
+        self.next_cursor = page.next_cursor
+        return page.items
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        daily_last_status = {}
-        logs_qs = self.get_queryset()
-        for log in logs_qs.order_by('changed_at'):
-            day = log.changed_at.date()
-            daily_last_status[day] = log.new_status  # overwrite previous, so latest stays
-
-        # Count stats
-        from collections import Counter
-        stats_counter = Counter(daily_last_status.values())
-        ctx["stats"] = {
-            "present": stats_counter.get("PRESENT", 0),
-            "absent": stats_counter.get("ABSENT", 0),
-            "late": stats_counter.get("LATE", 0),
-            "half_day": stats_counter.get("HALF_DAY", 0),
-            "total": len(daily_last_status),
-        }
-
+        records = history.records(
+            self.kwargs["student_id"],
+            school=self.get_school(),
+            start=self.request.GET.get("start") or None,
+            end=self.request.GET.get("end") or None,
+        )
+        ctx["stats"] = history.totals(records)
+        ctx["monthly"] = history.monthly(records)
+        runs = history.absence_runs(records)
+        ctx["absence_runs"] = runs
+        ctx["current_absence_run"] = runs[0] if runs and runs[0]["is_current"] else None
+        if not self.next_cursor:
+            # Closed years' corrections follow the last page of the live log.
+            ctx["archived_changes"] = history.archived_changes(
+                self.kwargs["student_id"],
+                school=self.get_school(),
+                start=self.request.GET.get("start") or None,
+                end=self.request.GET.get("end") or None,
+                status=self.request.GET.get("status") or None,
+            )
 
         # Keep original GET filter values to re-populate the controls
         ctx["filter_start"] = self.request.GET.get("start", "")
         ctx["filter_end"] = self.request.GET.get("end", "")
         ctx["filter_status"] = self.request.GET.get("status", "")
 
+        params = self.request.GET.copy()
+        params.pop("before", None)
+        if self.next_cursor:
+            params["before"] = self.next_cursor
+            ctx["older_query"] = params.urlencode()
+        ctx["is_first_page"] = "before" not in self.request.GET
+
         return ctx
-    
+
+
+@method_decorator(gzip_page, name="dispatch")
+class AttendanceSyncView(RoleRequiredMixin, UserScopedMixin, View):
+    """Batch upload of offline marks; see attendance.sync for the payload."""
+    allowed_roles = ["SUPER_ADMIN", "SCHOOL_ADMIN", "TEACHER"]
+
+    def post(self, request, *args, **kwargs):
+        school = self.get_school()
+        if school is None:
+            return HttpResponseBadRequest("Offline sync needs a school account.")
+        try:
+            payload = sync.decode(request.body, request.headers.get("Content-Encoding", ""))
+        except sync.SyncError as e:
+            return HttpResponseBadRequest(str(e))
+        return JsonResponse(sync.sync(school=school, user=request.user, payload=payload))
+
 
 class RosterApiView(RoleRequiredMixin, View):
-    """Return roster for a class + date + session with current attendance statuses."""
+    """
+    Return roster for a class + date + session with current attendance statuses.
+    The ETag covers the roster version and the marks, so a repeat fetch of an
+    unchanged class is answered with 304 before the roster is read.
+    """
     allowed_roles = ["SUPER_ADMIN", "SCHOOL_ADMIN", "TEACHER"]
 
     def get(self, request, *args, **kwargs):
@@ -255,28 +293,36 @@ class RosterApiView(RoleRequiredMixin, View):
             return HttpResponseBadRequest("class_program_id and date are required.")
 
         class_program = get_object_or_404(ClassProgram, pk=class_id, school=school)
-        students = Student.objects.filter(class_program=class_program, school=school).order_by("full_name")
+        marks = Attendance.objects.filter(class_program=class_program, date=dt, session=session)
+        state = marks.order_by().aggregate(count=Count("id"), last=Max("updated_at"))
+        etag = '"{}-{}-{}-{}-{}"'.format(
+            class_program.pk, rosters.version(class_program), session or "",
+            state["count"], state["last"].timestamp() if state["last"] else 0,
+        )
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
 
+        roster = rosters.current(class_program)
         # Fetch existing attendance for this date/session
-        att_map = {
-            (a.student_id): a.status
-            for a in Attendance.objects.filter(
-                class_program=class_program, date=dt, session=session
-            ).only("student_id", "status")
-        }
+        att_map = dict(marks.values_list("student_id", "status"))
 
         payload = [
-            {"id": s.id, "name": f"{s.full_name}", "status": att_map.get(s.id)}
-            for s in students
+            {"id": student_id, "name": name, "status": att_map.get(student_id)}
+            for student_id, name in roster.students
         ]
-        return JsonResponse(payload, safe=False)
+        response = JsonResponse(payload, safe=False)
+        response["ETag"] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
 
 
 import json
 from django.views.generic import TemplateView, View
 from django.db.models import Count, Q, F
 from django.http import JsonResponse
-from .models import Attendance
+from .models import Attendance, AttendanceDailySummary
+from . import rollups
 from students.models import Student
 from classes_app.models import ClassProgram, Division
 
@@ -296,28 +342,34 @@ class AttendanceAnalyticsView(UserScopedMixin, TemplateView):
         cid   = self.request.GET.get("class_id")
         did   = self.request.GET.get("division_id")
 
-        qs = Attendance.objects.all()
+        summaries = AttendanceDailySummary.objects.all()
+        row_filters = {}
         if school:
-            qs = qs.filter(school=school)
+            summaries = summaries.filter(school=school)
 
         # Apply GET filters
         if did:
-            qs = qs.filter(class_program__division_id=did)
+            row_filters["class_program__division_id"] = did
+            summaries = summaries.filter(class_program__division_id=did)
         if cid:
-            qs = qs.filter(class_program_id=cid)
+            row_filters["class_program_id"] = cid
+            summaries = summaries.filter(class_program_id=cid)
         if start:
-            qs = qs.filter(date__gte=start)
+            summaries = summaries.filter(date__gte=start)
         if end:
-            qs = qs.filter(date__lte=end)
+            summaries = summaries.filter(date__lte=end)
 
         # --- Summary cards ---
-        total_students = qs.values("student").distinct().count()
-        attended = qs.filter(status="PRESENT").count()
-        total_records = qs.count()
-        avg_att = round((attended / total_records) * 100, 1) if total_records else 0
-        absences = qs.filter(status="ABSENT").count()
-        lates = qs.filter(status="LATE").count()
-        half_days = qs.filter(status="HALF_DAY").count()
+        # Distinct students needs the raw rows, closed years included; every
+        # count comes from the rollup.
+        total_students = archive.student_count(
+            archive.querysets(school, parse_date(start or ""), parse_date(end or ""), **row_filters)
+        )
+        counts = rollups.totals(summaries)
+        avg_att = round((counts["present"] / counts["total"]) * 100, 1) if counts["total"] else 0
+        absences = counts["absent"]
+        lates = counts["late"]
+        half_days = counts["half_day"]
 
         # Only divisions and classes within the school
         allowed_divisions = Division.objects.filter(school=school) if school else Division.objects.all()
@@ -342,60 +394,58 @@ class AttendanceAnalyticsDataView(View):
       • trend: daily attendance %
       • stacked: counts per status over time
       • top_absent: list of top‐5 absentees
+
+    trend and stacked are cut to at most `points` days (default and cap:
+    CHART_MAX_POINTS) by LTTB on the attendance %, the same days for both.
     """
     def get(self, request):
         start = request.GET.get("start")
         end   = request.GET.get("end")
         cid   = request.GET.get("class_id")
-        qs    = Attendance.objects.all()
+        summaries = AttendanceDailySummary.objects.all()
+        row_filters = {}
 
         if cid:
-            qs = qs.filter(class_program_id=cid)
+            row_filters["class_program_id"] = cid
+            summaries = summaries.filter(class_program_id=cid)
         if start:
-            qs = qs.filter(date__gte=start)
+            summaries = summaries.filter(date__gte=start)
         if end:
-            qs = qs.filter(date__lte=end)
+            summaries = summaries.filter(date__lte=end)
+        # Raw rows, live and archived, for what the rollup can't answer.
+        rows = archive.querysets(None, parse_date(start or ""), parse_date(end or ""), **row_filters)
 
         # --- SUMMARY ---
-        total_students = qs.values("student").distinct().count()
-        present_count  = qs.filter(status="PRESENT").count()
-        total_records  = qs.count()
+        counts         = rollups.totals(summaries)
+        total_students = archive.student_count(rows)
+        present_count  = counts["present"]
+        total_records  = counts["total"]
         avg_att        = round((present_count / total_records) * 100, 1) if total_records else 0
-        absences_count = qs.filter(status="ABSENT").count()
-        late_count     = qs.filter(status="LATE").count()
-        half_day_count = qs.filter(status="HALF_DAY").count()
-
-        # --- TREND: daily attendance % ---
-        daily = (
-          qs.values("date")
-            .annotate(
-              present=Count("id", filter=Q(status="PRESENT")),
-              total=Count("id")
-            )
-            .order_by("date")
-        )
-        trend_labels = [d["date"].isoformat() for d in daily]
+        absences_count = counts["absent"]
+        late_count     = counts["late"]
+        half_day_count = counts["half_day"]
+
+        # --- TREND: daily attendance % (one grouped scan of the rollup) ---
+        daily = rollups.by_date(summaries)
         trend_values = [
           round(d["present"] / d["total"] * 100, 1) if d["total"] else 0
           for d in daily
         ]
+        kept = downsample.lttb(
+          trend_values,
+          downsample.points(request.GET.get("points")),
+          xs=[d["date"].toordinal() for d in daily],
+        )
+        daily = downsample.take(kept, daily)
+        trend_values = downsample.take(kept, trend_values)
+        trend_labels = [d["date"].isoformat() for d in daily]
 
         # --- STACKED: counts per status by date ---
         statuses = ["PRESENT","ABSENT","LATE","HALF_DAY"]
-        stacked = {s: [] for s in statuses}
-        for d in daily:
-            for s in statuses:
-                stacked[s].append(
-                  qs.filter(date=d["date"], status=s).count()
-                )
+        stacked = {s: [d[rollups.STATUS_FIELDS[s]] for d in daily] for s in statuses}
 
         # --- TOP ABSENT STUDENTS ---
-        top_absent = (
-          qs.filter(status="ABSENT")
-            .values(name=F("student__full_name"))
-            .annotate(absences=Count("id"))
-            .order_by("-absences")[:5]
-        )
+        top_absent = archive.top_absent(rows, limit=5)
 
         return JsonResponse({
           "summary": {
@@ -428,4 +478,215 @@ class StudentAttendanceAnalyticsView(AttendanceAnalyticsView):
         self.student_id = kwargs["student_id"]
         ctx = super().get_context_data(**kwargs)
         ctx["student"] = Student.objects.get(pk=self.student_id)
+        streak = AttendanceStreak.objects.filter(student_id=self.student_id).first()
+        ctx["absent_streak"] = streak.current_absent_streak if streak else 0
+        ctx["longest_absent_streak"] = streak.longest_absent_streak if streak else 0
+        return ctx
+
+
+class ChronicAbsenceView(RoleRequiredMixin, UserScopedMixin, ListView):
+    """The latest weekly absenteeism run, worst first (see attendance.absenteeism)."""
+    template_name = "attendance/chronic_absence.html"
+    context_object_name = "flagged"
+    allowed_roles = ["SUPER_ADMIN", "SCHOOL_ADMIN", "TEACHER"]
+    paginate_by = 100
+
+    def get_queryset(self):
+        return absenteeism.latest(self.get_school()).order_by("rank")
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        first = ctx["flagged"][0] if ctx["flagged"] else None
+        ctx["as_of"] = first.as_of if first else None
+        ctx["threshold"] = round(absenteeism.THRESHOLD * 100)
+        return ctx
+
+
+class AttendanceImportView(RoleRequiredMixin, UserScopedMixin, FormView):
+    """Upload of historical attendance (see attendance.importer); no parent notifications."""
+    template_name = "attendance/attendance_import.html"
+    form_class = AttendanceImportForm
+    allowed_roles = ["SUPER_ADMIN", "SCHOOL_ADMIN"]
+
+    def form_valid(self, form):
+        school = self.get_school()
+        if school is None:
+            form.add_error(None, "Importing needs a school account.")
+            return self.form_invalid(form)
+        upload = form.cleaned_data["file"]
+        try:
+            result = importer.import_file(school=school, stream=upload, name=upload.name, user=self.request.user)
+        except importer.ImportFileError as e:
+            form.add_error("file", str(e))
+            return self.form_invalid(form)
+        messages.success(
+            self.request,
+            f"Imported {result.rows - result.failed} of {result.rows} row(s): "
+            f"{result.created} created, {result.updated} updated, {result.unchanged} unchanged.",
+        )
+        return self.render_to_response(self.get_context_data(form=self.form_class(), result=result))
+
+
+class AttendanceRegisterExportView(RoleRequiredMixin, UserScopedMixin, View):
+    """
+    Monthly register as .xlsx (see attendance.registers):
+    ?month=YYYY-MM or ?start=&end=, optionally &class_program=<id>.
+    """
+    allowed_roles = ["SUPER_ADMIN", "SCHOOL_ADMIN", "TEACHER"]
+
+    def get(self, request, *args, **kwargs):
+        school = self.get_school()
+        if school is None:
+            return HttpResponseBadRequest("Exporting needs a school account.")
+        form = AttendanceRegisterForm(request.GET, school=school)
+        if not form.is_valid():
+            return HttpResponseBadRequest("; ".join(error for errors in form.errors.values() for error in errors))
+        cd = form.cleaned_data
+
+        # Write-only workbooks spool to disk; so does the finished file.
+        stream = tempfile.TemporaryFile()
+        registers.write_register(
+            stream, school=school, start=cd["start"], end=cd["end"], class_program=cd["class_program"],
+        )
+        stream.seek(0)
+        scope = cd["class_program"].name if cd["class_program"] else "school"
+        name = f"attendance_{scope}_{cd['start']:%Y%m%d}_{cd['end']:%Y%m%d}"
+        return FileResponse(
+            stream, as_attachment=True, filename=f"{slugify(name)}.xlsx",
+            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        )
+
+
+class RegisterJobListView(RoleRequiredMixin, UserScopedMixin, ListView):
+    """Queue monthly register PDFs and follow their progress (built by build_attendance_registers)."""
+    template_name = "attendance/register_jobs.html"
+    context_object_name = "jobs"
+    allowed_roles = ["SUPER_ADMIN", "SCHOOL_ADMIN", "TEACHER"]
+
+    def get_queryset(self):
+        return RegisterJob.objects.filter(school=self.get_school()).select_related("class_program")[:20]
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        ctx.setdefault("form", RegisterJobForm(school=self.get_school()))
+        ctx["classes"] = ClassProgram.objects.filter(school=self.get_school()).order_by("division__name", "name")
+        ctx["this_month"] = timezone.localdate().strftime("%Y-%m")
+        return ctx
+
+    def post(self, request, *args, **kwargs):
+        school = self.get_school()
+        if school is None:
+            return HttpResponseBadRequest("Registers need a school account.")
+        form = RegisterJobForm(request.POST, school=school)
+        if not form.is_valid():
+            self.object_list = self.get_queryset()
+            return self.render_to_response(self.get_context_data(form=form))
+        RegisterJob.objects.create(
+            school=school, month=form.cleaned_data["month"], class_program=form.cleaned_data["class_program"],
+            requested_by=request.user,
+        )
+        messages.success(request, "Registers queued; they will be ready to download here shortly.")
+        return redirect("attendance:register_jobs")
+
+
+class RegisterJobStatusView(RoleRequiredMixin, UserScopedMixin, View):
+    allowed_roles = ["SUPER_ADMIN", "SCHOOL_ADMIN", "TEACHER"]
+
+    def get(self, request, pk, *args, **kwargs):
+        job = get_object_or_404(RegisterJob, pk=pk, school=self.get_school())
+        return JsonResponse({
+            "status": job.status, "done": job.done, "total": job.total, "progress": job.progress,
+            "error": job.error,
+        })
+
+
+class RegisterJobDownloadView(RoleRequiredMixin, UserScopedMixin, View):
+    allowed_roles = ["SUPER_ADMIN", "SCHOOL_ADMIN", "TEACHER"]
+
+    def get(self, request, pk, *args, **kwargs):
+        job = get_object_or_404(RegisterJob, pk=pk, school=self.get_school(), status=RegisterJob.Status.DONE)
+        return FileResponse(job.file.open("rb"), as_attachment=True, filename=job.file.name.rsplit("/", 1)[-1])
+
+
+class LiveBoardView(RoleRequiredMixin, UserScopedMixin, TemplateView):
+    """Which classes have submitted today, kept current by polling LiveBoardDataView."""
+    template_name = "attendance/live_board.html"
+    allowed_roles = ["SUPER_ADMIN", "SCHOOL_ADMIN"]
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        ctx["poll_ms"] = live.CLIENT_POLL_SECONDS * 1000
+        return ctx
+
+
+class LiveBoardDataView(RoleRequiredMixin, UserScopedMixin, View):
+    """
+    Today's board as JSON from the process's cached snapshot (see
+    attendance.live); a repeat fetch of an unchanged board gets a 304.
+    """
+    allowed_roles = ["SUPER_ADMIN", "SCHOOL_ADMIN"]
+
+    def get(self, request, *args, **kwargs):
+        school = self.get_school()
+        if school is None:
+            return HttpResponseBadRequest("The live board needs a school account.")
+        etag, payload = live.board.current(school.pk)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(payload, content_type="application/json")
+            response["ETag"] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class ClassYearView(RoleRequiredMixin, UserScopedMixin, TemplateView):
+    """
+    A class's academic year at a glance: one calendar strip per student and
+    term rates, all from the students' bitmaps (see attendance.bitmaps).
+    ?year=<start year>, default the current academic year.
+    """
+    template_name = "attendance/class_year.html"
+    allowed_roles = ["SUPER_ADMIN", "SCHOOL_ADMIN", "TEACHER"]
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        class_program = get_object_or_404(
+            ClassProgram.objects.for_user(self.request.user).select_related("division"), pk=kwargs["class_id"],
+        )
+        current = archive.academic_year(timezone.localdate())
+        try:
+            year = int(self.request.GET.get("year", current))
+        except ValueError:
+            year = current
+        start, end = archive.year_bounds(year)
+        days = (end - start).days + 1
+        terms = bitmaps.terms(year)
+
+        blobs = bitmaps.class_year(class_program, year)
+        empty = bytes(bitmaps.SIZE)
+        rows = []
+        for student_id, name in (
+            Student.objects.filter(class_program=class_program).order_by("full_name").values_list("id", "full_name")
+        ):
+            bits = blobs.get(student_id, empty)
+            attended, half_day, absent = bitmaps.counts(bits, 0, days)
+            rows.append({
+                "id": student_id,
+                "name": name,
+                "codes": "".join(map(str, bitmaps.codes(bits, days))),
+                "rate": bitmaps.rate(bits, 0, days),
+                "terms": [bitmaps.rate(bits, first, last) for _, first, last in terms],
+                "absent": absent,
+                "marked": attended + half_day + absent,
+                "longest_absent_run": bitmaps.longest_absent_run(bits),
+            })
+        ctx.update({
+            "class_program": class_program,
+            "year": year,
+            "years": range(current, current - 5, -1),
+            "start": start,
+            "end": end,
+            "terms": [label for label, _, _ in terms],
+            "rows": rows,
+        })
         return ctx
@@ -0,0 +1,90 @@
+"""
+Downsampling for chart series.
+
+A chart is only a few hundred pixels wide, so a multi-year series of daily
+points costs payload and render time without showing anything more. Both
+functions here choose which points to keep and return their indices in
+order, so one choice can be applied to the labels and to every parallel
+series (see `take`). The first and last points are always kept.
+
+- `lttb`: Largest-Triangle-Three-Buckets. One point per bucket, the one
+  forming the largest triangle with the previously kept point and the next
+  bucket's average. Keeps the shape of a line, its peaks and dips included.
+- `minmax`: each bucket's lowest and highest point. Cheaper, and it never
+  drops an extreme, which suits bars and spiky counts.
+
+Series shorter than the target are returned whole.
+"""
+from django.conf import settings
+
+MAX_POINTS = getattr(settings, 'CHART_MAX_POINTS', 400)
+MIN_POINTS = 3
+
+
+def points(value, default=MAX_POINTS):
+    """A requested point count (e.g. a `points` query parameter), clamped to [MIN_POINTS, MAX_POINTS]."""
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(MIN_POINTS, min(value, MAX_POINTS))
+
+
+def _bucket(every, index):
+    # Interior points 1..n-2 split into buckets of `every` points.
+    return int(index * every) + 1
+
+
+def lttb(ys, threshold, xs=None):
+    """Indices of at most `threshold` points of `ys` (at positions `xs`, default 0..n-1)."""
+    n = len(ys)
+    if threshold >= n or threshold < MIN_POINTS:
+        return list(range(n))
+    xs = range(n) if xs is None else xs
+    ys = [float(y) for y in ys]
+    every = (n - 2) / (threshold - 2)
+
+    kept, a = [0], 0
+    for i in range(threshold - 2):
+        start, end = _bucket(every, i), _bucket(every, i + 1)
+        next_start, next_end = end, min(_bucket(every, i + 2), n)
+        if i == threshold - 3:
+            next_start, next_end = n - 1, n  # the last bucket looks ahead to the last point
+        span = next_end - next_start
+        avg_x = sum(xs[j] for j in range(next_start, next_end)) / span
+        avg_y = sum(ys[next_start:next_end]) / span
+
+        ax, ay = xs[a], ys[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            # Twice the triangle's area; the factor doesn't change the winner.
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        kept.append(best)
+        a = best
+    kept.append(n - 1)
+    return kept
+
+
+def minmax(ys, threshold):
+    """Indices of at most `threshold` points of `ys`: each bucket's minimum and maximum."""
+    n = len(ys)
+    if threshold >= n or threshold < MIN_POINTS + 1:
+        return list(range(n))
+    buckets = (threshold - 2) // 2
+    every = (n - 2) / buckets
+
+    kept = [0]
+    for i in range(buckets):
+        bucket = range(_bucket(every, i), _bucket(every, i + 1))
+        low = min(bucket, key=ys.__getitem__)
+        high = max(bucket, key=ys.__getitem__)
+        kept.extend(sorted({low, high}))
+    kept.append(n - 1)
+    return kept
+
+
+def take(indices, values):
+    """`values` at `indices`, as a list."""
+    return [values[i] for i in indices]
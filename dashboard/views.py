@@ -12,6 +12,7 @@ from classes_app.models import ClassProgram, Division
 from fees.models import Payment, Invoice
 from attendance.models import Attendance
 from notifications.models import Announcement
+from core import downsample
 from core.mixins import RoleRequiredMixin
 from django.views.generic import TemplateView
 from django.utils.timezone import now
@@ -214,6 +215,13 @@ def revenue_trend_chart(request):
         .annotate(total=Sum('amount'))
         .order_by('month')
     )
+    payments = list(payments)
+    kept = downsample.lttb(
+        [p['total'] for p in payments],
+        downsample.points(request.GET.get('points')),
+        xs=[p['month'].toordinal() for p in payments],
+    )
+    payments = downsample.take(kept, payments)
 
     chart_data = {
         'labels': [p['month'].strftime("%b %Y") for p in payments],
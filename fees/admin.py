@@ -1,8 +1,17 @@
 from django.contrib import admin
-from .models import FeeStructure, Invoice, Payment
+from .models import (
+    FeeStructure, FeePrice, Invoice, Payment, StudentFeeOverride, DocumentSequence, SequenceBlock,
+    JournalEntry, StudentBalanceSnapshot,
+)
 from django.utils.html import format_html
 
 
+class FeePriceInline(admin.TabularInline):
+    model = FeePrice
+    extra = 0
+    fields = ("effective_from", "amount", "created_by", "created_at")
+    readonly_fields = ("created_by", "created_at")
+
 
 @admin.register(FeeStructure)
 class FeeStructureAdmin(admin.ModelAdmin):
@@ -12,9 +21,10 @@ class FeeStructureAdmin(admin.ModelAdmin):
         'amount',
         'school',
         'in_progress',
+        'auto_apply',
         'created_at'
     )
-    list_filter = ('school', 'division', 'in_progress')
+    list_filter = ('school', 'division', 'in_progress', 'auto_apply')
     search_fields = ('name', 'division__name', 'school__name')
     ordering = ('school', 'division', 'name')
     list_editable = ('amount',)
@@ -22,13 +32,17 @@ class FeeStructureAdmin(admin.ModelAdmin):
 
     fieldsets = (
         ("Fee Details", {
-            "fields": ("school", "division", "name", "amount", "description")
+            "fields": ("school", "division", "class_program", "name", "amount", "description")
+        }),
+        ("Applicability", {
+            "fields": ("auto_apply",),
         }),
         ("Status", {
             "fields": ("in_progress", "created_at"),
         }),
     )
     readonly_fields = ('created_at',)
+    inlines = [FeePriceInline]
 
     def division_display(self, obj):
         return obj.division.name if obj.division else "-"
@@ -45,15 +59,65 @@ class FeeStructureAdmin(admin.ModelAdmin):
     in_progress_display.short_description = "Status"
 
 
+@admin.register(StudentFeeOverride)
+class StudentFeeOverrideAdmin(admin.ModelAdmin):
+    list_display = ('student', 'fee', 'action', 'amount', 'reason', 'created_at')
+    list_filter = ('action', 'fee__school')
+    search_fields = ('student__full_name', 'reason')
+    raw_id_fields = ('student', 'fee')
+
+
 @admin.register(Invoice)
 class InvoiceAdmin(admin.ModelAdmin):
-    list_display = ('student', 'fee', 'amount_due', 'amount_paid', 'status', 'due_date', 'school')
+    list_display = ('number', 'student', 'fee', 'amount_due', 'amount_paid', 'status', 'due_date', 'school')
     list_filter = ('school', 'status', 'due_date')
-    search_fields = ('student__first_name', 'student__last_name', 'fee__name')
+    search_fields = ('number', 'student__first_name', 'student__last_name', 'fee__name')
     date_hierarchy = 'due_date'
 
 
 @admin.register(Payment)
 class PaymentAdmin(admin.ModelAdmin):
-    list_display = ("invoice", "amount", "method", "reference", "paid_on")
-    search_fields = ("invoice__student__first_name", "invoice__student__last_name", "reference")
+    list_display = ("receipt_number", "invoice", "amount", "method", "reference", "paid_on")
+    search_fields = ("receipt_number", "invoice__student__first_name", "invoice__student__last_name", "reference")
+
+
+class SequenceBlockInline(admin.TabularInline):
+    model = SequenceBlock
+    extra = 0
+    fields = ("start", "end", "worker", "allocated_at")
+    readonly_fields = fields
+    can_delete = False
+
+
+@admin.register(DocumentSequence)
+class DocumentSequenceAdmin(admin.ModelAdmin):
+    list_display = ("school", "kind", "year", "next_value", "updated_at")
+    list_filter = ("kind", "year", "school")
+    readonly_fields = ("next_value", "updated_at")
+    inlines = [SequenceBlockInline]
+
+
+@admin.register(JournalEntry)
+class JournalEntryAdmin(admin.ModelAdmin):
+    list_display = ("occurred_on", "student", "kind", "debit_account", "credit_account", "amount", "memo")
+    list_filter = ("kind", "school")
+    search_fields = ("student__full_name", "memo")
+    date_hierarchy = "occurred_on"
+
+    # Append-only: entries are posted by the app, never edited here.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(StudentBalanceSnapshot)
+class StudentBalanceSnapshotAdmin(admin.ModelAdmin):
+    list_display = ("student", "as_of", "balance", "last_entry_id")
+    list_filter = ("as_of", "school")
+    search_fields = ("student__full_name",)
+
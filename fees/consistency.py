@@ -0,0 +1,102 @@
+"""
+Online consistency check of Invoice.amount_paid against its payments.
+
+Invoices are walked in primary-key chunks (keyset, not OFFSET), with one
+grouped SUM over the chunk's confirmed, non-reversed payments. Memory is
+bounded by the chunk size, and each repair runs in its own short transaction
+so the scan can run against a live database.
+"""
+import logging
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum
+
+from fees.models import Invoice, Payment
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ScanResult:
+    scanned: int = 0
+    mismatched: int = 0
+    repaired: int = 0
+    samples: list = field(default_factory=list)  # first few (invoice_id, stored, expected)
+
+
+def _paid_totals(invoice_ids):
+    return dict(
+        Payment.objects.counted()
+        .filter(invoice_id__in=invoice_ids)
+        .values("invoice_id")
+        .annotate(total=Sum("amount"))
+        .values_list("invoice_id", "total")
+    )
+
+
+def _repair(invoice_ids):
+    """Re-read and fix one chunk's mismatches under row locks; returns rows updated."""
+    with transaction.atomic():
+        invoices = list(
+            Invoice.objects.select_for_update()
+            .filter(pk__in=invoice_ids)
+            .only("id", "amount_due", "amount_paid", "status", "description")
+        )
+        # Totals are recomputed under the lock: a payment may have landed since the scan.
+        totals = _paid_totals(invoice_ids)
+        changed = []
+        for invoice in invoices:
+            expected = totals.get(invoice.pk, Decimal("0"))
+            status = invoice.status_for_paid(expected)
+            if invoice.amount_paid != expected or invoice.status != status:
+                invoice.amount_paid = expected
+                invoice.status = status
+                changed.append(invoice)
+        Invoice.objects.bulk_update(changed, ["amount_paid", "status"])
+    return len(changed)
+
+
+def scan_invoice_totals(chunk_size=500, repair=False, school=None, pause=0.0, max_samples=20):
+    """
+    Compare every invoice's stored amount_paid/status with its payments.
+    With `repair`, mismatched rows are fixed with bulk_update.
+    """
+    result = ScanResult()
+    invoices = Invoice.objects.order_by("pk")
+    if school is not None:
+        invoices = invoices.filter(school=school)
+
+    last_pk = 0
+    while True:
+        chunk = list(
+            invoices.filter(pk__gt=last_pk)
+            .values_list("pk", "amount_due", "amount_paid", "status", "description")[:chunk_size]
+        )
+        if not chunk:
+            break
+        last_pk = chunk[-1][0]
+        totals = _paid_totals([row[0] for row in chunk])
+
+        mismatched = []
+        for pk, amount_due, amount_paid, status, description in chunk:
+            expected = totals.get(pk, Decimal("0"))
+            expected_status = Invoice(amount_due=amount_due, description=description).status_for_paid(expected)
+            if amount_paid != expected or status != expected_status:
+                mismatched.append(pk)
+                if len(result.samples) < max_samples:
+                    result.samples.append((pk, amount_paid, expected))
+
+        result.scanned += len(chunk)
+        result.mismatched += len(mismatched)
+        if repair and mismatched:
+            result.repaired += _repair(mismatched)
+        if pause:
+            time.sleep(pause)
+
+    logger.info(
+        f"Invoice totals scan: {result.scanned} scanned, {result.mismatched} mismatched, {result.repaired} repaired."
+    )
+    return result
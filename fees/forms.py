@@ -15,7 +15,7 @@ class FeeForm(forms.ModelForm):
         model = FeeStructure
         fields = [
             "name", "division", "class_program",
-            "amount", "description", "in_progress"
+            "amount", "description", "in_progress", "auto_apply"
         ]
         widgets = {
             "name": forms.Select(attrs={"class": "w-full"}),
@@ -26,6 +26,7 @@ class FeeForm(forms.ModelForm):
                 "class": "w-full", "rows": 1, "placeholder": "Optional description"
             }),
             "in_progress": forms.CheckboxInput(attrs={"class": "rounded"}),
+            "auto_apply": forms.CheckboxInput(attrs={"class": "rounded"}),
         }
         
     def __init__(self, *args, **kwargs):
@@ -41,6 +42,27 @@ class FeeForm(forms.ModelForm):
 
             self.fields['division'].label_from_instance = lambda obj: obj.name
 
+
+class FeeUpdateForm(forms.ModelForm):
+    # Not a model field: the month a changed amount starts billing from.
+    effective_from = forms.DateField(
+        required=False,
+        help_text="Month the new amount applies from. Earlier months keep billing at the old price.",
+        widget=forms.DateInput(attrs={"type": "date", "class": "w-full"}),
+    )
+
+    class Meta:
+        model = FeeStructure
+        fields = ["name", "amount", "description", "auto_apply"]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["effective_from"].initial = timezone.localdate().replace(day=1)
+
+    def clean_effective_from(self):
+        value = self.cleaned_data.get("effective_from") or timezone.localdate()
+        return value.replace(day=1)
+
 # ----------------------
 #  INVOICE FORM
 # ----------------------
@@ -0,0 +1,240 @@
+"""
+Posting to, and reading from, the append-only payment journal.
+
+Every charge, payment, reversal and adjustment becomes one JournalEntry. A
+student's balance is the signed sum of entries touching the RECEIVABLE
+account; periodic StudentBalanceSnapshot rows mean a balance or statement
+reads one snapshot plus the short tail of entries after it.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, DecimalField, F, Max, OuterRef, Q, Subquery, Sum, Value, When
+from django.utils import timezone
+
+from fees.models import JournalEntry, Payment, StudentBalanceSnapshot
+
+ZERO = Decimal("0.00")
+
+RECEIVABLE_DELTA = Case(
+    When(debit_account=JournalEntry.RECEIVABLE, then=F("amount")),
+    When(credit_account=JournalEntry.RECEIVABLE, then=-F("amount")),
+    default=Value(ZERO),
+    output_field=DecimalField(max_digits=12, decimal_places=2),
+)
+
+
+# ----------------------
+#  POSTING
+# ----------------------
+def _post(entry):
+    """Insert one entry; a duplicate (same invoice charge / payment kind) is a no-op."""
+    try:
+        with transaction.atomic():
+            entry.save()
+    except IntegrityError:
+        return None
+    return entry
+
+
+def _charge_entry(invoice):
+    return JournalEntry(
+        school_id=invoice.school_id,
+        student_id=invoice.student_id,
+        invoice=invoice,
+        kind=JournalEntry.CHARGE,
+        debit_account=JournalEntry.RECEIVABLE,
+        credit_account=JournalEntry.REVENUE,
+        amount=invoice.amount_due,
+        occurred_on=invoice.billing_month or invoice.due_date,
+        memo=invoice.description or (invoice.fee.name if invoice.fee_id else ""),
+    )
+
+
+def post_charge(invoice):
+    return _post(_charge_entry(invoice))
+
+
+def post_charges(invoices):
+    """Bulk variant for generate_invoices_for_school (bulk_create skips signals)."""
+    entries = [_charge_entry(invoice) for invoice in invoices if invoice.pk]
+    JournalEntry.objects.bulk_create(entries, ignore_conflicts=True)
+
+
+def post_adjustment(invoice, delta, memo="", user=None, occurred_on=None):
+    """Record a change to what a student owes; positive delta = owes more."""
+    if not delta:
+        return None
+    owes_more = delta > 0
+    return _post(JournalEntry(
+        school_id=invoice.school_id,
+        student_id=invoice.student_id,
+        invoice_id=invoice.pk,
+        kind=JournalEntry.ADJUSTMENT,
+        debit_account=JournalEntry.RECEIVABLE if owes_more else JournalEntry.REVENUE,
+        credit_account=JournalEntry.REVENUE if owes_more else JournalEntry.RECEIVABLE,
+        amount=abs(delta),
+        occurred_on=occurred_on or timezone.localdate(),
+        memo=memo,
+        created_by=user,
+    ))
+
+
+def sync_payment(payment, user=None):
+    """
+    Make the journal agree with the payment's state: a confirmed, non-reversed
+    payment has a PAYMENT entry; one that stopped counting (reversed, or
+    rejected after confirmation) also has a REVERSAL entry.
+    """
+    counts = payment.status == Payment.STATUS_CONFIRMED and not payment.is_reversed
+    student_id = payment.invoice.student_id
+    if counts:
+        return _post(JournalEntry(
+            school_id=payment.school_id,
+            student_id=student_id,
+            invoice_id=payment.invoice_id,
+            payment=payment,
+            kind=JournalEntry.PAYMENT,
+            debit_account=JournalEntry.CASH,
+            credit_account=JournalEntry.RECEIVABLE,
+            amount=payment.amount,
+            occurred_on=timezone.localdate(payment.paid_on) if payment.paid_on else timezone.localdate(),
+            memo=payment.method or "",
+            created_by=user or payment.confirmed_by,
+        ))
+
+    if JournalEntry.objects.filter(payment=payment, kind=JournalEntry.PAYMENT).exists():
+        return _post(JournalEntry(
+            school_id=payment.school_id,
+            student_id=student_id,
+            invoice_id=payment.invoice_id,
+            payment=payment,
+            kind=JournalEntry.REVERSAL,
+            debit_account=JournalEntry.RECEIVABLE,
+            credit_account=JournalEntry.CASH,
+            amount=payment.amount,
+            occurred_on=timezone.localdate(),
+            memo="Reversed" if payment.is_reversed else f"Payment {payment.status.lower()}",
+            created_by=user,
+        ))
+    return None
+
+
+# ----------------------
+#  READING
+# ----------------------
+def balances(student_ids, day=None):
+    """
+    {student_id: what the student owed at the end of `day`} (default: today):
+    each student's latest snapshot plus one grouped query over the tails.
+    """
+    day = day or timezone.localdate()
+    student_ids = list(student_ids)
+    latest = (
+        StudentBalanceSnapshot.objects
+        .filter(student_id=OuterRef("student_id"), as_of__lte=day)
+        .order_by("-as_of")
+        .values("as_of")[:1]
+    )
+    snapshots = {
+        snapshot.student_id: snapshot
+        for snapshot in StudentBalanceSnapshot.objects.filter(student_id__in=student_ids, as_of=Subquery(latest))
+    }
+
+    tail = Q(student_id__in=[pk for pk in student_ids if pk not in snapshots])
+    for student_id, snapshot in snapshots.items():
+        tail |= Q(student_id=student_id) & (Q(occurred_on__gt=snapshot.as_of) | Q(id__gt=snapshot.last_entry_id))
+    totals = dict(
+        JournalEntry.objects.filter(tail, occurred_on__lte=day)
+        .values("student_id").annotate(delta=Sum(RECEIVABLE_DELTA))
+        .values_list("student_id", "delta")
+    )
+
+    return {
+        pk: (snapshots[pk].balance if pk in snapshots else ZERO) + (totals.get(pk) or ZERO)
+        for pk in student_ids
+    }
+
+
+def balance_as_of(student, day=None):
+    """What the student owed at the end of `day` (default: today)."""
+    student_id = getattr(student, "pk", student)
+    return balances([student_id], day)[student_id]
+
+
+def statement(student, start, end):
+    """
+    Opening balance, the entries between `start` and `end` (inclusive) with
+    a running balance, and the closing balance.
+    """
+    opening = balance_as_of(student, start - timedelta(days=1))
+    running = opening
+    lines = []
+    entries = (
+        JournalEntry.objects
+        .filter(student=student, occurred_on__gte=start, occurred_on__lte=end)
+        .select_related("invoice", "payment")
+        .order_by("occurred_on", "id")
+    )
+    for entry in entries:
+        running += entry.receivable_delta
+        lines.append({
+            "date": entry.occurred_on,
+            "kind": entry.kind,
+            "memo": entry.memo,
+            "invoice": entry.invoice.display_number if entry.invoice else None,
+            "receipt": entry.payment.display_receipt_number if entry.payment else None,
+            "debit": entry.amount if entry.receivable_delta > 0 else ZERO,
+            "credit": entry.amount if entry.receivable_delta < 0 else ZERO,
+            "balance": running,
+        })
+    return {"opening_balance": opening, "entries": lines, "closing_balance": running}
+
+
+# ----------------------
+#  SNAPSHOTS
+# ----------------------
+def take_snapshots(school, as_of=None):
+    """
+    Write one snapshot per student for `as_of`, rolling the previous run
+    forward with a single grouped query over the entries since it.
+    Returns the number of snapshots written.
+    """
+    as_of = as_of or timezone.localdate()
+    entries = JournalEntry.objects.filter(school=school)
+    last_entry_id = entries.aggregate(last=Max("id"))["last"]
+    if last_entry_id is None:
+        return 0
+
+    previous_as_of = (
+        StudentBalanceSnapshot.objects
+        .filter(school=school, as_of__lt=as_of)
+        .aggregate(last=Max("as_of"))["last"]
+    )
+    balances = {}
+    tail = entries.filter(occurred_on__lte=as_of, id__lte=last_entry_id)
+    if previous_as_of:
+        previous = StudentBalanceSnapshot.objects.filter(school=school, as_of=previous_as_of)
+        balances = dict(previous.values_list("student_id", "balance"))
+        previous_last_id = previous.aggregate(last=Max("last_entry_id"))["last"] or 0
+        tail = tail.filter(Q(occurred_on__gt=previous_as_of) | Q(id__gt=previous_last_id))
+
+    for student_id, delta in tail.values("student_id").annotate(delta=Sum(RECEIVABLE_DELTA)).values_list("student_id", "delta"):
+        balances[student_id] = balances.get(student_id, ZERO) + (delta or ZERO)
+
+    with transaction.atomic():
+        StudentBalanceSnapshot.objects.filter(school=school, as_of=as_of).delete()
+        StudentBalanceSnapshot.objects.bulk_create([
+            StudentBalanceSnapshot(
+                school=school, student_id=student_id, as_of=as_of,
+                last_entry_id=last_entry_id, balance=balance,
+            )
+            for student_id, balance in balances.items()
+        ], batch_size=1000)
+    return len(balances)
+
+
+def month_end(day):
+    """Last day of the month before `day`, the default snapshot date."""
+    return day.replace(day=1) - timedelta(days=1)
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+
+from fees.models import DocumentSequence, Invoice, Payment
+
+
+def _collapse(values):
+    """[1, 2, 3, 7, 9, 10] -> [(1, 3), (7, 7), (9, 10)]"""
+    ranges = []
+    for value in sorted(values):
+        if ranges and value == ranges[-1][1] + 1:
+            ranges[-1][1] = value
+        else:
+            ranges.append([value, value])
+    return [tuple(r) for r in ranges]
+
+
+class Command(BaseCommand):
+    help = (
+        "Reports reserved invoice/receipt numbers that were never issued: blocks lost on "
+        "worker restart, plus numbers still cached by running workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--school", type=int, help="Only audit this school id")
+        parser.add_argument("--year", type=int, help="Only audit this year")
+
+    def handle(self, *args, **options):
+        sequences = DocumentSequence.objects.select_related("school").prefetch_related("blocks")
+        if options["school"]:
+            sequences = sequences.filter(school_id=options["school"])
+        if options["year"]:
+            sequences = sequences.filter(year=options["year"])
+
+        clean = True
+        for sequence in sequences.order_by("school_id", "kind", "year"):
+            prefix = DocumentSequence.format_number(sequence.kind, sequence.year, 0)[:-6]
+            if sequence.kind == DocumentSequence.INVOICE:
+                issued = Invoice.objects.filter(school=sequence.school, number__startswith=prefix).values_list("number", flat=True)
+            else:
+                issued = Payment.objects.filter(school=sequence.school, receipt_number__startswith=prefix).values_list("receipt_number", flat=True)
+            used = {DocumentSequence.parse_number(number) for number in issued.iterator()}
+
+            unused = []
+            for block in sequence.blocks.all():
+                unused.extend(v for v in range(block.start, block.end + 1) if v not in used)
+            if not unused:
+                continue
+
+            clean = False
+            self.stdout.write(f"{sequence.school.name} {sequence.kind} {sequence.year}: {len(unused)} unused")
+            for start, end in _collapse(unused):
+                first = DocumentSequence.format_number(sequence.kind, sequence.year, start)
+                last = DocumentSequence.format_number(sequence.kind, sequence.year, end)
+                self.stdout.write(f" - {first}" if start == end else f" - {first} .. {last}")
+
+        if clean:
+            self.stdout.write(self.style.SUCCESS("No unused document numbers."))
@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from fees.journal import post_charges
+from fees.models import Invoice, JournalEntry, Payment
+
+
+class Command(BaseCommand):
+    help = (
+        "Posts journal entries for invoices and payments recorded before the journal existed. "
+        "Safe to re-run: existing entries are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        # 🔹 Charges
+        invoices = (
+            Invoice.objects.exclude(journal_entries__kind=JournalEntry.CHARGE)
+            .select_related("fee").order_by("pk")
+        )
+        batch, charged = [], 0
+        for invoice in invoices.iterator(chunk_size=batch_size):
+            batch.append(invoice)
+            if len(batch) >= batch_size:
+                post_charges(batch)
+                charged += len(batch)
+                batch = []
+        post_charges(batch)
+        charged += len(batch)
+
+        # 🔹 Payments and reversals
+        payments = (
+            Payment.objects.filter(status=Payment.STATUS_CONFIRMED)
+            .exclude(journal_entries__kind=JournalEntry.PAYMENT)
+            .select_related("invoice").prefetch_related("reversals").order_by("pk")
+        )
+        entries, posted = [], 0
+        for payment in payments.iterator(chunk_size=batch_size):
+            entries.append(JournalEntry(
+                school_id=payment.school_id, student_id=payment.invoice.student_id,
+                invoice_id=payment.invoice_id, payment=payment, kind=JournalEntry.PAYMENT,
+                debit_account=JournalEntry.CASH, credit_account=JournalEntry.RECEIVABLE,
+                amount=payment.amount, occurred_on=timezone.localdate(payment.paid_on),
+                memo=payment.method or "", created_by_id=payment.confirmed_by_id,
+            ))
+            if payment.is_reversed:
+                reversal = payment.reversals.first()
+                entries.append(JournalEntry(
+                    school_id=payment.school_id, student_id=payment.invoice.student_id,
+                    invoice_id=payment.invoice_id, payment=payment, kind=JournalEntry.REVERSAL,
+                    debit_account=JournalEntry.RECEIVABLE, credit_account=JournalEntry.CASH,
+                    amount=payment.amount,
+                    occurred_on=timezone.localdate(reversal.reversed_on if reversal else payment.paid_on),
+                    memo=(reversal.reason if reversal else "Reversed") or "Reversed",
+                    created_by_id=reversal.reversed_by_id if reversal else None,
+                ))
+            posted += 1
+            if len(entries) >= batch_size:
+                JournalEntry.objects.bulk_create(entries, ignore_conflicts=True)
+                entries = []
+        JournalEntry.objects.bulk_create(entries, ignore_conflicts=True)
+
+        self.stdout.write(self.style.SUCCESS(f"Posted {charged} charge(s) and {posted} payment(s)."))
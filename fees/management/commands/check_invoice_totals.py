@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from fees.consistency import scan_invoice_totals
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares each invoice's amount_paid/status with its confirmed, non-reversed payments, "
+        "in primary-key chunks. Use --repair to fix mismatches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repair", action="store_true", help="Fix mismatched invoices")
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument("--school", type=int, help="Only scan this school id")
+        parser.add_argument("--pause", type=float, default=0.0, help="Seconds to sleep between chunks")
+
+    def handle(self, *args, **options):
+        result = scan_invoice_totals(
+            chunk_size=options["chunk_size"],
+            repair=options["repair"],
+            school=options["school"],
+            pause=options["pause"],
+        )
+
+        for invoice_id, stored, expected in result.samples:
+            self.stdout.write(f" - Invoice {invoice_id}: stored {stored}, payments total {expected}")
+
+        summary = f"Scanned {result.scanned} invoice(s): {result.mismatched} mismatched, {result.repaired} repaired."
+        style = self.style.SUCCESS if result.mismatched == result.repaired else self.style.WARNING
+        self.stdout.write(style(summary))
@@ -0,0 +1,24 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from fees.journal import month_end, take_snapshots
+from schools.models import School
+
+
+class Command(BaseCommand):
+    help = "Writes per-student balance snapshots from the payment journal (default: end of last month)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--as-of", type=date.fromisoformat, help="Snapshot date, YYYY-MM-DD")
+        parser.add_argument("--school", type=int, help="Only snapshot this school id")
+
+    def handle(self, *args, **options):
+        as_of = options["as_of"] or month_end(date.today())
+        schools = School.objects.all()
+        if options["school"]:
+            schools = schools.filter(pk=options["school"])
+
+        for school in schools:
+            count = take_snapshots(school, as_of)
+            self.stdout.write(f"{school.name}: {count} snapshot(s) as of {as_of}")
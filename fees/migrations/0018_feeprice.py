@@ -0,0 +1,49 @@
+# Generated by Django 5.2.5 on 2026-10-18 23:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def seed_initial_prices(apps, schema_editor):
+    """Give every existing fee a first price version from its creation month."""
+    FeeStructure = apps.get_model("fees", "FeeStructure")
+    FeePrice = apps.get_model("fees", "FeePrice")
+    FeePrice.objects.bulk_create(
+        [
+            FeePrice(
+                fee_id=fee.id,
+                amount=fee.amount,
+                effective_from=fee.created_at.date().replace(day=1),
+            )
+            for fee in FeeStructure.objects.only("id", "amount", "created_at")
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fees', '0017_alter_payment_status'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeePrice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('effective_from', models.DateField(help_text='First billing month this price applies to')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('fee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='prices', to='fees.feestructure')),
+            ],
+            options={
+                'ordering': ['fee', 'effective_from'],
+                'unique_together': {('fee', 'effective_from')},
+            },
+        ),
+        migrations.RunPython(seed_initial_prices, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.5 on 2026-10-18 23:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fees', '0018_feeprice'),
+        ('students', '0006_alter_student_parent_phone'),
+    ]
+
+    operations = [
+        # Existing fees keep relying on their explicit student assignments;
+        # only fees created from now on are applied by scope automatically.
+        migrations.AddField(
+            model_name='feestructure',
+            name='auto_apply',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name='feestructure',
+            name='auto_apply',
+            field=models.BooleanField(default=True, help_text="Bill every student in this fee's division/class scope without per-student assignment"),
+        ),
+        migrations.CreateModel(
+            name='StudentFeeOverride',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('INCLUDE', 'Include'), ('EXCLUDE', 'Exclude')], default='INCLUDE', max_length=10)),
+                ('amount', models.DecimalField(blank=True, decimal_places=2, help_text='Optional custom amount for this student (e.g. scholarship)', max_digits=10, null=True)),
+                ('reason', models.CharField(blank=True, max_length=255, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('fee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='student_overrides', to='fees.feestructure')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fee_overrides', to='students.student')),
+            ],
+            options={
+                'unique_together': {('student', 'fee')},
+            },
+        ),
+    ]
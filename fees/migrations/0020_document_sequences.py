@@ -0,0 +1,73 @@
+# Generated by Django 5.2.5 on 2026-10-18 23:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fees', '0019_fee_applicability_rules'),
+        ('schools', '0002_school_telegram_bot_token'),
+        ('students', '0006_alter_student_parent_phone'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('INVOICE', 'Invoice'), ('RECEIPT', 'Receipt')], max_length=10)),
+                ('year', models.PositiveIntegerField()),
+                ('next_value', models.PositiveIntegerField(default=1)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SequenceBlock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start', models.PositiveIntegerField()),
+                ('end', models.PositiveIntegerField()),
+                ('worker', models.CharField(max_length=100)),
+                ('allocated_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['sequence', 'start'],
+            },
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='number',
+            field=models.CharField(blank=True, editable=False, max_length=32, null=True),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='receipt_number',
+            field=models.CharField(blank=True, editable=False, max_length=32, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='invoice',
+            constraint=models.UniqueConstraint(fields=('school', 'number'), name='unique_invoice_number_per_school'),
+        ),
+        migrations.AddConstraint(
+            model_name='payment',
+            constraint=models.UniqueConstraint(fields=('school', 'receipt_number'), name='unique_receipt_number_per_school'),
+        ),
+        migrations.AddField(
+            model_name='documentsequence',
+            name='school',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='document_sequences', to='schools.school'),
+        ),
+        migrations.AddField(
+            model_name='sequenceblock',
+            name='sequence',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='blocks', to='fees.documentsequence'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='documentsequence',
+            unique_together={('school', 'kind', 'year')},
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.5 on 2026-10-18 23:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fees', '0020_document_sequences'),
+        ('schools', '0002_school_telegram_bot_token'),
+        ('students', '0006_alter_student_parent_phone'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JournalEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('CHARGE', 'Charge'), ('PAYMENT', 'Payment'), ('REVERSAL', 'Reversal'), ('ADJUSTMENT', 'Adjustment')], max_length=10)),
+                ('debit_account', models.CharField(choices=[('RECEIVABLE', 'Student receivable'), ('REVENUE', 'Fee revenue'), ('CASH', 'Cash & bank')], max_length=10)),
+                ('credit_account', models.CharField(choices=[('RECEIVABLE', 'Student receivable'), ('REVENUE', 'Fee revenue'), ('CASH', 'Cash & bank')], max_length=10)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('occurred_on', models.DateField(help_text="Date the entry counts towards the student's balance")),
+                ('memo', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('invoice', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='journal_entries', to='fees.invoice')),
+                ('payment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='journal_entries', to='fees.payment')),
+                ('school', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='journal_entries', to='schools.school')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='journal_entries', to='students.student')),
+            ],
+            options={
+                'ordering': ['occurred_on', 'id'],
+                'indexes': [models.Index(fields=['student', 'occurred_on'], name='fees_journa_student_060eb3_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('kind', 'CHARGE')), fields=('invoice',), name='unique_charge_per_invoice'), models.UniqueConstraint(condition=models.Q(('payment__isnull', False)), fields=('payment', 'kind'), name='unique_entry_kind_per_payment')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StudentBalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('as_of', models.DateField()),
+                ('last_entry_id', models.BigIntegerField()),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('school', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_snapshots', to='schools.school')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_snapshots', to='students.student')),
+            ],
+            options={
+                'ordering': ['student', '-as_of'],
+                'unique_together': {('student', 'as_of')},
+            },
+        ),
+    ]
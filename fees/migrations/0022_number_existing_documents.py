@@ -0,0 +1,64 @@
+from collections import defaultdict
+
+from django.db import migrations
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+def _number(apps, model, field, kind, rows):
+    """
+    Give `rows` (already in issue order) numbers from their school's sequence
+    for the year of their date, continuing after anything issued since 0020.
+    """
+    Model = apps.get_model("fees", model)
+    DocumentSequence = apps.get_model("fees", "DocumentSequence")
+    SequenceBlock = apps.get_model("fees", "SequenceBlock")
+    prefix = {"INVOICE": "INV", "RECEIPT": "RCT"}[kind]
+
+    groups = defaultdict(list)
+    for pk, school_id, issued in rows:
+        groups[(school_id, timezone.localtime(issued).year)].append(pk)
+
+    for (school_id, year), pks in groups.items():
+        sequence, _ = DocumentSequence.objects.select_for_update().get_or_create(
+            school_id=school_id, kind=kind, year=year,
+        )
+        start = sequence.next_value
+        objs = [Model(pk=pk, **{field: f"{prefix}-{year}-{start + i:06d}"}) for i, pk in enumerate(pks)]
+        Model.objects.bulk_update(objs, [field], batch_size=500)
+        sequence.next_value = start + len(pks)
+        sequence.save(update_fields=["next_value", "updated_at"])
+        SequenceBlock.objects.create(sequence=sequence, start=start, end=sequence.next_value - 1, worker="migration")
+
+
+def number_existing_documents(apps, schema_editor):
+    """Number invoices and confirmed payments created before document numbers existed."""
+    Invoice = apps.get_model("fees", "Invoice")
+    Payment = apps.get_model("fees", "Payment")
+
+    invoices = (
+        Invoice.objects.filter(number__isnull=True)
+        .order_by("created_at", "id")
+        .values_list("id", "school_id", "created_at")
+    )
+    _number(apps, "Invoice", "number", "INVOICE", invoices.iterator())
+
+    # Reversed payments keep the receipt they were issued when confirmed.
+    receipts = (
+        Payment.objects.filter(status="CONFIRMED", receipt_number__isnull=True)
+        .annotate(issued=Coalesce("confirmed_at", "paid_on"))
+        .order_by("issued", "id")
+        .values_list("id", "school_id", "issued")
+    )
+    _number(apps, "Payment", "receipt_number", "RECEIPT", receipts.iterator())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fees', '0021_payment_journal'),
+    ]
+
+    operations = [
+        migrations.RunPython(number_existing_documents, migrations.RunPython.noop),
+    ]
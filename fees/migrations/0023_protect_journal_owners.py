@@ -0,0 +1,36 @@
+# Generated by Django 5.2.5 on 2026-10-19 01:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fees', '0022_number_existing_documents'),
+        ('schools', '0002_school_telegram_bot_token'),
+        ('students', '0006_alter_student_parent_phone'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='journalentry',
+            name='school',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='journal_entries', to='schools.school'),
+        ),
+        migrations.AlterField(
+            model_name='journalentry',
+            name='student',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='journal_entries', to='students.student'),
+        ),
+        migrations.AlterField(
+            model_name='studentbalancesnapshot',
+            name='school',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='balance_snapshots', to='schools.school'),
+        ),
+        migrations.AlterField(
+            model_name='studentbalancesnapshot',
+            name='student',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='balance_snapshots', to='students.student'),
+        ),
+    ]
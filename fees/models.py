@@ -28,6 +28,10 @@ class FeeStructure(models.Model):
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     description = models.TextField(blank=True, null=True)  # optional for OTHER
     in_progress = models.BooleanField(default=True)
+    auto_apply = models.BooleanField(
+        default=True,
+        help_text="Bill every student in this fee's division/class scope without per-student assignment",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -44,6 +48,88 @@ class FeeStructure(models.Model):
     def is_recurring(self) -> bool:
         return self.name != self.REGISTRATION
 
+    def applies_by_scope(self, student) -> bool:
+        """True when this fee bills `student` automatically (auto_apply and in scope)."""
+        return (
+            self.auto_apply
+            and self.division_id in (None, student.division_id)
+            and self.class_program_id in (None, student.class_program_id)
+        )
+
+    def sync_amount(self):
+        """
+        Keep `amount` equal to the newest price version (latest
+        `effective_from`), so back-dating a version doesn't overwrite it.
+        """
+        latest = self.prices.order_by("-effective_from").values_list("amount", flat=True).first()
+        if latest is not None and latest != self.amount:
+            FeeStructure.objects.filter(pk=self.pk).update(amount=latest)
+            self.amount = latest
+
+
+class FeePrice(models.Model):
+    """
+    One dated price version of a FeeStructure.
+    The billing engine charges, for each billing month, the version with the
+    latest `effective_from` on or before that month.
+    """
+    fee = models.ForeignKey(
+        "fees.FeeStructure", on_delete=models.CASCADE, related_name="prices"
+    )
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    effective_from = models.DateField(help_text="First billing month this price applies to")
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("fee", "effective_from")
+        ordering = ["fee", "effective_from"]
+
+    def __str__(self):
+        return f"{self.fee} - {self.amount} from {self.effective_from:%b %Y}"
+
+    def save(self, *args, **kwargs):
+        # Prices are per billing month, so always anchor to the 1st.
+        if self.effective_from:
+            self.effective_from = self.effective_from.replace(day=1)
+        super().save(*args, **kwargs)
+
+
+class StudentFeeOverride(models.Model):
+    """
+    Per-student exception to rule-based fee applicability:
+    INCLUDE bills a fee outside the student's scope (optionally at a custom
+    amount), EXCLUDE stops a scoped fee from being billed to the student.
+    """
+    INCLUDE = "INCLUDE"
+    EXCLUDE = "EXCLUDE"
+    ACTION_CHOICES = [
+        (INCLUDE, "Include"),
+        (EXCLUDE, "Exclude"),
+    ]
+
+    student = models.ForeignKey(
+        "students.Student", on_delete=models.CASCADE, related_name="fee_overrides"
+    )
+    fee = models.ForeignKey(
+        "fees.FeeStructure", on_delete=models.CASCADE, related_name="student_overrides"
+    )
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES, default=INCLUDE)
+    amount = models.DecimalField(
+        max_digits=10, decimal_places=2, blank=True, null=True,
+        help_text="Optional custom amount for this student (e.g. scholarship)",
+    )
+    reason = models.CharField(max_length=255, blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("student", "fee")
+
+    def __str__(self):
+        return f"{self.get_action_display()} {self.fee} for {self.student}"
+
 
 # ----------------------
 #  INVOICE MANAGER
@@ -109,14 +195,32 @@ class Invoice(models.Model):
         help_text="The month this invoice is for", null=True, blank=True
     )
 
+    # Human-readable per-school, per-year number, e.g. INV-2025-000123
+    number = models.CharField(max_length=32, blank=True, null=True, editable=False)
+
     objects = InvoiceManager()  # Default manager
 
     class Meta:
         db_table = "invoices_invoice"
         ordering = ["-created_at"]
+        constraints = [
+            models.UniqueConstraint(fields=["school", "number"], name="unique_invoice_number_per_school"),
+        ]
 
     def __str__(self):
-        return f"Invoice #{self.id} - {self.student.full_name} - {self.status}"
+        return f"Invoice {self.display_number} - {self.student.full_name} - {self.status}"
+
+    @property
+    def display_number(self):
+        return self.number or f"#{self.id}"
+
+    def save(self, *args, **kwargs):
+        # Numbered once, when created; invoices from before numbering were
+        # numbered by migration 0022, so later edits never mint a new one.
+        if self._state.adding and not self.number and self.school_id:
+            from fees.sequences import allocator
+            self.number = allocator.next_number(self.school_id, DocumentSequence.INVOICE)
+        super().save(*args, **kwargs)
 
     # -------------------
     # 🔥 PAY METHOD
@@ -145,6 +249,23 @@ class Invoice(models.Model):
 
         self.save()
 
+    def status_for_paid(self, amount_paid):
+        """The status this invoice should have once `amount_paid` is received."""
+        if amount_paid >= self.amount_due:
+            return "PAID"
+        if amount_paid > 0:
+            return "PARTIAL"
+        return "OPENING_BALANCE" if self.description == "Opening Balance" else "UNPAID"
+
+    def refresh_amount_paid(self, save=True):
+        """Recompute amount_paid and status from confirmed, non-reversed payments."""
+        total = self.payments.counted().aggregate(total=models.Sum("amount"))["total"] or Decimal("0")
+        self.amount_paid = total
+        self.status = self.status_for_paid(total)
+        if save:
+            self.save(update_fields=["amount_paid", "status"])
+        return total
+
     # -------------------
     # 🔥 UTILITY METHODS
     # -------------------
@@ -175,6 +296,10 @@ class PaymentQuerySet(models.QuerySet):
             return self.filter(invoice__student__user=user)
         return self.none()
 
+    def counted(self):
+        """Payments that count towards Invoice.amount_paid."""
+        return self.filter(status="CONFIRMED", is_reversed=False)
+
 
 class PaymentManager(models.Manager):
     def get_queryset(self):
@@ -183,6 +308,9 @@ class PaymentManager(models.Manager):
     def for_user(self, user):
         return self.get_queryset().for_user(user)
 
+    def counted(self):
+        return self.get_queryset().counted()
+
 
 # payments/models.py
 from django.conf import settings
@@ -227,9 +355,40 @@ class Payment(models.Model):
     confirmed_at = models.DateTimeField(blank=True, null=True)
     reference = models.CharField(max_length=100, blank=True, null=True,
                                  help_text="Bank transfer ID, MPesa code, TeleBirr transaction ID, or internal ref")
+    # Issued once the payment is confirmed, e.g. RCT-2025-000042
+    receipt_number = models.CharField(max_length=32, blank=True, null=True, editable=False)
 
     objects = PaymentManager()  # keep your manager
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["school", "receipt_number"], name="unique_receipt_number_per_school"),
+        ]
+
+    @property
+    def display_receipt_number(self):
+        return self.receipt_number or f"#{self.id}"
+
+    def save(self, *args, **kwargs):
+        # Only confirmed money gets a receipt number, so rejected or pending
+        # payments never burn numbers in the school's receipt sequence, and
+        # only when it is confirmed: a later edit or reversal keeps the number.
+        if not self.receipt_number and self.school_id and self._confirming():
+            from fees.sequences import allocator
+            self.receipt_number = allocator.next_number(self.school_id, DocumentSequence.RECEIPT)
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = list(kwargs["update_fields"]) + ["receipt_number"]
+        super().save(*args, **kwargs)
+
+    def _confirming(self):
+        """True if this save creates the payment confirmed or moves it to CONFIRMED."""
+        if self.status != self.STATUS_CONFIRMED:
+            return False
+        if self._state.adding:
+            return True
+        stored = Payment.objects.filter(pk=self.pk).values_list("status", flat=True).first()
+        return stored != self.STATUS_CONFIRMED
+
     def mark_confirmed(self, by_user=None):
         self.status = self.STATUS_CONFIRMED
         self.confirmed_by = by_user
@@ -245,6 +404,153 @@ class PaymentReversal(models.Model):
 
     def __str__(self):
         return f"Reversal of Payment #{self.payment.id} by {self.reversed_by}"
-    
-    
 
+
+class DocumentSequence(models.Model):
+    """
+    Per-school, per-year counter for human-readable document numbers.
+    Workers reserve numbers from it in blocks (see fees.sequences), so the
+    row is locked once per block rather than once per document.
+    """
+    INVOICE = "INVOICE"
+    RECEIPT = "RECEIPT"
+    KIND_CHOICES = [
+        (INVOICE, "Invoice"),
+        (RECEIPT, "Receipt"),
+    ]
+    PREFIXES = {INVOICE: "INV", RECEIPT: "RCT"}
+
+    school = models.ForeignKey("schools.School", on_delete=models.CASCADE, related_name="document_sequences")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    year = models.PositiveIntegerField()
+    next_value = models.PositiveIntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("school", "kind", "year")
+
+    def __str__(self):
+        return f"{self.school} {self.kind} {self.year} (next {self.next_value})"
+
+    @classmethod
+    def format_number(cls, kind, year, value):
+        return f"{cls.PREFIXES[kind]}-{year}-{value:06d}"
+
+    @classmethod
+    def parse_number(cls, number):
+        """'INV-2025-000123' -> 123; None for anything not in our format."""
+        try:
+            return int(number.rsplit("-", 1)[1])
+        except (AttributeError, IndexError, ValueError):
+            return None
+
+
+class SequenceBlock(models.Model):
+    """Audit record of a range of numbers handed to one worker process."""
+    sequence = models.ForeignKey(DocumentSequence, on_delete=models.CASCADE, related_name="blocks")
+    start = models.PositiveIntegerField()
+    end = models.PositiveIntegerField()  # inclusive
+    worker = models.CharField(max_length=100)
+    allocated_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["sequence", "start"]
+
+    def __str__(self):
+        return f"{self.sequence.kind} {self.sequence.year}: {self.start}-{self.end} ({self.worker})"
+
+
+class JournalEntry(models.Model):
+    """
+    Append-only double-entry record of every money movement for a student.
+    Rows are never edited or deleted; mistakes are corrected with a new
+    REVERSAL or ADJUSTMENT entry. See fees.journal for posting and balances.
+    """
+    CHARGE = "CHARGE"
+    PAYMENT = "PAYMENT"
+    REVERSAL = "REVERSAL"
+    ADJUSTMENT = "ADJUSTMENT"
+    KIND_CHOICES = [
+        (CHARGE, "Charge"),
+        (PAYMENT, "Payment"),
+        (REVERSAL, "Reversal"),
+        (ADJUSTMENT, "Adjustment"),
+    ]
+
+    RECEIVABLE = "RECEIVABLE"  # what the student owes the school
+    REVENUE = "REVENUE"        # fee income
+    CASH = "CASH"              # cash, bank and mobile money received
+    ACCOUNT_CHOICES = [
+        (RECEIVABLE, "Student receivable"),
+        (REVENUE, "Fee revenue"),
+        (CASH, "Cash & bank"),
+    ]
+
+    # PROTECT: a student or school with money history can't be deleted out from under its ledger.
+    school = models.ForeignKey("schools.School", on_delete=models.PROTECT, related_name="journal_entries")
+    student = models.ForeignKey("students.Student", on_delete=models.PROTECT, related_name="journal_entries")
+    invoice = models.ForeignKey("Invoice", on_delete=models.SET_NULL, null=True, blank=True, related_name="journal_entries")
+    payment = models.ForeignKey("Payment", on_delete=models.SET_NULL, null=True, blank=True, related_name="journal_entries")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    debit_account = models.CharField(max_length=10, choices=ACCOUNT_CHOICES)
+    credit_account = models.CharField(max_length=10, choices=ACCOUNT_CHOICES)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    occurred_on = models.DateField(help_text="Date the entry counts towards the student's balance")
+    memo = models.CharField(max_length=255, blank=True)
+    created_by = models.ForeignKey("accounts.User", on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["occurred_on", "id"]
+        indexes = [
+            models.Index(fields=["student", "occurred_on"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["invoice"], condition=models.Q(kind="CHARGE"), name="unique_charge_per_invoice",
+            ),
+            models.UniqueConstraint(
+                fields=["payment", "kind"], condition=models.Q(payment__isnull=False), name="unique_entry_kind_per_payment",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.occurred_on} {self.kind} {self.amount} ({self.student_id})"
+
+    @property
+    def receivable_delta(self):
+        """Signed effect on the student's balance (positive = owes more)."""
+        if self.debit_account == self.RECEIVABLE:
+            return self.amount
+        if self.credit_account == self.RECEIVABLE:
+            return -self.amount
+        return Decimal("0")
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Journal entries are append-only; post an adjustment instead.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Journal entries are append-only; post a reversal instead.")
+
+
+class StudentBalanceSnapshot(models.Model):
+    """
+    A student's receivable balance over all journal entries with
+    occurred_on <= as_of and id <= last_entry_id. Entries posted later with
+    an earlier date are picked up by the tail query in fees.journal.
+    """
+    school = models.ForeignKey("schools.School", on_delete=models.PROTECT, related_name="balance_snapshots")
+    student = models.ForeignKey("students.Student", on_delete=models.PROTECT, related_name="balance_snapshots")
+    as_of = models.DateField()
+    last_entry_id = models.BigIntegerField()
+    balance = models.DecimalField(max_digits=12, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("student", "as_of")
+        ordering = ["student", "-as_of"]
+
+    def __str__(self):
+        return f"{self.student_id} @ {self.as_of}: {self.balance}"
@@ -0,0 +1,128 @@
+"""
+Per-school, per-year document numbers (INV-2025-000123, RCT-2025-000042).
+
+Each worker process reserves a *block* of numbers from DocumentSequence with a
+single row lock, then hands them out from memory. Cashiers in different
+processes never wait on each other except for the one lock taken per block,
+and a MAX()+1 scan over invoices/payments is never needed.
+
+Numbers left in a block when a process exits are never issued; the
+`audit_document_sequences` command reports those ranges from SequenceBlock.
+"""
+import os
+import socket
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from fees.models import DocumentSequence, SequenceBlock
+
+
+def _draw(blocks, count):
+    """Take up to `count` values from a list of [next, end] blocks (mutated in place)."""
+    values = []
+    while blocks and len(values) < count:
+        block = blocks[0]
+        take = min(count - len(values), block[1] - block[0] + 1)
+        values.extend(range(block[0], block[0] + take))
+        block[0] += take
+        if block[0] > block[1]:
+            blocks.pop(0)
+    return values
+
+
+class SequenceAllocator:
+    """
+    Thread-safe, in-process cache of reserved number blocks.
+
+    A block reserved inside an open transaction is only shared with other
+    threads once that transaction commits; until then only the reserving
+    thread may use it. If the transaction rolls back, the counter row rolls
+    back with it and the block is dropped, so no number is ever issued twice.
+    """
+
+    def __init__(self, block_size=None):
+        self._block_size = block_size
+        self._lock = threading.Lock()
+        self._blocks = {}  # (school_id, kind, year) -> [[next, end], ...]
+        self._local = threading.local()
+        self.worker = f"{socket.gethostname()}:{os.getpid()}"
+
+    @property
+    def block_size(self):
+        return self._block_size or getattr(settings, "DOCUMENT_SEQUENCE_BLOCK_SIZE", 50)
+
+    def next_number(self, school_id, kind, year=None):
+        return self.take(school_id, kind, 1, year=year)[0]
+
+    def take(self, school_id, kind, count, year=None):
+        """Return `count` formatted numbers, in ascending order."""
+        if count <= 0:
+            return []
+        year = year or timezone.localdate().year
+        key = (school_id, kind, year)
+
+        values = _draw(self._pending_blocks(key), count)
+        if len(values) < count:
+            with self._lock:
+                values += _draw(self._blocks.setdefault(key, []), count - len(values))
+        if len(values) < count:
+            values += self._reserve(key, count - len(values))
+
+        return [DocumentSequence.format_number(kind, year, value) for value in values]
+
+    # 🔹 Internals
+
+    def _pending_blocks(self, key):
+        """Blocks this thread reserved in a still-open transaction."""
+        pending = getattr(self._local, "pending", None)
+        if pending is None:
+            pending = self._local.pending = {}
+        live_callbacks = {entry[1] for entry in connection.run_on_commit}
+        # A block whose publish callback is gone was rolled back with its transaction.
+        entries = [entry for entry in pending.get(key, []) if entry[1] in live_callbacks]
+        pending[key] = entries
+        return [block for block, _ in entries if block[0] <= block[1]]
+
+    def _reserve(self, key, needed):
+        school_id, kind, year = key
+        size = max(needed, self.block_size)
+
+        with transaction.atomic():
+            sequence, _ = (
+                DocumentSequence.objects.select_for_update()
+                .get_or_create(school_id=school_id, kind=kind, year=year)
+            )
+            start = sequence.next_value
+            end = start + size - 1
+            sequence.next_value = end + 1
+            sequence.save(update_fields=["next_value", "updated_at"])
+            SequenceBlock.objects.create(sequence=sequence, start=start, end=end, worker=self.worker)
+
+        remainder = [start + needed, end]
+        if remainder[0] <= remainder[1]:
+            self._publish_on_commit(key, remainder)
+        return list(range(start, start + needed))
+
+    def _publish_on_commit(self, key, block):
+        def publish():
+            with self._lock:
+                self._blocks.setdefault(key, []).append(block)
+            entries = getattr(self._local, "pending", {}).get(key, [])
+            entries[:] = [entry for entry in entries if entry[0] is not block]
+
+        if connection.in_atomic_block:
+            self._local.pending = getattr(self._local, "pending", None) or {}
+            self._local.pending.setdefault(key, []).append((block, publish))
+        transaction.on_commit(publish)
+
+    def reset(self):
+        """Forget every cached block (unused numbers show up in the audit)."""
+        with self._lock:
+            self._blocks.clear()
+        self._local.pending = {}
+
+
+allocator = SequenceAllocator()
@@ -1,11 +1,102 @@
 # fees/signals.py
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, pre_save, pre_delete, post_delete
 from django.dispatch import receiver
-from fees.models import Invoice
+from fees.models import Invoice, FeeStructure, FeePrice, Payment
+from fees import journal
 from students.models import Student
 from datetime import date
 
 @receiver(post_save, sender=Student)
 def create_opening_balance_invoice(sender, instance, created, **kwargs):
-    
+
     pass
+
+
+@receiver(pre_save, sender=FeeStructure)
+def _cache_old_amount(sender, instance, **kwargs):
+    """Cache the stored amount so post_save can tell whether the price changed."""
+    if instance.pk:
+        instance._old_amount = (
+            FeeStructure.objects.filter(pk=instance.pk).values_list("amount", flat=True).first()
+        )
+    else:
+        instance._old_amount = None
+
+
+@receiver(post_save, sender=FeeStructure)
+def record_fee_price_version(sender, instance, created, **kwargs):
+    """
+    Keep FeePrice in step with FeeStructure.amount, whichever path edited it
+    (fee form, admin list_editable, onboarding).
+    Views may set `instance._price_effective_from` to back- or forward-date
+    the new price; otherwise it applies from the current month.
+    """
+    if not created and getattr(instance, "_old_amount", None) == instance.amount:
+        return
+
+    effective_from = getattr(instance, "_price_effective_from", None)
+    if effective_from is None:
+        effective_from = (instance.created_at.date() if created else date.today())
+
+    FeePrice.objects.update_or_create(
+        fee=instance,
+        effective_from=effective_from.replace(day=1),
+        defaults={
+            "amount": instance.amount,
+            "created_by": getattr(instance, "_price_changed_by", None),
+        },
+    )
+    # A back-dated version doesn't replace the newer price already in place.
+    instance.sync_amount()
+
+
+@receiver(post_save, sender=FeePrice)
+@receiver(post_delete, sender=FeePrice)
+def sync_fee_amount(sender, instance, origin=None, **kwargs):
+    """Versions edited directly (admin inline) keep FeeStructure.amount current too."""
+    origin_model = getattr(origin, "model", type(origin))
+    if origin_model is FeeStructure:
+        return  # the fee itself is being deleted
+    fee = FeeStructure.objects.filter(pk=instance.fee_id).first()
+    if fee is not None:
+        fee.sync_amount()
+
+
+# ----------------------
+#  PAYMENT JOURNAL
+# ----------------------
+@receiver(pre_save, sender=Invoice)
+def _cache_old_amount_due(sender, instance, **kwargs):
+    if instance.pk:
+        instance._old_amount_due = (
+            Invoice.objects.filter(pk=instance.pk).values_list("amount_due", flat=True).first()
+        )
+    else:
+        instance._old_amount_due = None
+
+
+@receiver(post_save, sender=Invoice)
+def post_invoice_to_journal(sender, instance, created, **kwargs):
+    """A new invoice is a CHARGE; editing its amount is an ADJUSTMENT for the difference."""
+    if created:
+        journal.post_charge(instance)
+        return
+    old = getattr(instance, "_old_amount_due", None)
+    if old is not None and old != instance.amount_due:
+        journal.post_adjustment(instance, instance.amount_due - old, memo="Invoice amount changed")
+
+
+@receiver(pre_delete, sender=Invoice)
+def cancel_deleted_invoice(sender, instance, origin=None, **kwargs):
+    # Only when the invoice itself is deleted, not as part of deleting its student or school.
+    origin_model = getattr(origin, "model", type(origin))
+    if origin_model is not Invoice or not instance.journal_entries.filter(kind="CHARGE").exists():
+        return
+    journal.post_adjustment(instance, -instance.amount_due, memo=f"Invoice {instance.display_number} deleted")
+
+
+@receiver(post_save, sender=Payment)
+def post_payment_to_journal(sender, instance, **kwargs):
+    # Views may set `instance._changed_by` so reversals record who made them.
+    journal.sync_payment(instance, user=getattr(instance, "_changed_by", None))
+
@@ -0,0 +1,456 @@
+import importlib
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.apps import apps as django_apps
+from django.db import transaction
+from django.db.models import ProtectedError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from classes_app.models import ClassProgram, Division
+from fees.models import (
+    DocumentSequence, FeePrice, FeeStructure, Invoice, JournalEntry, Payment, SequenceBlock,
+    StudentBalanceSnapshot, StudentFeeOverride,
+)
+from fees import journal
+from fees.consistency import scan_invoice_totals
+from fees.sequences import SequenceAllocator
+from fees.utilis import FeeApplicabilityResolver, FeePriceIndex, generate_invoices_for_school
+from parents.models import ParentProfile
+from schools.models import School
+from students.models import Student
+
+
+class BillingTestMixin:
+    def setUp(self):
+        self.school = School.objects.create(name="Test School", in_progress=False)
+        self.division = Division.objects.create(school=self.school, name="PRIMARY_1_4")
+        self.class_program = ClassProgram.objects.create(
+            school=self.school, division=self.division, name="Grade 1A"
+        )
+        self.fee = FeeStructure.objects.create(
+            school=self.school, name=FeeStructure.TUITION, amount=Decimal("1000.00")
+        )
+
+    def make_student(self, **kwargs):
+        defaults = {
+            "school": self.school,
+            "division": self.division,
+            "class_program": self.class_program,
+            "full_name": "Abebe Kebede",
+            "parent_name": "Kebede",
+            "parent_phone": "",  # skip parent account creation
+        }
+        defaults.update(kwargs)
+        return Student.objects.create(**defaults)
+
+
+class FeePriceTests(BillingTestMixin, TestCase):
+    def test_new_fee_gets_initial_price_version(self):
+        self.assertEqual(self.fee.prices.count(), 1)
+        self.assertEqual(self.fee.prices.get().amount, Decimal("1000.00"))
+
+    def test_amount_change_records_dated_version(self):
+        self.fee.amount = Decimal("1200.00")
+        self.fee._price_effective_from = date(2030, 3, 15)
+        self.fee.save()
+
+        version = self.fee.prices.get(effective_from=date(2030, 3, 1))
+        self.assertEqual(version.amount, Decimal("1200.00"))
+        self.assertEqual(self.fee.prices.count(), 2)
+
+    def test_back_dated_version_keeps_current_amount(self):
+        first = self.fee.prices.get().effective_from
+        self.fee.amount = Decimal("900.00")
+        self.fee._price_effective_from = date(first.year - 2, first.month, 1)
+        self.fee.save()
+
+        self.assertEqual(self.fee.prices.count(), 2)
+        self.assertEqual(self.fee.amount, Decimal("1000.00"))
+        self.fee.refresh_from_db()
+        self.assertEqual(self.fee.amount, Decimal("1000.00"))
+
+        # Removing the newest version falls back to the one before it.
+        self.fee.prices.get(effective_from=first).delete()
+        self.fee.refresh_from_db()
+        self.assertEqual(self.fee.amount, Decimal("900.00"))
+
+    def test_index_resolves_price_per_month(self):
+        self.fee.prices.all().delete()
+        FeePrice.objects.create(fee=self.fee, amount=Decimal("800"), effective_from=date(2025, 1, 1))
+        FeePrice.objects.create(fee=self.fee, amount=Decimal("900"), effective_from=date(2025, 6, 1))
+
+        index = FeePriceIndex.for_school(self.school)
+        self.assertEqual(index.amount_for(self.fee, date(2024, 12, 1)), Decimal("800"))
+        self.assertEqual(index.amount_for(self.fee, date(2025, 5, 1)), Decimal("800"))
+        self.assertEqual(index.amount_for(self.fee, date(2025, 6, 1)), Decimal("900"))
+        self.assertEqual(index.amount_for(self.fee, date(2026, 1, 1)), Decimal("900"))
+
+    def test_back_billing_uses_old_price(self):
+        this_month = date.today().replace(day=1)
+        last_month = (this_month - timedelta(days=1)).replace(day=1)
+        self.fee.prices.all().delete()
+        FeePrice.objects.create(fee=self.fee, amount=Decimal("800"), effective_from=last_month)
+        FeePrice.objects.create(fee=self.fee, amount=Decimal("900"), effective_from=this_month)
+
+        student = self.make_student(starting_billing_month=last_month, next_payment_date=last_month)
+        student.fee_structures.add(self.fee)
+
+        generate_invoices_for_school(self.school)
+
+        amounts = dict(
+            Invoice.objects.filter(student=student).values_list("billing_month", "amount_due")
+        )
+        self.assertEqual(amounts[last_month], Decimal("800"))
+        self.assertEqual(amounts[this_month], Decimal("900"))
+
+
+class FeeApplicabilityTests(BillingTestMixin, TestCase):
+    def test_scoped_fee_applies_without_assignment(self):
+        student = self.make_student()
+        other_class = ClassProgram.objects.create(
+            school=self.school, division=self.division, name="Grade 1B"
+        )
+        class_fee = FeeStructure.objects.create(
+            school=self.school, name=FeeStructure.TRANSPORT, amount=Decimal("300"),
+            class_program=other_class,
+        )
+
+        resolver = FeeApplicabilityResolver(self.school)
+        fees = resolver.fees_for(student)
+
+        self.assertIn(self.fee, fees)
+        self.assertNotIn(class_fee, fees)
+
+    def test_overrides_include_exclude_and_custom_amount(self):
+        student = self.make_student()
+        transport = FeeStructure.objects.create(
+            school=self.school, name=FeeStructure.TRANSPORT, amount=Decimal("300"),
+            auto_apply=False,
+        )
+        StudentFeeOverride.objects.create(student=student, fee=self.fee, action=StudentFeeOverride.EXCLUDE)
+        StudentFeeOverride.objects.create(student=student, fee=transport, amount=Decimal("150"))
+
+        resolver = FeeApplicabilityResolver(self.school)
+        prices = FeePriceIndex.for_school(self.school)
+
+        self.assertEqual(resolver.fees_for(student), [transport])
+        self.assertEqual(
+            resolver.amount_for(student, transport, date.today().replace(day=1), prices),
+            Decimal("150"),
+        )
+
+    def test_opt_in_fee_still_honours_legacy_assignment(self):
+        student = self.make_student()
+        transport = FeeStructure.objects.create(
+            school=self.school, name=FeeStructure.TRANSPORT, amount=Decimal("300"),
+            auto_apply=False,
+        )
+        student.fee_structures.add(transport)
+
+        fees = FeeApplicabilityResolver(self.school).fees_for(student)
+        self.assertCountEqual(fees, [self.fee, transport])
+
+    def test_student_form_unchecking_scoped_fee_excludes_it(self):
+        student = self.make_student()
+        transport = FeeStructure.objects.create(
+            school=self.school, name=FeeStructure.TRANSPORT, amount=Decimal("300"),
+            auto_apply=False,
+        )
+        admin = User.objects.create_user(
+            username="admin", password="x", role="SCHOOL_ADMIN", school=self.school
+        )
+        self.client.force_login(admin)
+        url = reverse("students:edit", args=[student.pk])
+
+        # Scoped fees show checked; opt-in ones only when assigned.
+        response = self.client.get(url)
+        self.assertEqual(response.context["selected_fees"], [self.fee.id])
+
+        form = {
+            "full_name": student.full_name, "parent_name": student.parent_name,
+            "parent_phone": "0911223344", "division": self.division.pk,
+            "billing_cycle": "MONTHLY", "payment_status": "PENDING", "opening_balance": "0",
+            "fee_defaults": response.context["default_fees"],
+        }
+        self.client.post(url, {**form, "fee_structures": [transport.id]})
+        self.assertEqual(FeeApplicabilityResolver(self.school).fees_for(student), [transport])
+        self.assertTrue(student.fee_overrides.filter(fee=self.fee, action=StudentFeeOverride.EXCLUDE).exists())
+        self.assertEqual(self.client.get(url).context["selected_fees"], [transport.id])
+
+        # Checking it again lifts the exclusion.
+        self.client.post(url, {**form, "fee_defaults": [transport.id], "fee_structures": [self.fee.id]})
+        self.assertEqual(FeeApplicabilityResolver(self.school).fees_for(student), [self.fee])
+        self.assertFalse(student.fee_overrides.exists())
+
+
+class DocumentSequenceTests(BillingTestMixin, TestCase):
+    def test_numbers_come_from_one_block(self):
+        allocator = SequenceAllocator(block_size=10)
+        numbers = [allocator.next_number(self.school.id, DocumentSequence.INVOICE, year=2025) for _ in range(10)]
+
+        self.assertEqual(numbers[0], "INV-2025-000001")
+        self.assertEqual(numbers[-1], "INV-2025-000010")
+        self.assertEqual(SequenceBlock.objects.count(), 1)
+
+        allocator.next_number(self.school.id, DocumentSequence.INVOICE, year=2025)
+        self.assertEqual(SequenceBlock.objects.count(), 2)
+
+    def test_rolled_back_block_is_not_reused(self):
+        allocator = SequenceAllocator(block_size=10)
+        try:
+            with transaction.atomic():
+                allocator.next_number(self.school.id, DocumentSequence.RECEIPT, year=2025)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+
+        # The counter rolled back, so the same numbers are handed out again exactly once.
+        self.assertEqual(allocator.next_number(self.school.id, DocumentSequence.RECEIPT, year=2025), "RCT-2025-000001")
+        self.assertEqual(allocator.next_number(self.school.id, DocumentSequence.RECEIPT, year=2025), "RCT-2025-000002")
+
+    def test_bulk_take_reserves_enough(self):
+        allocator = SequenceAllocator(block_size=5)
+        numbers = allocator.take(self.school.id, DocumentSequence.INVOICE, 12, year=2025)
+        self.assertEqual(len(set(numbers)), 12)
+        self.assertEqual(DocumentSequence.objects.get().next_value, 13)
+
+    @override_settings(DOCUMENT_SEQUENCE_BLOCK_SIZE=3)
+    def test_invoice_and_receipt_numbers_assigned(self):
+        student = self.make_student()
+        invoice = Invoice.objects.create(
+            school=self.school, student=student, fee=self.fee,
+            amount_due=Decimal("1000"), due_date=date.today(),
+        )
+        self.assertTrue(invoice.number.startswith("INV-"))
+
+        payment = Payment.objects.create(school=self.school, invoice=invoice, amount=Decimal("1000"))
+        self.assertIsNone(payment.receipt_number)
+        payment.mark_confirmed()
+        payment.refresh_from_db()
+        self.assertTrue(payment.receipt_number.startswith("RCT-"))
+
+    def test_numbers_issued_once(self):
+        invoice = Invoice.objects.create(
+            school=self.school, student=self.make_student(), fee=self.fee,
+            amount_due=Decimal("1000"), due_date=date.today(),
+        )
+        payment = Payment.objects.create(school=self.school, invoice=invoice, amount=Decimal("1000"))
+        payment.mark_confirmed()
+        numbers = (invoice.number, payment.receipt_number)
+
+        invoice.amount_due = Decimal("900")
+        invoice.save()
+        payment.is_reversed = True
+        payment.save()
+        invoice.refresh_from_db()
+        payment.refresh_from_db()
+        self.assertEqual((invoice.number, payment.receipt_number), numbers)
+
+        # Rows from before numbering are left alone until the data migration numbers them.
+        Payment.objects.filter(pk=payment.pk).update(receipt_number=None, is_reversed=False)
+        payment.refresh_from_db()
+        payment.save()
+        self.assertIsNone(payment.receipt_number)
+
+    def test_migration_numbers_existing_rows_in_order(self):
+        migration = importlib.import_module("fees.migrations.0022_number_existing_documents")
+        student = self.make_student()
+        invoices = [
+            Invoice.objects.create(school=self.school, student=student, amount_due=Decimal("100"), due_date=date.today())
+            for _ in range(3)
+        ]
+        Invoice.objects.filter(pk=invoices[0].pk).update(created_at=datetime(2023, 9, 1, tzinfo=dt_timezone.utc))
+        Invoice.objects.filter(pk=invoices[1].pk).update(created_at=datetime(2024, 2, 1, tzinfo=dt_timezone.utc))
+        Invoice.objects.filter(pk=invoices[2].pk).update(created_at=datetime(2023, 10, 1, tzinfo=dt_timezone.utc))
+        issued = Payment.objects.create(school=self.school, invoice=invoices[0], amount=Decimal("10"))
+        issued.mark_confirmed()
+        legacy = [
+            Payment.objects.create(
+                school=self.school, invoice=invoices[0], amount=Decimal("10"), status=status,
+                paid_on=datetime(2024, 3, day, tzinfo=dt_timezone.utc),
+            )
+            for day, status in ((5, "CONFIRMED"), (1, "CONFIRMED"), (2, "PENDING"))
+        ]
+        Invoice.objects.update(number=None)
+        Payment.objects.filter(pk__in=[p.pk for p in legacy]).update(receipt_number=None)
+
+        migration.number_existing_documents(django_apps, None)
+
+        self.assertEqual(
+            [Invoice.objects.get(pk=i.pk).number for i in invoices],
+            ["INV-2023-000001", "INV-2024-000001", "INV-2023-000002"],
+        )
+        self.assertEqual(
+            [Payment.objects.get(pk=p.pk).receipt_number for p in legacy],
+            ["RCT-2024-000002", "RCT-2024-000001", None],
+        )
+        issued.refresh_from_db()
+        self.assertTrue(issued.receipt_number.startswith("RCT-"))
+        self.assertEqual(
+            DocumentSequence.objects.get(school=self.school, kind=DocumentSequence.INVOICE, year=2023).next_value, 3,
+        )
+
+
+class PaymentJournalTests(BillingTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.student = self.make_student()
+        self.invoice = Invoice.objects.create(
+            school=self.school, student=self.student, fee=self.fee,
+            amount_due=Decimal("1000"), due_date=date(2025, 1, 5), billing_month=date(2025, 1, 1),
+        )
+
+    def pay(self, amount, day):
+        return Payment.objects.create(
+            school=self.school, invoice=self.invoice, amount=Decimal(amount),
+            paid_on=timezone.make_aware(datetime(day.year, day.month, day.day, 10)),
+            status=Payment.STATUS_CONFIRMED,
+        )
+
+    def test_invoice_and_payment_lifecycle_is_journaled(self):
+        payment = self.pay("400", date(2025, 1, 10))
+        self.assertEqual(journal.balance_as_of(self.student, date(2025, 1, 31)), Decimal("600"))
+
+        payment.is_reversed = True
+        payment.save()
+        kinds = list(JournalEntry.objects.filter(student=self.student).values_list("kind", flat=True))
+        self.assertEqual(kinds.count(JournalEntry.REVERSAL), 1)
+        self.assertEqual(journal.balance_as_of(self.student), Decimal("1000"))
+
+        # Saving again does not post a second reversal.
+        payment.save()
+        self.assertEqual(JournalEntry.objects.filter(kind=JournalEntry.REVERSAL).count(), 1)
+
+    def test_amount_change_posts_adjustment(self):
+        self.invoice.amount_due = Decimal("900")
+        self.invoice.save()
+        adjustment = JournalEntry.objects.get(kind=JournalEntry.ADJUSTMENT)
+        self.assertEqual(adjustment.receivable_delta, Decimal("-100"))
+
+    def test_entries_are_append_only(self):
+        entry = JournalEntry.objects.get(kind=JournalEntry.CHARGE)
+        entry.amount = Decimal("1")
+        with self.assertRaises(ValueError):
+            entry.save()
+        with self.assertRaises(ValueError):
+            entry.delete()
+
+    def test_snapshot_plus_tail_matches_full_history(self):
+        self.pay("300", date(2025, 1, 10))
+        self.assertEqual(journal.take_snapshots(self.school, date(2025, 1, 31)), 1)
+        self.pay("200", date(2025, 2, 3))
+        # Posted after the snapshot but dated inside it: must still count.
+        self.pay("100", date(2025, 1, 20))
+
+        snapshot = StudentBalanceSnapshot.objects.get()
+        self.assertEqual(snapshot.balance, Decimal("700"))
+        self.assertEqual(journal.balance_as_of(self.student, date(2025, 1, 31)), Decimal("600"))
+        self.assertEqual(journal.balance_as_of(self.student, date(2025, 2, 28)), Decimal("400"))
+
+        journal.take_snapshots(self.school, date(2025, 2, 28))
+        self.assertEqual(
+            StudentBalanceSnapshot.objects.get(as_of=date(2025, 2, 28)).balance, Decimal("400")
+        )
+
+    def test_balances_for_many_students(self):
+        other = self.make_student(full_name="Other Child")
+        Invoice.objects.create(
+            school=self.school, student=other, fee=self.fee,
+            amount_due=Decimal("500"), due_date=date(2025, 2, 5), billing_month=date(2025, 2, 1),
+        )
+        self.pay("300", date(2025, 1, 10))
+        journal.take_snapshots(self.school, date(2025, 1, 31))
+        self.pay("100", date(2025, 1, 20))
+
+        self.assertEqual(
+            journal.balances([self.student.pk, other.pk], date(2025, 2, 28)),
+            {self.student.pk: Decimal("600"), other.pk: Decimal("500")},
+        )
+        self.assertEqual(journal.balances([other.pk], date(2025, 1, 31)), {other.pk: Decimal("0")})
+
+    def test_parent_pages_show_journal_balance(self):
+        self.pay("400", date(2025, 1, 10))
+        parent = User.objects.create_user(username="+251911000000", password="x", role="PARENT", school=self.school)
+        ParentProfile.objects.create(user=parent, phone_number="+251911000000").children.add(self.student)
+        self.client.force_login(parent)
+
+        pages = (("dashboard", "children"), ("kids", "children"), ("fees", "children_data"), ("parent-reports", "children_data"))
+        for name, key in pages:
+            context = self.client.get(reverse(f"parents:{name}")).context
+            self.assertEqual(context[key][0]["total_balance"], Decimal("600"), name)
+        response = self.client.get(reverse("parents:child_detail", args=[self.student.pk]))
+        self.assertEqual(response.context["total_balance"], Decimal("600"))
+
+    def test_ledger_blocks_deleting_its_student(self):
+        admin = User.objects.create_user(username="head", password="x", role="SCHOOL_ADMIN", school=self.school)
+        self.client.force_login(admin)
+        response = self.client.post(reverse("students:delete", args=[self.student.pk]))
+        self.assertRedirects(response, reverse("students:list"), fetch_redirect_response=False)
+        self.assertTrue(Student.objects.filter(pk=self.student.pk).exists())
+        with self.assertRaises(ProtectedError):
+            self.school.delete()
+        self.assertEqual(JournalEntry.objects.filter(student=self.student).count(), 1)
+
+    def test_statement_view_is_scoped_to_the_parents_children(self):
+        # A sibling record with a blank parent phone, like the parent user's own phone.
+        other = self.make_student(full_name="Other Child")
+        parent = User.objects.create_user(username="+251911000000", password="x", role="PARENT", school=self.school)
+        ParentProfile.objects.create(user=parent, phone_number="+251911000000").children.add(self.student)
+        self.client.force_login(parent)
+
+        response = self.client.get(reverse("fees:student_statement", args=[self.student.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["student"], self.student.full_name)
+        response = self.client.get(reverse("fees:student_statement", args=[other.pk]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_statement_running_balance(self):
+        self.pay("250", date(2025, 2, 1))
+        data = journal.statement(self.student, date(2025, 2, 1), date(2025, 2, 28))
+        self.assertEqual(data["opening_balance"], Decimal("1000"))
+        self.assertEqual([line["balance"] for line in data["entries"]], [Decimal("750")])
+        self.assertEqual(data["closing_balance"], Decimal("750"))
+
+
+class InvoiceConsistencyTests(BillingTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        student = self.make_student()
+        self.invoices = [
+            Invoice.objects.create(
+                school=self.school, student=student, fee=self.fee,
+                amount_due=Decimal("1000"), due_date=date(2025, 1, 5),
+            )
+            for _ in range(5)
+        ]
+        Payment.objects.create(
+            school=self.school, invoice=self.invoices[0], amount=Decimal("1000"), status=Payment.STATUS_CONFIRMED,
+        )
+        Payment.objects.create(
+            school=self.school, invoice=self.invoices[1], amount=Decimal("300"), status=Payment.STATUS_CONFIRMED,
+            is_reversed=True,
+        )
+        # Drift: invoice 0 never updated, invoice 1 kept the reversed amount.
+        Invoice.objects.filter(pk=self.invoices[1].pk).update(amount_paid=Decimal("300"), status="PARTIAL")
+
+    def test_scan_reports_without_repair(self):
+        result = scan_invoice_totals(chunk_size=2)
+        self.assertEqual(result.scanned, 5)
+        self.assertEqual(result.mismatched, 2)
+        self.assertEqual(result.repaired, 0)
+        self.assertEqual(Invoice.objects.get(pk=self.invoices[0].pk).amount_paid, Decimal("0"))
+
+    def test_scan_repairs_in_chunks(self):
+        result = scan_invoice_totals(chunk_size=2, repair=True)
+        self.assertEqual(result.repaired, 2)
+
+        first = Invoice.objects.get(pk=self.invoices[0].pk)
+        second = Invoice.objects.get(pk=self.invoices[1].pk)
+        self.assertEqual((first.amount_paid, first.status), (Decimal("1000"), "PAID"))
+        self.assertEqual((second.amount_paid, second.status), (Decimal("0"), "UNPAID"))
+        self.assertEqual(scan_invoice_totals().mismatched, 0)
+
@@ -73,4 +73,7 @@ path(
     name="reject_unconfirmed_payment",
 ),
 
+# Journal
+path("students/<int:pk>/statement/", views.StudentStatementView.as_view(), name="student_statement"),
+
 ]
@@ -1,7 +1,11 @@
 # fees/utils.py
+from bisect import bisect_right
+from collections import defaultdict
 from datetime import date
 from django.db import transaction
-from fees.models import Invoice, FeeStructure
+from fees.models import Invoice, FeeStructure, FeePrice, StudentFeeOverride, DocumentSequence
+from fees.sequences import allocator
+from fees import journal
 from students.models import Student
 import io, zipfile
 from django.core import signing
@@ -48,26 +52,141 @@ def is_recurring_fee(fee: FeeStructure) -> bool:
     return fee.name != FeeStructure.REGISTRATION
 
 
+class FeePriceIndex:
+    """
+    In-memory, per-fee sorted price history for one billing run.
+    Built with a single query; `amount_for` is a binary search over the
+    fee's `effective_from` dates instead of a query per invoice.
+    """
+
+    def __init__(self, prices):
+        self._starts = {}
+        self._amounts = {}
+        for fee_id, effective_from, amount in prices:
+            self._starts.setdefault(fee_id, []).append(effective_from)
+            self._amounts.setdefault(fee_id, []).append(amount)
+
+    @classmethod
+    def for_school(cls, school):
+        prices = (
+            FeePrice.objects.filter(fee__school=school)
+            .order_by("fee_id", "effective_from")
+            .values_list("fee_id", "effective_from", "amount")
+        )
+        return cls(prices)
+
+    def amount_for(self, fee, billing_month):
+        """Price of `fee` for `billing_month` (months before the first version use the earliest one)."""
+        starts = self._starts.get(fee.id)
+        if not starts:
+            return fee.amount
+        i = bisect_right(starts, billing_month) - 1
+        return self._amounts[fee.id][max(i, 0)]
+
+
+class FeeApplicabilityResolver:
+    """
+    Decides which fees apply to each student, built once per billing run.
+
+    A fee applies to a student when it is `auto_apply` and its optional
+    division / class_program scope matches the student's, plus any legacy
+    `Student.fee_structures` assignments and INCLUDE overrides, minus
+    EXCLUDE overrides. Scoped fees are cached per (division, class_program)
+    so a new class is covered without any per-student rows.
+    """
+
+    def __init__(self, school):
+        fees = list(FeeStructure.objects.filter(school=school))
+        self._fees = {fee.id: fee for fee in fees}
+        self._auto_fees = [fee for fee in fees if fee.auto_apply]
+        self._by_scope = {}
+
+        self._included = defaultdict(set)
+        self._excluded = defaultdict(set)
+        self._custom_amounts = {}
+
+        # Legacy explicit assignments behave like INCLUDE overrides.
+        assignments = Student.fee_structures.through.objects.filter(
+            feestructure__school=school
+        ).values_list("student_id", "feestructure_id")
+        for student_id, fee_id in assignments:
+            self._included[student_id].add(fee_id)
+
+        overrides = StudentFeeOverride.objects.filter(fee__school=school).values_list(
+            "student_id", "fee_id", "action", "amount"
+        )
+        for student_id, fee_id, action, amount in overrides:
+            if action == StudentFeeOverride.EXCLUDE:
+                self._excluded[student_id].add(fee_id)
+                continue
+            self._included[student_id].add(fee_id)
+            if amount is not None:
+                self._custom_amounts[(student_id, fee_id)] = amount
+
+    def fees_for_scope(self, division_id, class_program_id):
+        key = (division_id, class_program_id)
+        if key not in self._by_scope:
+            self._by_scope[key] = [
+                fee for fee in self._auto_fees
+                if fee.division_id in (None, division_id)
+                and fee.class_program_id in (None, class_program_id)
+            ]
+        return self._by_scope[key]
+
+    def fees_for(self, student):
+        excluded = self._excluded.get(student.id, ())
+        fees = {
+            fee.id: fee
+            for fee in self.fees_for_scope(student.division_id, student.class_program_id)
+            if fee.id not in excluded
+        }
+        for fee_id in self._included.get(student.id, ()):
+            if fee_id not in excluded and fee_id in self._fees:
+                fees.setdefault(fee_id, self._fees[fee_id])
+        return list(fees.values())
+
+    def amount_for(self, student, fee, billing_month, prices):
+        """Student's custom amount if overridden, otherwise the fee price for that month."""
+        custom = self._custom_amounts.get((student.id, fee.id))
+        if custom is not None:
+            return custom
+        return prices.amount_for(fee, billing_month)
+
+
 def generate_invoices_for_school(school):
     """
     Generate invoices for all students in a school.
     - Creates an opening balance invoice (with correct starting_billing_month).
     - Invoices all missed months up to today for recurring fees.
     - Prevents duplicate registration invoices.
+    - Charges each month at the fee price effective for that month.
+    - Resolves each student's fees from scope rules and overrides.
     """
     today = date.today()
     new_invoices = []
     count = 0
+    prices = FeePriceIndex.for_school(school)
+    applicability = FeeApplicabilityResolver(school)
 
+    # 🔹 Already-billed keys, loaded once instead of an exists() per fee/month
+    billed = set(
+        Invoice.objects.filter(school=school, fee__isnull=False)
+        .values_list("student_id", "fee_id", "billing_month")
+    )
+    billed_once = {(student_id, fee_id) for student_id, fee_id, _ in billed}
+    has_opening_balance = set(
+        Invoice.objects.filter(school=school, status="OPENING_BALANCE")
+        .values_list("student_id", flat=True)
+    )
 
     # 🔹 Get all students linked to this school
-    students = Student.objects.filter(
-        division__school=school
-    ).prefetch_related("fee_structures")
+    students = Student.objects.filter(division__school=school)
 
     for student in students:
+        fees = applicability.fees_for(student)
+
         # 🔹 Skip students with no fees or no billing setup
-        if not student.fee_structures.exists():
+        if not fees:
             print(f"⚠️ Skipping {student.full_name} (No fee structures)")
             continue
         if not student.next_payment_date:
@@ -76,9 +195,7 @@ def generate_invoices_for_school(school):
 
         # 🔹 Create Opening Balance Invoice
         if student.opening_balance and student.opening_balance > 0:
-            if not Invoice.objects.filter(
-                student=student, status="OPENING_BALANCE"
-            ).exists():
+            if student.id not in has_opening_balance:
                 due_date = student.starting_billing_month or today
                 billing_month = (student.starting_billing_month or today).replace(day=1)
                 new_invoices.append(
@@ -108,16 +225,14 @@ def generate_invoices_for_school(school):
         while next_payment and next_payment <= today:
             billing_month = next_payment.replace(day=1)
 
-            for fee in student.fee_structures.all():
+            for fee in fees:
                 # Skip duplicate REGISTRATION invoices
                 if not is_recurring_fee(fee):
-                    if Invoice.objects.filter(student=student, fee=fee).exists():
+                    if (student.id, fee.id) in billed_once:
                         continue
 
                 # Skip if already billed this month
-                if Invoice.objects.filter(
-                    student=student, fee=fee, billing_month=billing_month
-                ).exists():
+                if (student.id, fee.id, billing_month) in billed:
                     continue
 
                 # Create new invoice
@@ -126,12 +241,14 @@ def generate_invoices_for_school(school):
                         school=school,
                         student=student,
                         fee=fee,
-                        amount_due=fee.amount,
+                        amount_due=applicability.amount_for(student, fee, billing_month, prices),
                         due_date=next_payment,
                         billing_month=billing_month,
                         status="UNPAID",
                     )
                 )
+                billed.add((student.id, fee.id, billing_month))
+                billed_once.add((student.id, fee.id))
                 count += 1
                 created_for_student = True
 
@@ -144,10 +261,14 @@ def generate_invoices_for_school(school):
             student.payment_status = "PENDING"
             student.save(update_fields=["next_payment_date", "payment_status"])
 
-    # 🔹 Bulk insert invoices
+    # 🔹 Bulk insert invoices (bulk_create skips save(), so number them here)
     if new_invoices:
         with transaction.atomic():
+            numbers = allocator.take(school.id, DocumentSequence.INVOICE, len(new_invoices))
+            for invoice, number in zip(new_invoices, numbers):
+                invoice.number = number
             Invoice.objects.bulk_create(new_invoices)
+            journal.post_charges(new_invoices)
 
     return count
 
@@ -183,7 +304,7 @@ def export_multiple_payment_receipts_pdf(payments):
     # Narrow receipt size (width=3 inches, dynamic height)
     receipt_width = 3 * inch
     line_height = 12
-    num_lines = 15 + len(payments)  # Adjust for content
+    num_lines = 15 + 2 * len(payments)  # Adjust for content
     receipt_height = num_lines * line_height
 
     response = HttpResponse(content_type="application/pdf")
@@ -210,7 +331,8 @@ def export_multiple_payment_receipts_pdf(payments):
     total_paid = 0
     for p in payments:
         total_paid += p.amount
-        line(f"INV#{p.invoice.id}  {p.amount:.2f} Br.")
+        line(f"{p.display_receipt_number}  {p.amount:.2f} Br.")
+        line(f"{p.invoice.display_number}", indent=10)
 
     line("-------------------------------")
     line(f"TOTAL PAID: {total_paid:.2f} Br.")
@@ -230,15 +352,15 @@ def export_separate_payment_receipts_zip(payments):
         for payment in payments:
             pdf_buffer = io.BytesIO()
             c = canvas.Canvas(pdf_buffer, pagesize=A4)
-            c.drawString(100, 800, f"Receipt for Payment #{payment.id}")
+            c.drawString(100, 800, f"Receipt {payment.display_receipt_number}")
             c.drawString(100, 780, f"Student: {payment.invoice.student.full_name}")
-            c.drawString(100, 760, f"Invoice: {payment.invoice.id}")
+            c.drawString(100, 760, f"Invoice: {payment.invoice.display_number}")
             c.drawString(100, 740, f"Amount Paid: {payment.amount} Br.")
             c.drawString(100, 720, f"Paid On: {payment.paid_on}")
             c.drawString(100, 700, f"Method: {payment.method}")
             c.showPage()
             c.save()
-            zip_file.writestr(f"receipt_{payment.id}.pdf", pdf_buffer.getvalue())
+            zip_file.writestr(f"receipt_{payment.receipt_number or payment.id}.pdf", pdf_buffer.getvalue())
 
     buffer.seek(0)
     response = HttpResponse(buffer, content_type="application/zip")
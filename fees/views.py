@@ -8,7 +8,7 @@ from django.db.models import Q, Sum, Case, When, Value, BooleanField, Max, Count
 from reportlab.pdfgen import canvas
 from .models import Invoice, Payment, FeeStructure, Student, PaymentReversal
 from core.mixins import RoleRequiredMixin  # Adjust this if needed
-from .forms import InvoiceForm, FeeForm
+from .forms import InvoiceForm, FeeForm, FeeUpdateForm
 from django.contrib import messages
 from django.views import View
 from datetime import date
@@ -25,6 +25,7 @@ from datetime import datetime, timedelta
 from django.core import signing
 from django.db import transaction
 from .utilis import make_receipt_token, generate_payments_pdf, generate_payments_excel
+from . import journal
 # ---------------- Dashboard ----------------
 class FeesDashboardView(RoleRequiredMixin,  TemplateView):
     template_name = "fees/fee_dashboard.html"
@@ -118,14 +119,30 @@ class FeeCreateView(RoleRequiredMixin, CreateView):
 
 class FeeUpdateView(RoleRequiredMixin, UpdateView):
     model = FeeStructure
+    form_class = FeeUpdateForm
     template_name = "fees/fee_form.html"
-    fields = ["name", "amount", "description"]
     success_url = reverse_lazy("fees:fees_list")
     allowed_roles = ["ADMIN", "SCHOOL_ADMIN", "ACCOUNTANT"]
 
     def get_queryset(self):
         return FeeStructure.objects.filter(school=self.request.user.school)
 
+    def form_valid(self, form):
+        # Picked up by fees.signals.record_fee_price_version
+        form.instance._price_effective_from = form.cleaned_data["effective_from"]
+        form.instance._price_changed_by = self.request.user
+        return super().form_valid(form)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update({
+            "title": "Edit Fee",
+            "subtitle": "Changing the amount creates a new price version; past months keep their price.",
+            "active_tab": "fees",
+            "price_history": self.object.prices.order_by("-effective_from"),
+        })
+        return context
+
 
 class FeeDeleteView(RoleRequiredMixin, DeleteView):
     model = FeeStructure
@@ -677,22 +694,14 @@ class ReversePaymentView(FormView):
         
         )
 
-        # Reverse invoice changes
-        invoice = self.payment.invoice
-        payment = self.payment
-        invoice.amount_paid -= self.payment.amount
-   
-
-        if invoice.description != "Opening Balance":
-            invoice.status = "UNPAID"
-        else:
-            invoice.status = 'OPENING_BALANCE'
-        invoice.save()
-
-        # Soft delete payment
+        # Soft delete payment (the journal gets a REVERSAL entry via signals)
         self.payment.is_reversed = True
+        self.payment._changed_by = self.request.user
         self.payment.save()
 
+        # Recompute the invoice from the payments that still count
+        self.payment.invoice.refresh_amount_paid()
+
         messages.success(self.request, f"Payment #{self.payment.id} has been reversed.")
         return redirect('fees:payment_detail', pk=self.payment.invoice.student.pk)
 
@@ -1045,16 +1054,8 @@ class UnconfirmedPaymentsListView(RoleRequiredMixin, ListView):
                     impacted_invoices.add(p.invoice_id)
 
             # Recalculate invoice totals for impacted invoices
-            for inv_id in impacted_invoices:
-                inv = Invoice.objects.select_for_update().get(id=inv_id)
-                total = inv.payments.filter(status="CONFIRMED", is_reversed=False).aggregate(total=Sum("amount"))["total"] or 0
-                inv.amount_paid = total
-                inv.status = (
-                    "PAID" if total >= inv.amount_due
-                    else "PARTIAL" if total > 0
-                    else "UNPAID"
-                )
-                inv.save(update_fields=["amount_paid", "status"])
+            for inv in Invoice.objects.select_for_update().filter(id__in=impacted_invoices):
+                inv.refresh_amount_paid()
 
         if changed_confirmed:
             messages.success(request, f"{changed_confirmed} payment(s) confirmed.")
@@ -1118,17 +1119,7 @@ class ConfirmUnconfirmedPaymentView(RoleRequiredMixin, View):
             payment.save(update_fields=[f for f in ["status", "confirmed_by", "confirmed_on"] if hasattr(payment, f)])
 
             # Recalculate invoice.amount_paid from CONFIRMED payments only
-            inv = payment.invoice
-            confirmed_sum = inv.payments.filter(status="CONFIRMED", is_reversed=False).aggregate(total=Sum("amount"))["total"] or 0
-            inv.amount_paid = confirmed_sum
-            # update status
-            if inv.amount_paid >= inv.amount_due:
-                inv.status = "PAID"
-            elif inv.amount_paid > 0:
-                inv.status = "PARTIAL"
-            else:
-                inv.status = "UNPAID"
-            inv.save(update_fields=["amount_paid", "status"])
+            payment.invoice.refresh_amount_paid()
 
         messages.success(request, f"Payment #{payment.id} confirmed.")
         return redirect(reverse_lazy("fees:unconfirmed_payments_list"))
@@ -1154,16 +1145,41 @@ class RejectUnconfirmedPaymentView(RoleRequiredMixin, View):
             payment.save(update_fields=[f for f in ["status", "confirmed_by", "confirmed_on"] if hasattr(payment, f)])
 
             # Recalculate invoice.amount_paid using only CONFIRMED payments
-            inv = payment.invoice
-            confirmed_sum = inv.payments.filter(status="CONFIRMED", is_reversed=False).aggregate(total=Sum("amount"))["total"] or 0
-            inv.amount_paid = confirmed_sum
-            if inv.amount_paid >= inv.amount_due:
-                inv.status = "PAID"
-            elif inv.amount_paid > 0:
-                inv.status = "PARTIAL"
-            else:
-                inv.status = "UNPAID"
-            inv.save(update_fields=["amount_paid", "status"])
+            payment.invoice.refresh_amount_paid()
 
         messages.success(request, f"Payment #{payment.id} rejected.")
-        return redirect(request.META.get("HTTP_REFERER") or reverse_lazy("fees:unconfirmed_payments_list"))
\ No newline at end of file
+        return redirect(request.META.get("HTTP_REFERER") or reverse_lazy("fees:unconfirmed_payments_list"))
+
+
+# ---------- Student statement (journal) ----------
+class StudentStatementView(RoleRequiredMixin, View):
+    """
+    JSON account statement for one student, read from the payment journal:
+    opening balance, entries with a running balance, closing balance.
+    ?from=YYYY-MM-DD&to=YYYY-MM-DD, defaulting to the current year.
+    """
+    allowed_roles = ["ADMIN", "SCHOOL_ADMIN", "ACCOUNTANT", "PARENT"]
+
+    def get(self, request, pk, *args, **kwargs):
+        students = Student.objects.filter(school=request.user.school)
+        if request.user.role == "PARENT":
+            # Only the parent's linked children (see students.signals.ensure_parent_account).
+            profile = getattr(request.user, "parent_profile", None)
+            students = profile.children.filter(school=request.user.school) if profile else students.none()
+        student = get_object_or_404(students, pk=pk)
+
+        today = timezone.localdate()
+        try:
+            start = date.fromisoformat(request.GET["from"]) if request.GET.get("from") else today.replace(month=1, day=1)
+            end = date.fromisoformat(request.GET["to"]) if request.GET.get("to") else today
+        except ValueError:
+            return JsonResponse({"error": "Dates must be YYYY-MM-DD."}, status=400)
+
+        data = journal.statement(student, start, end)
+        return JsonResponse({
+            "student": student.full_name,
+            "from": start,
+            "to": end,
+            **data,
+        })
+
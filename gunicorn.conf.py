@@ -0,0 +1,18 @@
+"""
+Gunicorn settings for the web process (Procfile, Dockerfile).
+
+Every request is short: the live attendance board (attendance.live) is
+polled with conditional requests rather than streamed, so open dashboards
+don't hold workers. Threaded workers let a worker overlap requests waiting
+on the database; WEB_CONCURRENCY x WEB_THREADS bounds in-flight requests.
+"""
+import os
+
+bind = os.environ.get("BIND", f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+worker_class = "gthread"
+threads = int(os.environ.get("WEB_THREADS", 4))
+timeout = int(os.environ.get("WEB_TIMEOUT", 30))
+graceful_timeout = 30
+accesslog = "-"
+errorlog = "-"
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Announcement
+from .models import Announcement, OutboxMessage, StudentAlert
 
 
 @admin.register(Announcement)
@@ -7,4 +7,21 @@ class AnnouncementAdmin(admin.ModelAdmin):
     list_display = ('title', 'school', 'message', 'created_at')
     list_filter = ('school', 'created_at')
     search_fields = ('title', 'school__name')
-    date_hierarchy = 'created_at'
\ No newline at end of file
+    date_hierarchy = 'created_at'
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ('channel', 'recipient', 'subject', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'school')
+    list_filter = ('status', 'channel', 'school')
+    search_fields = ('recipient', 'subject', 'source')
+    readonly_fields = ('created_at', 'sent_at', 'last_error')
+
+
+
+@admin.register(StudentAlert)
+class StudentAlertAdmin(admin.ModelAdmin):
+    list_display = ('student', 'kind', 'date', 'priority', 'created_at', 'school')
+    list_filter = ('school', 'kind', 'priority')
+    search_fields = ('student__full_name',)
+    date_hierarchy = 'date'
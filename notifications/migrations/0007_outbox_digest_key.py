@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0006_outbox_message'),
+        ('schools', '0002_school_telegram_bot_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='digest_key',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='outboxmessage',
+            index=models.Index(fields=['digest_key', 'status'], name='notificatio_digest__816460_idx'),
+        ),
+    ]
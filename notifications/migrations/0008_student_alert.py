@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0007_outbox_digest_key'),
+        ('schools', '0002_school_telegram_bot_token'),
+        ('students', '0006_alter_student_parent_phone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('ABSENT', 'Absent'), ('LATE', 'Late'), ('HALF_DAY', 'Half day'), ('CORRECTED', 'Attendance corrected'), ('CONSECUTIVE_ABSENCE', 'Consecutive absence')], max_length=20)),
+                ('date', models.DateField()),
+                ('message', models.TextField()),
+                ('priority', models.CharField(choices=[('INFO', 'Info'), ('IMPORTANT', 'Important'), ('URGENT', 'Urgent')], default='INFO', max_length=20)),
+                ('dedupe_key', models.CharField(max_length=64, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(blank=True, null=True)),
+                ('school', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='student_alerts', to='schools.school')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alerts', to='students.student')),
+            ],
+            options={
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['student', '-created_at'], name='notificatio_student_c5b217_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 01:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0008_student_alert'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentalert',
+            name='batch',
+            field=models.UUIDField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -164,6 +164,59 @@ class Announcement(models.Model):
     def __str__(self):
         return f"{self.title} ({self.school.name})"
 
+class StudentAlertQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(models.Q(expires_at__isnull=True) | models.Q(expires_at__gt=timezone.now()))
+
+    def for_parent(self, user):
+        return self.filter(student__parents__user=user)
+
+
+class StudentAlert(models.Model):
+    """
+    An attendance alert about one student, shown to that student's parents.
+    Replaces the school-wide ATTENDANCE Announcements, so announcement
+    queries no longer wade through them. `dedupe_key` is a hash of
+    (student, kind, date[, detail]); see attendance.signals.alert_key.
+    """
+    ABSENT = 'ABSENT'
+    LATE = 'LATE'
+    HALF_DAY = 'HALF_DAY'
+    CORRECTED = 'CORRECTED'
+    CONSECUTIVE_ABSENCE = 'CONSECUTIVE_ABSENCE'
+    KIND_CHOICES = [
+        (ABSENT, 'Absent'),
+        (LATE, 'Late'),
+        (HALF_DAY, 'Half day'),
+        (CORRECTED, 'Attendance corrected'),
+        (CONSECUTIVE_ABSENCE, 'Consecutive absence'),
+    ]
+
+    school = models.ForeignKey('schools.School', on_delete=models.CASCADE, related_name='student_alerts')
+    student = models.ForeignKey('students.Student', on_delete=models.CASCADE, related_name='alerts')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    date = models.DateField()
+    message = models.TextField()
+    priority = models.CharField(max_length=20, choices=PRIORITY_CHOICES, default='INFO')
+    dedupe_key = models.CharField(max_length=64, unique=True)
+    # The write batch that inserted the row, so a batch can tell its own
+    # inserts from keys a concurrent batch wrote first.
+    batch = models.UUIDField(blank=True, null=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(blank=True, null=True)
+
+    objects = StudentAlertQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['student', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.student} {self.get_kind_display()} on {self.date}"
+
+
 class AnnouncementAttachment(models.Model):
     announcement = models.ForeignKey(Announcement, on_delete=models.CASCADE, related_name='attachments')
     file = models.FileField(upload_to='announcements/')
@@ -196,3 +249,53 @@ class AnnouncementRead(models.Model):
     class Meta:
         unique_together = ('announcement', 'user')
 
+
+
+class OutboxMessage(models.Model):
+    """
+    A message to an external channel, written in the same transaction as the
+    event that caused it and delivered later by `manage.py drain_outbox`.
+    """
+    TELEGRAM = 'TELEGRAM'
+    EMAIL = 'EMAIL'
+    SMS = 'SMS'
+    CHANNEL_CHOICES = [
+        (TELEGRAM, 'Telegram'),
+        (EMAIL, 'Email'),
+        (SMS, 'SMS'),
+    ]
+
+    PENDING = 'PENDING'
+    SENT = 'SENT'
+    FAILED = 'FAILED'  # gave up after OUTBOX_MAX_ATTEMPTS
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    ]
+
+    school = models.ForeignKey('schools.School', on_delete=models.CASCADE, related_name='outbox_messages')
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES)
+    recipient = models.CharField(max_length=255, help_text="Telegram chat id, email address or phone number")
+    subject = models.CharField(max_length=255, blank=True)
+    body = models.TextField()
+    source = models.CharField(max_length=100, blank=True, help_text="What produced it, e.g. attendance:123")
+    # Messages sharing a digest key are folded into one until it is first claimed
+    digest_key = models.CharField(max_length=255, blank=True)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['next_attempt_at', 'id']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+            models.Index(fields=['digest_key', 'status']),
+        ]
+
+    def __str__(self):
+        return f"{self.channel} → {self.recipient} ({self.status})"
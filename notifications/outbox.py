@@ -0,0 +1,216 @@
+# notifications/outbox.py
+"""
+Transactional outbox for Telegram / email / SMS.
+
+Producers call `enqueue()` inside their own transaction, so a message exists
+exactly when the event that caused it was committed, and nothing in the
+request path waits on an external API. `enqueue_digests()` folds messages
+into a pending message with the same digest key instead, so a burst of
+events reaches each recipient as one message per channel. `drain()` (run by the
+`drain_outbox` worker command) claims due messages, delivers them grouped by
+channel and reschedules failures with exponential backoff.
+"""
+import logging
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 8)
+RETRY_BASE = getattr(settings, 'OUTBOX_RETRY_BASE_SECONDS', 30)
+RETRY_MAX = getattr(settings, 'OUTBOX_RETRY_MAX_SECONDS', 60 * 60)
+# How long a claimed batch is hidden from other workers; a crashed worker's
+# messages become due again after this.
+CLAIM_LEASE = getattr(settings, 'OUTBOX_CLAIM_LEASE_SECONDS', 5 * 60)
+TELEGRAM_TIMEOUT = getattr(settings, 'OUTBOX_TELEGRAM_TIMEOUT', 5)
+
+
+def message(school, channel, recipient, body, subject="", source="", deliver_after=None, digest_key=""):
+    """Build an unsaved OutboxMessage (for enqueue_many / enqueue_digests)."""
+    return OutboxMessage(
+        school=school,
+        channel=channel,
+        recipient=str(recipient),
+        subject=subject,
+        body=body,
+        source=source,
+        next_attempt_at=deliver_after or timezone.now(),
+        digest_key=digest_key,
+    )
+
+
+def enqueue(school, channel, recipient, body, subject="", source=""):
+    msg = message(school, channel, recipient, body, subject=subject, source=source)
+    msg.save()
+    return msg
+
+
+def enqueue_many(messages):
+    return OutboxMessage.objects.bulk_create(messages, batch_size=500)
+
+
+def enqueue_digests(messages):
+    """
+    Append each message's body as a line of the pending digest with the same
+    digest_key, or start a new digest headed by its subject. A digest takes
+    lines until a worker first claims it, i.e. until its next_attempt_at.
+    Repeated lines are dropped. Returns the number of new digests.
+    """
+    keys = {msg.digest_key for msg in messages}
+    with transaction.atomic():
+        digests = {
+            digest.digest_key: digest
+            for digest in OutboxMessage.objects.select_for_update().filter(
+                digest_key__in=keys, status=OutboxMessage.PENDING, attempts=0,
+            )
+        }
+        new, grown = [], {}
+        for msg in messages:
+            digest = digests.get(msg.digest_key)
+            if digest is None:
+                msg.body = f"{msg.subject}\n{msg.body}" if msg.subject else msg.body
+                digests[msg.digest_key] = msg
+                new.append(msg)
+            elif msg.body not in digest.body.splitlines():
+                digest.body = f"{digest.body}\n{msg.body}"
+                if digest.pk:
+                    grown[digest.pk] = digest
+        OutboxMessage.objects.bulk_update(grown.values(), ["body"])
+        OutboxMessage.objects.bulk_create(new, batch_size=500)
+    return len(new)
+
+
+# ----------------------
+#  CHANNEL SENDERS
+# ----------------------
+# Each takes a list of messages and returns {message_id: error or None}.
+
+def send_sms(phone_number: str, message: str):
+    """Stub SMS sender. Replace with your provider (AfroMessages, Twilio, etc.)."""
+    logger.debug(f"[SMS] to {phone_number}: {message}")
+
+
+def _deliver_telegram(batch):
+    results = {}
+    with requests.Session() as http:  # one connection pool for the whole batch
+        for msg in batch:
+            token = msg.school.telegram_bot_token
+            if not token:
+                results[msg.id] = f"School '{msg.school.name}' has no Telegram bot token"
+                continue
+            try:
+                # Plain text: no parse_mode, so message content can't break parsing.
+                response = http.post(
+                    f"https://api.telegram.org/bot{token}/sendMessage",
+                    json={"chat_id": msg.recipient, "text": msg.body},
+                    timeout=TELEGRAM_TIMEOUT,
+                )
+                results[msg.id] = None if response.status_code == 200 else f"{response.status_code}: {response.text[:500]}"
+            except requests.exceptions.RequestException as e:
+                results[msg.id] = f"Network error: {e}"
+    return results
+
+
+def _deliver_email(batch):
+    results = {}
+    mail = get_connection(fail_silently=False)  # one SMTP session for the batch
+    try:
+        mail.open()
+        for msg in batch:
+            try:
+                EmailMessage(msg.subject, msg.body, settings.DEFAULT_FROM_EMAIL, [msg.recipient], connection=mail).send()
+                results[msg.id] = None
+            except Exception as e:
+                results[msg.id] = str(e) or e.__class__.__name__
+    except Exception as e:
+        for msg in batch:
+            results.setdefault(msg.id, f"SMTP unavailable: {e}")
+    finally:
+        mail.close()
+    return results
+
+
+def _deliver_sms(batch):
+    results = {}
+    for msg in batch:
+        try:
+            send_sms(msg.recipient, msg.body)
+            results[msg.id] = None
+        except Exception as e:
+            results[msg.id] = str(e) or e.__class__.__name__
+    return results
+
+
+DELIVERERS = {
+    OutboxMessage.TELEGRAM: _deliver_telegram,
+    OutboxMessage.EMAIL: _deliver_email,
+    OutboxMessage.SMS: _deliver_sms,
+}
+
+
+# ----------------------
+#  WORKER
+# ----------------------
+def backoff(attempts):
+    return timedelta(seconds=min(RETRY_BASE * 2 ** max(attempts - 1, 0), RETRY_MAX))
+
+
+def _claim(batch_size):
+    """Take up to `batch_size` due messages and lease them to this worker."""
+    now = timezone.now()
+    with transaction.atomic():
+        due = OutboxMessage.objects.filter(status=OutboxMessage.PENDING, next_attempt_at__lte=now)
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        batch = list(due.select_related("school").order_by("next_attempt_at", "id")[:batch_size])
+        if batch:
+            OutboxMessage.objects.filter(id__in=[m.id for m in batch]).update(
+                attempts=F("attempts") + 1,
+                next_attempt_at=now + timedelta(seconds=CLAIM_LEASE),
+            )
+            for msg in batch:
+                msg.attempts += 1
+    return batch
+
+
+def drain(batch_size=100):
+    """Deliver one batch of due messages. Returns (sent, failed) counts."""
+    batch = _claim(batch_size)
+    if not batch:
+        return 0, 0
+
+    by_channel = {}
+    for msg in batch:
+        by_channel.setdefault(msg.channel, []).append(msg)
+
+    now = timezone.now()
+    sent = failed = 0
+    for channel, messages in by_channel.items():
+        deliver = DELIVERERS.get(channel)
+        results = deliver(messages) if deliver else {m.id: f"Unknown channel {channel}" for m in messages}
+        for msg in messages:
+            error = results.get(msg.id, "No result from channel")
+            if error is None:
+                msg.status = OutboxMessage.SENT
+                msg.sent_at = now
+                msg.last_error = ""
+                sent += 1
+            else:
+                msg.last_error = error
+                if msg.attempts >= MAX_ATTEMPTS:
+                    msg.status = OutboxMessage.FAILED
+                    logger.error(f"Outbox message {msg.id} gave up after {msg.attempts} attempts: {error}")
+                else:
+                    msg.next_attempt_at = now + backoff(msg.attempts)
+                failed += 1
+
+    OutboxMessage.objects.bulk_update(batch, ["status", "sent_at", "last_error", "next_attempt_at"])
+    return sent, failed
@@ -0,0 +1,66 @@
+from datetime import timedelta
+from unittest import mock
+
+import requests
+from django.core import mail
+from django.test import TestCase
+from django.utils import timezone
+
+from notifications import outbox
+from notifications.models import OutboxMessage
+from schools.models import School
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.school = School.objects.create(name="Outbox School", in_progress=False, telegram_bot_token="token")
+
+    def test_drain_delivers_email_batch(self):
+        outbox.enqueue_many([
+            outbox.message(self.school, OutboxMessage.EMAIL, f"parent{i}@example.com", "Body", subject="Hi")
+            for i in range(3)
+        ])
+        self.assertEqual(outbox.drain(), (3, 0))
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(OutboxMessage.objects.exclude(status=OutboxMessage.SENT).exists())
+
+    def test_failed_telegram_is_retried_with_backoff(self):
+        msg = outbox.enqueue(self.school, OutboxMessage.TELEGRAM, "123", "Hello")
+        with mock.patch("requests.Session.post", side_effect=requests.exceptions.ConnectTimeout("slow")):
+            self.assertEqual(outbox.drain(), (0, 1))
+
+        msg.refresh_from_db()
+        self.assertEqual((msg.status, msg.attempts), (OutboxMessage.PENDING, 1))
+        self.assertGreater(msg.next_attempt_at, timezone.now() + timedelta(seconds=outbox.RETRY_BASE - 5))
+        # Not due yet, so the next drain leaves it alone.
+        self.assertEqual(outbox.drain(), (0, 0))
+
+    def test_gives_up_after_max_attempts(self):
+        msg = outbox.enqueue(self.school, OutboxMessage.TELEGRAM, "123", "Hello")
+        OutboxMessage.objects.filter(pk=msg.pk).update(attempts=outbox.MAX_ATTEMPTS - 1)
+        with mock.patch("requests.Session.post", return_value=mock.Mock(status_code=400, text="Bad Request")):
+            outbox.drain()
+
+        msg.refresh_from_db()
+        self.assertEqual(msg.status, OutboxMessage.FAILED)
+        self.assertIn("400", msg.last_error)
+
+    def test_digest_folds_messages_until_claimed(self):
+        later = timezone.now() + timedelta(minutes=30)
+
+        def line(body):
+            return outbox.message(
+                self.school, OutboxMessage.SMS, "+251900000000", body, subject="Updates",
+                deliver_after=later, digest_key="parent:1",
+            )
+
+        self.assertEqual(outbox.enqueue_digests([line("• one"), line("• two")]), 1)
+        self.assertEqual(outbox.enqueue_digests([line("• two"), line("• three")]), 0)
+        digest = OutboxMessage.objects.get()
+        self.assertEqual(digest.body, "Updates\n• one\n• two\n• three")
+        self.assertEqual(outbox.drain(), (0, 0))  # window still open
+
+        OutboxMessage.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(outbox.drain(), (1, 0))
+        # Claimed digests are closed; the next event starts a new one.
+        self.assertEqual(outbox.enqueue_digests([line("• four")]), 1)
@@ -13,6 +13,7 @@ from django.views.generic import TemplateView, DetailView, ListView, UpdateView,
 from django.shortcuts import get_object_or_404, redirect
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from core.mixins import RoleRequiredMixin, UserScopedMixin
+from fees import journal
 from fees.models import Invoice, Payment
 from django.db.models import Sum, Q, F, DecimalField, ExpressionWrapper
 from .models import ParentProfile
@@ -31,6 +32,7 @@ from django.views.generic import TemplateView
 from django.db.models import F, Sum, DecimalField, ExpressionWrapper
 from attendance.models import Attendance
 from fees.models import Invoice
+from notifications.models import StudentAlert
 from .models import ParentProfile
 from core.mixins import RoleRequiredMixin
 
@@ -72,6 +74,7 @@ class ParentDashboardView(RoleRequiredMixin, TemplateView):
         invoices_by_student = {}
         for inv in invoices_qs:
             invoices_by_student.setdefault(inv.student_id, []).append(inv)
+        balances = journal.balances(child.id for child in children)
 
         # Enrich children data
         enriched = []
@@ -102,7 +105,7 @@ class ParentDashboardView(RoleRequiredMixin, TemplateView):
             next_due = (
                 min((i.due_date for i in child_invoices if i.status in ["UNPAID", "PARTIAL", 'OPENING_BALANCE']), default=None)
             )
-            total_balance = sum(i.balance for i in child_invoices)
+            total_balance = balances[child.id]
 
             enriched.append({
                 "id": child.id,
@@ -134,12 +137,15 @@ class ParentDashboardView(RoleRequiredMixin, TemplateView):
             "attendance_rate": attendance_rate,
             "presents_this_month": presents,
             "late_half_this_month": late_half,
+            "recent_alerts": list(
+                StudentAlert.objects.active().filter(student__in=children).select_related("student")[:5]
+            ),
         })
 
         # ----- Fees Summary (all children) -----
         unpaid_count = invoices_qs.filter(Q(status="UNPAID") | Q(status="OPENING_BALANCE")).count()
         partial_count = invoices_qs.filter(status="PARTIAL").count()
-        total_outstanding = invoices_qs.aggregate(total=Sum("outstanding"))["total"] or 0
+        total_outstanding = sum(balances.values())
         next_due = invoices_qs.filter(status__in=["UNPAID", "PARTIAL", 'OPENING_BALANCE']).order_by("due_date").first()
 
         ctx.update({
@@ -282,12 +288,8 @@ class ChildDetailView(RoleRequiredMixin, DetailView):
         invoices = Invoice.objects.for_user(self.request.user).filter(student=child)
         ctx["invoices"] = invoices.order_by("-due_date")[:10]
 
-        # Outstanding balance
-        outstanding_expr = ExpressionWrapper(
-            F("amount_due") - F("amount_paid"),
-            output_field=DecimalField(max_digits=10, decimal_places=2),
-        )
-        ctx["total_balance"] = invoices.aggregate(total=Sum(outstanding_expr))["total"] or 0
+        # Outstanding balance, from the payment journal
+        ctx["total_balance"] = journal.balance_as_of(child)
 
         return ctx
 # 3) Attendance history for one child
@@ -323,6 +325,7 @@ class KidsView(RoleRequiredMixin, TemplateView):
         today = timezone.now().date()
         month_start = today.replace(day=1)
 
+        balances = journal.balances(child.id for child in children)
         enriched = []
         for child in children:
             # Attendance today
@@ -349,9 +352,7 @@ class KidsView(RoleRequiredMixin, TemplateView):
             unpaid_count = invoices.filter(status="UNPAID").count()
             partial_count = invoices.filter(status="PARTIAL").count()
             next_due = invoices.filter(status__in=["UNPAID","PARTIAL"]).order_by("due_date").first()
-            total_balance = invoices.aggregate(
-                total=Sum(F("amount_due") - F("amount_paid"))
-            )["total"] or 0
+            total_balance = balances[child.id]
 
             enriched.append({
                 "id": child.id,
@@ -397,15 +398,13 @@ class FeesView(RoleRequiredMixin, TemplateView):
         invoices_by_child = {}
         for inv in invoices:
             invoices_by_child.setdefault(inv.student_id, []).append(inv)
+        balances = journal.balances(child.id for child in children)
 
         for child in children:
             child_invoices = invoices_by_child.get(child.id, [])
             unpaid = [inv for inv in child_invoices if inv.status in ["UNPAID", "OPENING_BALANCE"]]
             partial = [inv for inv in child_invoices if inv.status == "PARTIAL"]
-            total_balance = sum(
-                getattr(inv, "balance", getattr(inv, "amount_due", 0) - getattr(inv, "amount_paid", 0))
-                for inv in child_invoices
-            ) if child_invoices else 0
+            total_balance = balances[child.id]
             next_due = None
             next_candidates = sorted(unpaid + partial, key=lambda x: x.due_date) if (unpaid or partial) else []
             if next_candidates:
@@ -423,12 +422,8 @@ class FeesView(RoleRequiredMixin, TemplateView):
             })
 
         # Global totals
+        total_balance = sum(balances.values())
         if invoices:
-            total_balance = sum(
-                getattr(inv, "balance", getattr(inv, "amount_due", 0) - getattr(inv, "amount_paid", 0))
-                for inv in invoices
-            )
-
             total_unpaid = sum(
                 getattr(inv, "amount_due", 0) - getattr(inv, "amount_paid", 0)
                 for inv in invoices
@@ -441,7 +436,7 @@ class FeesView(RoleRequiredMixin, TemplateView):
                 if getattr(inv, "status", "").upper() == "PAID"
             )
         else:
-            total_balance = total_unpaid = total_paid = 0
+            total_unpaid = total_paid = 0
 
         ctx["children_data"] = children_data
         ctx["total_balance"] = total_balance
@@ -478,6 +473,7 @@ class ParentReportsView(RoleRequiredMixin, TemplateView):
         invoices_by_student = {}
         for inv in invoices_qs:
             invoices_by_student.setdefault(inv.student_id, []).append(inv)
+        balances = journal.balances(child.id for child in children)
 
         children_data = []
         for child in children:
@@ -500,7 +496,7 @@ class ParentReportsView(RoleRequiredMixin, TemplateView):
             unpaid_count = sum(1 for i in child_invoices if i.status in ["UNPAID", "OPENING_BALANCE"])
             partial_count = sum(1 for i in child_invoices if i.status == "PARTIAL")
             next_due = min((i.due_date for i in child_invoices if i.status in ["UNPAID", "PARTIAL", "OPENING_BALANCE"]), default=None)
-            total_balance = sum(getattr(i, "balance", getattr(i, "amount_due", 0) - getattr(i, "amount_paid", 0)) for i in child_invoices)
+            total_balance = balances[child.id]
 
             children_data.append({
                 "child": child,
@@ -8,6 +8,11 @@ from django_apscheduler.jobstores import DjangoJobStore, register_events
 
 from schools.models import School
 from fees.utilis import generate_invoices_for_school
+from fees.journal import month_end, take_snapshots
+from fees.consistency import scan_invoice_totals
+from attendance.compaction import compact as compact_attendance_log
+from attendance.absenteeism import detect as detect_chronic_absence
+from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +31,65 @@ def scheduled_generate_invoices():
             logger.error(f"❌ Error generating invoices for {school.name}: {e}", exc_info=True)
 
 
+def scheduled_balance_snapshots():
+    """
+    Snapshot every student's journal balance at the end of last month, so
+    balances and statements only read the entries after it.
+    """
+    as_of = month_end(datetime.utcnow().date())
+    for school in School.objects.all():
+        try:
+            count = take_snapshots(school, as_of)
+            logger.info(f"🏫 {school.name}: {count} balance snapshot(s) as of {as_of}.")
+        except Exception as e:
+            logger.error(f"❌ Error snapshotting balances for {school.name}: {e}", exc_info=True)
+
+
+def scheduled_invoice_consistency_check():
+    """
+    Nightly scan of invoice totals against payments. Repairs mismatches only
+    when INVOICE_CONSISTENCY_AUTO_REPAIR is on; otherwise it just logs them.
+    """
+    repair = getattr(settings, "INVOICE_CONSISTENCY_AUTO_REPAIR", False)
+    try:
+        result = scan_invoice_totals(repair=repair)
+        if result.mismatched:
+            logger.warning(
+                f"⚠️ {result.mismatched} invoice(s) out of step with payments "
+                f"({result.repaired} repaired): {result.samples}"
+            )
+    except Exception as e:
+        logger.error(f"❌ Invoice consistency check failed: {e}", exc_info=True)
+
+
+def scheduled_attendance_log_compaction():
+    """
+    Nightly AttendanceLog compaction: collapses old runs of roster
+    corrections, keeping noted and after-the-day edits verbatim.
+    """
+    try:
+        result = compact_attendance_log()
+        logger.info(
+            f"🧹 Attendance log: {result.removed} entr(ies) compacted "
+            f"across {result.attendance_rows} attendance row(s)."
+        )
+    except Exception as e:
+        logger.error(f"❌ Attendance log compaction failed: {e}", exc_info=True)
+
+
+def scheduled_chronic_absence_detection():
+    """
+    Weekly absenteeism run: ranks students below the attendance threshold or
+    with a recurring weekday absence, for the report page to read.
+    """
+    for school in School.objects.all():
+        try:
+            flagged = detect_chronic_absence(school)
+            logger.info(f"🏫 {school.name}: {flagged} student(s) flagged for chronic absence.")
+        except Exception as e:
+            logger.error(f"❌ Chronic absence detection failed for {school.name}: {e}", exc_info=True)
+
+
 def create_daily_scheduler(timezone="UTC"):
     """
     Initialize and start APScheduler to run every midnight UTC (or custom timezone).
@@ -45,6 +109,46 @@ def create_daily_scheduler(timezone="UTC"):
         coalesce=True,    # Merge missed runs if server was down
     )
 
+    # Monthly balance snapshots, after the month's first invoice run
+    scheduler.add_job(
+        scheduled_balance_snapshots,
+        trigger=CronTrigger(day=1, hour=1, minute=0),
+        id="balance_snapshots_job",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+    )
+
+    # Nightly invoice totals check, clear of the midnight invoice run
+    scheduler.add_job(
+        scheduled_invoice_consistency_check,
+        trigger=CronTrigger(hour=2, minute=30),
+        id="invoice_consistency_job",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+    )
+
+    # Nightly attendance log compaction, after the invoice check
+    scheduler.add_job(
+        scheduled_attendance_log_compaction,
+        trigger=CronTrigger(hour=3, minute=30),
+        id="attendance_log_compaction_job",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+    )
+
+    # Weekly chronic absenteeism report, early Monday
+    scheduler.add_job(
+        scheduled_chronic_absence_detection,
+        trigger=CronTrigger(day_of_week="mon", hour=4, minute=0),
+        id="chronic_absence_job",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+    )
+
     # Register job events for logging
     register_events(scheduler)
 
@@ -1,5 +1,7 @@
 # schools/views.py
 
+from django.db.models import ProtectedError
+from django.shortcuts import redirect
 from django.urls import reverse_lazy
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView, DetailView
 from django.contrib import messages
@@ -53,9 +55,15 @@ class SchoolDeleteView(RoleRequiredMixin, DeleteView):
     success_url = reverse_lazy('schools:list')
     allowed_roles = ['SUPER_ADMIN']
 
-    def delete(self, request, *args, **kwargs):
-        messages.success(request, "School deleted successfully!")
-        return super().delete(request, *args, **kwargs)
+    def form_valid(self, form):
+        try:
+            response = super().form_valid(form)
+        except ProtectedError:
+            # The payment journal keeps the school's money history.
+            messages.error(self.request, f"{self.object.name} has fee history and can't be deleted.")
+            return redirect("schools:list")
+        messages.success(self.request, "School deleted successfully!")
+        return response
 
 
 class SchoolDetailView(RoleRequiredMixin, DetailView):
@@ -1,54 +1,102 @@
 
-from django.shortcuts import render
+from django.shortcuts import redirect, render
 from django.urls import reverse_lazy
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView
 from django.contrib import messages
 from core.mixins import RoleRequiredMixin, UserScopedMixin
 from .models import Student
 from .forms import StudentForm
-from fees.models import FeeStructure
-from django.db.models import Q
+from fees.models import FeeStructure, StudentFeeOverride
+from django.db.models import ProtectedError, Q
 
 
-class StudentCreateView(RoleRequiredMixin, UserScopedMixin, CreateView):
-    model = Student
-    form_class = StudentForm
-    template_name = 'students/student_form.html'
-    success_url = reverse_lazy('students:list')
-    allowed_roles = ['SCHOOL_ADMIN']
+class StudentFeesMixin:
+    """
+    Fee checkboxes on the student form.
+
+    Fees that apply by scope (`FeeStructure.applies_by_scope`) show checked
+    unless the student has an EXCLUDE override; unchecking one records that
+    override, checking it again removes it. Other fees are explicit
+    `Student.fee_structures` assignments. The form posts the fees it showed
+    checked (`fee_defaults`), so a scoped fee that was never offered checked,
+    e.g. on a new student, is left to apply automatically.
+    """
 
-    def get_form_kwargs(self):
-        """Pass the logged-in user to the form for scoping dropdowns."""
-        kwargs = super().get_form_kwargs()
-        kwargs['user'] = self.request.user  
-        return kwargs
+    def default_fees(self, fee_structures):
+        student = self.object
+        if student is None:
+            # Scope is unknown until the student is saved; unscoped fees apply to everyone.
+            return [fee.id for fee in fee_structures if fee.auto_apply and not (fee.division_id or fee.class_program_id)]
+        excluded = set(
+            student.fee_overrides.filter(action=StudentFeeOverride.EXCLUDE).values_list("fee_id", flat=True)
+        )
+        assigned = set(student.fee_structures.values_list("id", flat=True))
+        return [
+            fee.id for fee in fee_structures
+            if fee.id in assigned or (fee.applies_by_scope(student) and fee.id not in excluded)
+        ]
 
     def get_context_data(self, **kwargs):
         """Add fee structures list and selected fees to the template context."""
         context = super().get_context_data(**kwargs)
-        school = self.request.user.school
-        
-        # Only active fees for this school
-        fee_structures = FeeStructure.objects.filter(school=school, in_progress=True)
-        
-        selected_fees = []
+        fee_structures = FeeStructure.objects.filter(school=self.request.user.school, in_progress=True)
+
         if self.request.method == "POST":
             selected_fees = [int(f) for f in self.request.POST.getlist("fee_structures")]
-        
+            default_fees = [int(f) for f in self.request.POST.getlist("fee_defaults")]
+        else:
+            default_fees = selected_fees = self.default_fees(fee_structures)
+
         context.update({
             "fee_structures": fee_structures,
-            "selected_fees": selected_fees
+            "selected_fees": selected_fees,
+            "default_fees": default_fees,
         })
         return context
 
+    def save_fees(self):
+        student = self.object
+        selected = {int(f) for f in self.request.POST.getlist("fee_structures")}
+        defaults = {int(f) for f in self.request.POST.getlist("fee_defaults")}
+        assigned, include, exclude = [], [], []
+        for fee in FeeStructure.objects.filter(school=student.school, id__in=selected | defaults):
+            if not fee.applies_by_scope(student):
+                if fee.id in selected:
+                    assigned.append(fee)
+            elif fee.id in selected:
+                include.append(fee)
+            else:
+                exclude.append(fee)
+
+        student.fee_structures.set(assigned)
+        student.fee_overrides.filter(fee__in=include, action=StudentFeeOverride.EXCLUDE).delete()
+        for fee in exclude:
+            StudentFeeOverride.objects.update_or_create(
+                student=student, fee=fee,
+                defaults={"action": StudentFeeOverride.EXCLUDE, "amount": None, "reason": "Unchecked on student form"},
+            )
+
+
+class StudentCreateView(StudentFeesMixin, RoleRequiredMixin, UserScopedMixin, CreateView):
+    model = Student
+    form_class = StudentForm
+    template_name = 'students/student_form.html'
+    success_url = reverse_lazy('students:list')
+    allowed_roles = ['SCHOOL_ADMIN']
+
+    def get_form_kwargs(self):
+        """Pass the logged-in user to the form for scoping dropdowns."""
+        kwargs = super().get_form_kwargs()
+        kwargs['user'] = self.request.user  
+        return kwargs
+
     def form_valid(self, form):
         """Handle saving multiple fee structures for a student."""
         form.instance.school = self.request.user.school  
         response = super().form_valid(form)
         
         # Save selected fees
-        selected_fees = self.request.POST.getlist("fee_structures")
-        self.object.fee_structures.set(selected_fees)
+        self.save_fees()
         
         messages.success(self.request, '✅ Student created successfully!')
         return response
@@ -75,7 +123,7 @@ class StudentListView(RoleRequiredMixin, UserScopedMixin, ListView):
         return queryset
     
     
-class StudentUpdateView(RoleRequiredMixin, UserScopedMixin, UpdateView):
+class StudentUpdateView(StudentFeesMixin, RoleRequiredMixin, UserScopedMixin, UpdateView):
     """
     Update an existing student record.
     Supports multiple fee structures selection.
@@ -87,25 +135,6 @@ class StudentUpdateView(RoleRequiredMixin, UserScopedMixin, UpdateView):
     success_url = reverse_lazy('students:list')
     allowed_roles = ['SCHOOL_ADMIN']
     
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        school = self.request.user.school
-        fee_structures = FeeStructure.objects.filter(school=school, in_progress=True)
-
-        if self.request.method == "POST":
-            selected_fees = [int(f) for f in self.request.POST.getlist("fee_structures")]
-        else:
-            student = self.object  # This is the student being edited
-            selected_fees = list(student.fee_structures.values_list("id", flat=True))
-            print("Selected fees:", selected_fees)
-
-        context.update({
-            "fee_structures": fee_structures,
-            "selected_fees": selected_fees
-        })
-        return context
-
-
     def get_form_kwargs(self):
         """
         Pass user to form to filter querysets (e.g., limit FeeStructures to their school).
@@ -118,8 +147,10 @@ class StudentUpdateView(RoleRequiredMixin, UserScopedMixin, UpdateView):
         """
         Save student and their related fee structures.
         """
+        response = super().form_valid(form)
+        self.save_fees()
         messages.success(self.request, f"✅ {form.instance.full_name} updated successfully!")
-        return super().form_valid(form)
+        return response
 
 
 class StudentDeleteView(RoleRequiredMixin, UserScopedMixin, DeleteView):
@@ -127,6 +158,12 @@ class StudentDeleteView(RoleRequiredMixin, UserScopedMixin, DeleteView):
     success_url = reverse_lazy("students:list")
     allowed_roles = ["SCHOOL_ADMIN"]
 
-    def delete(self, request, *args, **kwargs):
+    def form_valid(self, form):
+        try:
+            response = super().form_valid(form)
+        except ProtectedError:
+            # The payment journal keeps the student's money history.
+            messages.error(self.request, f"{self.object.full_name} has fee history and can't be deleted.")
+            return redirect("students:list")
         messages.success(self.request, "Student deleted successfully!")
-        return super().delete(request, *args, **kwargs)
\ No newline at end of file
+        return response
\ No newline at end of file